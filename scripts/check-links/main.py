@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from docs_index import PAGE_SUFFIXES, DocsIndex, iter_nav_slugs
+
+DOCS_BASE_URL = "https://docs.blaxel.ai"
+DOCS_JSON_NAME = "docs.json"
+
+CACHE_FILE_NAME = ".link-check/cache.json"
+REPORT_FILE_NAME = ".link-check/report.json"
+CACHE_VERSION = 1
+
+DEFAULT_WORKERS = os.cpu_count() or 4
+
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+INLINE_CODE_RE = re.compile(r"`[^`\n]*`")
+COMMENT_RE = re.compile(r"\{/\*.*?\*/\}|<!--.*?-->", re.DOTALL)
+HEADING_RE = re.compile(r"^#{1,6}\s+(.*?)\s*#*\s*$")
+# [label](target "title") and ![alt](src); the target may be wrapped in <>.
+MD_LINK_RE = re.compile(r'(!?)\[(?:[^\[\]]|\[[^\]]*\])*\]\(\s*<?([^\s)>]+)>?(?:\s+"[^"]*")?\s*\)')
+# href="..." / src="..." attributes of MDX components and HTML tags.
+ATTR_LINK_RE = re.compile(r'\b(href|src)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|\{\s*["\']([^"\']*)["\']\s*\})')
+EXPLICIT_ID_RE = re.compile(r'\bid\s*=\s*["\']([^"\']+)["\']')
+SCHEME_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*:|^//")
+REDIRECT_PARAM_RE = re.compile(r":(\w+)(\*?)")
+
+# Where the docs site writes pages it generates from an OpenAPI spec, when
+# the navigation does not say, and files it serves without a source file.
+DEFAULT_OPENAPI_DIRECTORY = "api-reference"
+GENERATED_FILES = {"llms.txt", "llms-full.txt", "sitemap.xml"}
+
+
+def heading_anchor(text: str) -> str:
+    """
+    Anchor id the docs site generates for a heading: markup and
+    punctuation removed, lowercased, spaces turned into dashes.
+    """
+    text = re.sub(r"<[^>]+>", "", text)
+    text = re.sub(r"\[([^\]]*)\]\([^)]*\)", r"\1", text)
+    text = re.sub(r"[`*_~]", "", text).strip().lower()
+    text = re.sub(r"[^\w\- ]", "", text)
+    return text.replace(" ", "-")
+
+
+def extract_links(path: str) -> dict:
+    """
+    Parse one page: every link and image reference with its line number, and
+    every anchor the page defines (headings, with -1, -2... suffixes for
+    repeats, and explicit id attributes). Code blocks and inline code are
+    skipped. Only depends on the file content, so results can be cached by
+    content hash.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    # Keep line numbers: blank out comments instead of removing them.
+    text = COMMENT_RE.sub(lambda m: "\n" * m.group(0).count("\n"), text)
+
+    links = []
+    anchors = []
+    anchor_counts: dict[str, int] = {}
+    in_code = False
+    in_frontmatter = text.startswith("---")
+
+    for number, line in enumerate(text.split("\n"), start=1):
+        if in_frontmatter:
+            if number > 1 and line.strip() == "---":
+                in_frontmatter = False
+            continue
+        if FENCE_RE.match(line):
+            in_code = not in_code
+            continue
+        if in_code:
+            continue
+
+        line = INLINE_CODE_RE.sub("", line)
+
+        m = HEADING_RE.match(line)
+        if m:
+            anchor = heading_anchor(m.group(1))
+            count = anchor_counts.get(anchor, 0)
+            anchor_counts[anchor] = count + 1
+            anchors.append(anchor if count == 0 else f"{anchor}-{count}")
+
+        anchors.extend(EXPLICIT_ID_RE.findall(line))
+
+        for m in MD_LINK_RE.finditer(line):
+            links.append({"target": m.group(2), "line": number, "kind": "image" if m.group(1) else "link"})
+        for m in ATTR_LINK_RE.finditer(line):
+            target = next(v for v in m.groups()[1:] if v is not None)
+            links.append({"target": target, "line": number, "kind": "image" if m.group(1) == "src" else "link"})
+
+    return {"links": links, "anchors": anchors}
+
+
+def compile_redirect(source: str) -> re.Pattern:
+    """
+    Turn a docs.json redirect source into a regex: ":name" matches one path
+    segment and ":name*" any number of them.
+    """
+    parts = []
+    last = 0
+    for m in REDIRECT_PARAM_RE.finditer(source):
+        parts.append(re.escape(source[last:m.start()]))
+        if m.group(2):
+            parts.append(f"(?P<{m.group(1)}>.*)")
+        else:
+            parts.append(f"(?P<{m.group(1)}>[^/]+)")
+        last = m.end()
+    parts.append(re.escape(source[last:]))
+    return re.compile("".join(parts).rstrip("/") + "/?")
+
+
+def file_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+class LinkChecker:
+    """
+    Checks the internal links of every page under `root_dir` and of
+    docs.json against the docs tree, the navigation and docs.json redirects.
+
+    Pages are parsed on a process pool by extract_links(); results are
+    cached by content hash in `cache_path`, so a rerun only parses the pages
+    that changed. Resolving links is done afterwards, against the whole
+    tree, and is never cached.
+    """
+
+    def __init__(self, root_dir: Path, cache_path: Path | None = None, workers: int = DEFAULT_WORKERS):
+        self.root_dir = root_dir.resolve()
+        self.cache_path = cache_path
+        self.workers = workers
+        self.index = DocsIndex(self.root_dir, read_titles=False)
+
+        with (self.root_dir / DOCS_JSON_NAME).open("r", encoding="utf-8") as f:
+            self.docs_json = json.load(f)
+
+        self.redirects = [
+            (compile_redirect(self.normalize_url_path(entry["source"])), entry["destination"])
+            for entry in self.docs_json.get("redirects", [])
+            if entry.get("source") and entry.get("destination")
+        ]
+        self.generated_dirs = openapi_directories(self.docs_json)
+        self.parsed: dict[str, dict] = {}
+        self.stats = {"parsed": 0, "cached": 0}
+
+    @staticmethod
+    def normalize_url_path(path: str) -> str:
+        return "/" + path.strip().strip("/")
+
+    def load_cache(self) -> dict:
+        if self.cache_path is None or not self.cache_path.is_file():
+            return {}
+        try:
+            with self.cache_path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[links] Ignoring unreadable cache {self.cache_path}: {e}")
+            return {}
+        if data.get("version") != CACHE_VERSION:
+            return {}
+        return data.get("files", {})
+
+    def save_cache(self, files: dict):
+        if self.cache_path is None:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "files": files}, f, sort_keys=True)
+        os.replace(tmp_path, self.cache_path)
+
+    def parse_pages(self):
+        """
+        Fill `parsed` (page rel path -> {"hash", "links", "anchors"}), from
+        the cache where the content hash still matches.
+        """
+        cached = self.load_cache()
+        todo = []
+
+        for rel, entry in self.index.pages.items():
+            digest = file_hash(entry["path"])
+            hit = cached.get(rel)
+            if hit is not None and hit.get("hash") == digest:
+                self.parsed[rel] = hit
+                self.stats["cached"] += 1
+            else:
+                todo.append((rel, digest))
+
+        if todo:
+            paths = [str(self.index.pages[rel]["path"]) for rel, _ in todo]
+            if self.workers > 1 and len(todo) > 1:
+                with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                    results = list(executor.map(extract_links, paths, chunksize=8))
+            else:
+                results = [extract_links(path) for path in paths]
+
+            for (rel, digest), result in zip(todo, results):
+                self.parsed[rel] = {"hash": digest, **result}
+            self.stats["parsed"] = len(todo)
+
+        self.save_cache(self.parsed)
+
+    def resolve(self, target: str, from_rel: str | None) -> tuple[str | None, str | None, str | None]:
+        """
+        Resolve a link target. Returns (kind, resolved, anchor):
+          kind "external" for links to other sites, "page" with the rel path
+          of a page, "file" with the rel path of another file, "generated"
+          for pages the site builds from OpenAPI specs (not checked), or
+          None with the path that did not resolve.
+        """
+        if target.startswith(DOCS_BASE_URL + "/") or target == DOCS_BASE_URL:
+            target = target[len(DOCS_BASE_URL):] or "/"
+        elif SCHEME_RE.match(target):
+            return "external", None, None
+
+        path, _, anchor = target.partition("#")
+        path = path.split("?")[0]
+        anchor = anchor or None
+
+        if not path:
+            return ("page", from_rel, anchor) if from_rel else (None, target, anchor)
+
+        if path.startswith("/"):
+            url_path = self.normalize_url_path(path)
+        else:
+            base = "/" + os.path.dirname(from_rel or "")
+            url_path = self.normalize_url_path(os.path.normpath(os.path.join(base, path)))
+
+        for _ in range(5):
+            page = self.lookup_page(url_path)
+            if page is not None:
+                return "page", page, anchor
+
+            file_path = self.root_dir / url_path.lstrip("/")
+            if url_path != "/" and file_path.is_file():
+                return "file", url_path.lstrip("/"), anchor
+            # Pages under directories the index skips (img/...) are still
+            # served by the site; their anchors are not checked.
+            for suffix in PAGE_SUFFIXES:
+                if url_path != "/" and file_path.with_name(file_path.name + suffix).is_file():
+                    return "file", url_path.lstrip("/") + suffix, anchor
+
+            rel = url_path.lstrip("/")
+            if rel in GENERATED_FILES or any(rel.startswith(d + "/") for d in self.generated_dirs):
+                return "generated", rel, anchor
+
+            destination = self.redirect(url_path)
+            if destination is None:
+                break
+            destination_path, _, destination_anchor = destination.partition("#")
+            if SCHEME_RE.match(destination_path):
+                return "external", None, None
+            url_path = self.normalize_url_path(destination_path)
+            anchor = anchor or destination_anchor or None
+
+        return None, url_path, anchor
+
+    def redirect(self, url_path: str) -> str | None:
+        for pattern, destination in self.redirects:
+            m = pattern.fullmatch(url_path)
+            if m:
+                return REDIRECT_PARAM_RE.sub(lambda p: m.group(p.group(1)) or "", destination)
+        return None
+
+    def lookup_page(self, url_path: str) -> str | None:
+        slug = url_path.strip("/")
+        candidates = [slug] if os.path.splitext(slug)[1] in (".md", ".mdx") else [
+            slug + ".mdx", slug + ".md", f"{slug}/index.mdx".lstrip("/"), f"{slug}/index.md".lstrip("/")
+        ]
+        for candidate in candidates:
+            if candidate in self.index.pages:
+                return candidate
+        return None
+
+    def check(self) -> dict:
+        """
+        Check everything and return the report.
+        """
+        self.parse_pages()
+
+        broken = []
+        missing_anchors = []
+        linked: dict[str, int] = {}
+        generated = 0
+
+        def check_link(source: str, line: int | None, target: str, kind: str, from_rel: str | None):
+            nonlocal generated
+            resolved_kind, resolved, anchor = self.resolve(target, from_rel)
+            if resolved_kind == "external":
+                return
+            if resolved_kind == "generated":
+                generated += 1
+                return
+            location = {"file": source, "line": line, "target": target, "kind": kind}
+            if resolved_kind is None:
+                broken.append({**location, "resolved": resolved})
+                return
+            if resolved_kind == "page":
+                if resolved != from_rel:
+                    linked[resolved] = linked.get(resolved, 0) + 1
+                if anchor and anchor not in self.parsed[resolved]["anchors"]:
+                    missing_anchors.append({**location, "page": resolved, "anchor": anchor})
+
+        for rel in sorted(self.parsed):
+            for link in self.parsed[rel]["links"]:
+                check_link(rel, link["line"], link["target"], link["kind"], rel)
+
+        nav_pages = set()
+        for slug in iter_nav_slugs(self.docs_json):
+            if self.index.ignored_root(slug):
+                continue
+            resolved_kind, resolved, _ = self.resolve("/" + self.index.normalize_slug(slug), None)
+            if resolved_kind == "page":
+                nav_pages.add(resolved)
+            else:
+                broken.append(
+                    {"file": DOCS_JSON_NAME, "line": None, "target": slug, "kind": "navigation", "resolved": resolved}
+                )
+
+        for href in iter_docs_json_hrefs(self.docs_json):
+            check_link(DOCS_JSON_NAME, None, href, "link", None)
+        for _, destination in self.redirects:
+            # Pattern destinations depend on the matched path; checked on use.
+            if not REDIRECT_PARAM_RE.search(destination):
+                check_link(DOCS_JSON_NAME, None, destination, "redirect", None)
+
+        orphans = [
+            {"file": rel, "linked_from": linked.get(rel, 0)}
+            for rel in sorted(self.index.pages)
+            if rel not in nav_pages
+        ]
+
+        return {
+            "summary": {
+                "pages": len(self.parsed),
+                "parsed": self.stats["parsed"],
+                "cached": self.stats["cached"],
+                "links": sum(len(entry["links"]) for entry in self.parsed.values()),
+                "generated_links": generated,
+                "broken_links": len(broken),
+                "missing_anchors": len(missing_anchors),
+                "orphan_pages": len(orphans),
+            },
+            "broken_links": broken,
+            "missing_anchors": missing_anchors,
+            "orphan_pages": orphans,
+        }
+
+
+def openapi_directories(docs_json: dict) -> set[str]:
+    """
+    Directories the docs site generates OpenAPI reference pages into: the
+    `directory` of every "openapi" entry in docs.json, or the default one.
+    """
+    directories = set()
+
+    def walk(value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key == "openapi":
+                    directory = item.get("directory") if isinstance(item, dict) else None
+                    directories.add((directory or DEFAULT_OPENAPI_DIRECTORY).strip("/"))
+                else:
+                    walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+
+    walk(docs_json)
+    return directories
+
+
+def iter_docs_json_hrefs(value):
+    """
+    Yield every "href" value in docs.json (navbar, anchors, footer...).
+    """
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key == "href" and isinstance(item, str):
+                yield item
+            else:
+                yield from iter_docs_json_hrefs(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from iter_docs_json_hrefs(item)
+
+
+def print_report(report: dict, limit: int = 50):
+    summary = report["summary"]
+    print(
+        f"[links] {summary['pages']} page(s) ({summary['parsed']} parsed, {summary['cached']} from cache), "
+        f"{summary['links']} link(s): {summary['broken_links']} broken, "
+        f"{summary['generated_links']} to generated API pages (not checked), "
+        f"{summary['missing_anchors']} missing anchor(s), {summary['orphan_pages']} page(s) not in navigation"
+    )
+    for entry in report["broken_links"][:limit]:
+        where = f"{entry['file']}:{entry['line']}" if entry["line"] else entry["file"]
+        print(f"[links]   Broken {entry['kind']} in {where}: {entry['target']}")
+    for entry in report["missing_anchors"][:limit]:
+        where = f"{entry['file']}:{entry['line']}" if entry["line"] else entry["file"]
+        print(f"[links]   Missing anchor in {where}: {entry['target']} (#{entry['anchor']} not in {entry['page']})")
+    shown = len(report["broken_links"][:limit]) + len(report["missing_anchors"][:limit])
+    hidden = len(report["broken_links"]) + len(report["missing_anchors"]) - shown
+    if hidden > 0:
+        print(f"[links]   ... and {hidden} more, see the report")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check internal links, anchors and image references across the docs."
+    )
+    parser.add_argument("root_dir", nargs="?", default=".",
+                        help=f"Docs directory with {DOCS_JSON_NAME} (default: .)")
+    parser.add_argument("--report", help=f"JSON report (default: <root_dir>/{REPORT_FILE_NAME})")
+    parser.add_argument("--cache", help=f"Per-file results cache (default: <root_dir>/{CACHE_FILE_NAME})")
+    parser.add_argument("--no-cache", action="store_true", help="Parse every page again")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Parser processes (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--fail-on-anchors", action="store_true",
+                        help="Also exit with status 1 on missing anchors")
+
+    args = parser.parse_args()
+
+    root_dir = Path(args.root_dir)
+    if not (root_dir / DOCS_JSON_NAME).is_file():
+        print(f"Error: {DOCS_JSON_NAME} not found in {root_dir}")
+        sys.exit(1)
+
+    cache_path = None if args.no_cache else Path(args.cache) if args.cache else root_dir / CACHE_FILE_NAME
+    report_path = Path(args.report) if args.report else root_dir / REPORT_FILE_NAME
+
+    checker = LinkChecker(root_dir, cache_path, workers=args.workers)
+    report = checker.check()
+
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with report_path.open("w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+    print_report(report)
+    print(f"[links] Wrote {report_path}")
+
+    if report["broken_links"] or (args.fail_on_anchors and report["missing_anchors"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
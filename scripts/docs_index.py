@@ -0,0 +1,211 @@
+"""
+Single-pass index of the markdown pages in the docs tree, shared by the
+scripts under scripts/.
+
+The tree is walked once with os.scandir, recording each page's path, size,
+mtime and frontmatter title, so docs.json slugs can be resolved from memory
+instead of probing the filesystem per slug. The index also remembers which
+slugs did not resolve and which pages were never looked up, for reporting.
+"""
+import os
+import re
+from pathlib import Path
+
+IGNORED_DIR_NAMES = {"node_modules", "img", "imgs", "images", "scripts"}
+
+# Preferred first when a slug has no extension.
+PAGE_SUFFIXES = (".mdx", ".md")
+
+TITLE_RE = re.compile(r'^title:\s*["\']?(.*?)["\']?\s*$')
+
+
+def read_frontmatter_title(path: str | Path) -> str | None:
+    """
+    Return the `title` from a markdown file's frontmatter, reading only the
+    frontmatter lines rather than the whole file.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if not f.readline().startswith("---"):
+                return None
+
+            title = None
+            for line in f:
+                line = line.strip()
+                if line == "---":
+                    return title
+                m = TITLE_RE.match(line)
+                if m and title is None:
+                    title = m.group(1).strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+    # No closing delimiter: not frontmatter.
+    return None
+
+
+def iter_nav_slugs(docs_json: dict):
+    """
+    Yield every page slug in navigation.tabs[*].groups[*].pages, including
+    the pages of nested groups.
+    """
+    def walk(pages):
+        for entry in pages or []:
+            if isinstance(entry, str):
+                yield entry
+            elif isinstance(entry, dict):
+                yield from walk(entry.get("pages"))
+
+    for tab in docs_json.get("navigation", {}).get("tabs", []):
+        for group in tab.get("groups") or []:
+            if isinstance(group, dict):
+                yield from walk(group.get("pages"))
+
+
+class DocsIndex:
+    """
+    In-memory index of the .md/.mdx pages under `root_dir`.
+
+    `pages` maps a page's path relative to the root (POSIX, with extension)
+    to {"path", "rel", "size", "mtime", "title"}. Root-level directories in
+    `ignored_dir_names` and hidden directories are not walked.
+    """
+
+    def __init__(
+        self,
+        root_dir: str | Path,
+        ignored_dir_names: set[str] = IGNORED_DIR_NAMES,
+        read_titles: bool = True,
+    ):
+        self.root_dir = Path(root_dir).resolve()
+        self.ignored_dir_names = set(ignored_dir_names)
+        self.pages: dict[str, dict] = {}
+        self.referenced: set[str] = set()
+        self.missing: list[str] = []
+
+        self._scan(read_titles)
+
+    def _scan(self, read_titles: bool):
+        pending = [(str(self.root_dir), "")]
+
+        while pending:
+            dir_path, prefix = pending.pop()
+            try:
+                entries = list(os.scandir(dir_path))
+            except OSError:
+                continue
+
+            for entry in entries:
+                if entry.is_dir():
+                    if entry.name.startswith("."):
+                        continue
+                    if not prefix and entry.name in self.ignored_dir_names:
+                        continue
+                    pending.append((entry.path, f"{prefix}{entry.name}/"))
+                    continue
+
+                if not entry.is_file():
+                    continue
+                if os.path.splitext(entry.name)[1].lower() not in PAGE_SUFFIXES:
+                    continue
+
+                stat = entry.stat()
+                rel = f"{prefix}{entry.name}"
+                self.pages[rel] = {
+                    "path": Path(entry.path),
+                    "rel": rel,
+                    "size": stat.st_size,
+                    "mtime": stat.st_mtime,
+                    "title": read_frontmatter_title(entry.path) if read_titles else None,
+                }
+
+    @staticmethod
+    def normalize_slug(slug: str) -> str:
+        """
+        docs.json slugs may be written relative ("Sandboxes/Overview") or
+        absolute ("/cli-reference/commands/bl_apply"); both name the same page.
+        """
+        return slug.strip().lstrip("/")
+
+    def ignored_root(self, slug: str) -> str | None:
+        """
+        Return the ignored root-level directory `slug` lives under, if any.
+        """
+        first = self.normalize_slug(slug).split("/", 1)[0]
+        return first if first in self.ignored_dir_names else None
+
+    def lookup(self, slug: str) -> dict | None:
+        """
+        Resolve a docs.json slug to its page entry, preferring .mdx over .md
+        when the slug has no extension. Unresolved slugs are remembered in
+        `missing`; slugs under ignored directories return None silently.
+        """
+        rel = self.normalize_slug(slug)
+        if self.ignored_root(rel):
+            return None
+
+        if os.path.splitext(rel)[1].lower() in PAGE_SUFFIXES:
+            candidates = (rel,)
+        else:
+            candidates = tuple(rel + suffix for suffix in PAGE_SUFFIXES)
+
+        for candidate in candidates:
+            entry = self.pages.get(candidate)
+            if entry is not None:
+                self.referenced.add(candidate)
+                return entry
+
+        self.missing.append(slug)
+        return None
+
+    def under(self, directory: str | Path) -> list[dict]:
+        """
+        Return the pages directly inside `directory` (absolute, or relative to
+        the root), sorted by file name.
+        """
+        directory = Path(directory)
+        if not directory.is_absolute():
+            directory = self.root_dir / directory
+        prefix = directory.resolve().relative_to(self.root_dir).as_posix()
+        prefix = "" if prefix == "." else prefix + "/"
+
+        return sorted(
+            (
+                entry
+                for rel, entry in self.pages.items()
+                if rel.startswith(prefix) and "/" not in rel[len(prefix):]
+            ),
+            key=lambda entry: entry["rel"],
+        )
+
+    def unreferenced(self) -> list[dict]:
+        """
+        Return the pages no lookup() resolved to, sorted by path.
+        """
+        return sorted(
+            (entry for rel, entry in self.pages.items() if rel not in self.referenced),
+            key=lambda entry: entry["rel"],
+        )
+
+    def print_report(self, tag: str = "[index]", limit: int | None = 20):
+        """
+        Print the slugs that resolved to no file and the pages no navigation
+        entry references, listing at most `limit` of each.
+        """
+        unreferenced = self.unreferenced()
+
+        print(
+            f"{tag} {len(self.pages)} page file(s) indexed under {self.root_dir}; "
+            f"{len(self.missing)} slug(s) without a file, "
+            f"{len(unreferenced)} file(s) not referenced by navigation."
+        )
+
+        for label, items in (
+            ("Slug without a file", self.missing),
+            ("Not in navigation", [entry["rel"] for entry in unreferenced]),
+        ):
+            shown = items if limit is None else items[:limit]
+            for item in shown:
+                print(f"{tag}   {label}: {item}")
+            if len(items) > len(shown):
+                print(f"{tag}   ... and {len(items) - len(shown)} more")
@@ -0,0 +1,401 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from metrics import ExportMetrics
+from notion_api import NotionClient
+from targets import inherit_log_prefix
+
+# Image types Notion accepts for image blocks, by file extension.
+IMAGE_CONTENT_TYPES = {
+    ".gif": "image/gif",
+    ".heic": "image/heic",
+    ".ico": "image/vnd.microsoft.icon",
+    ".jpeg": "image/jpeg",
+    ".jpg": "image/jpeg",
+    ".png": "image/png",
+    ".svg": "image/svg+xml",
+    ".tif": "image/tiff",
+    ".tiff": "image/tiff",
+    ".webp": "image/webp",
+}
+
+# Largest file a single-part upload accepts.
+MAX_SINGLE_PART_BYTES = 20 * 1024 * 1024
+
+# Uploaded files that are not attached to a block within an hour expire.
+UPLOAD_EXPIRY_SECONDS = 3600
+
+DEFAULT_UPLOAD_WORKERS = 4
+ASSET_CACHE_VERSION = 1
+
+# ![alt](src "title") and <img ... /> (as written in MDX).
+IMAGE_RE = re.compile(
+    r'!\[([^\]\n]*)\]\(\s*<?([^\s)>]+)>?(?:\s+["\'][^"\'\n]*["\'])?\s*\)'
+    r"|(<img\b[^>]*>)",
+    re.IGNORECASE,
+)
+HTML_ATTR_RE = re.compile(
+    r'\b(src|alt)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|\{\s*["\']([^"\']*)["\']\s*\})',
+    re.IGNORECASE,
+)
+
+
+def image_ref(m: re.Match) -> tuple[str, str] | None:
+    """
+    Return the (src, alt) of an IMAGE_RE match, or None for an <img>
+    without src.
+    """
+    if m.group(3) is None:
+        return m.group(2), m.group(1).strip()
+
+    attrs = {}
+    for attr in HTML_ATTR_RE.finditer(m.group(3)):
+        name = attr.group(1).lower()
+        attrs.setdefault(name, next(v for v in attr.groups()[1:] if v is not None))
+    if not attrs.get("src"):
+        return None
+    return attrs["src"], attrs.get("alt", "").strip()
+
+
+def find_image_refs(text: str) -> list[tuple[str, str]]:
+    """
+    Return the (src, alt) of every markdown or <img> image in `text`, in
+    order of appearance.
+    """
+    return [ref for ref in map(image_ref, IMAGE_RE.finditer(text)) if ref is not None]
+
+
+class ImageRefScanner:
+    """
+    Finds image references in text that arrives in chunks. Only complete
+    lines are scanned; the rest is carried over to the next chunk.
+    """
+
+    def __init__(self):
+        self._rest = ""
+
+    def feed(self, chunk: str) -> list[tuple[str, str]]:
+        text = self._rest + chunk
+        cut = text.rfind("\n") + 1
+        self._rest = text[cut:]
+        return find_image_refs(text[:cut]) if cut else []
+
+    def finish(self) -> list[tuple[str, str]]:
+        text, self._rest = self._rest, ""
+        return find_image_refs(text)
+
+
+def resolve_asset(src: str, page_path: Path, root_dir: Path) -> Path | None:
+    """
+    Resolve an image src to a local file under `root_dir`: "/img/x.png" is
+    relative to the root, anything else to the page's directory. Remote,
+    data: and unsupported images return None.
+    """
+    src = src.split("#")[0].split("?")[0]
+    if not src or re.match(r"^[a-z][a-z0-9+.-]*:|^//", src, re.IGNORECASE):
+        return None
+    if os.path.splitext(src)[1].lower() not in IMAGE_CONTENT_TYPES:
+        return None
+
+    base = root_dir if src.startswith("/") else page_path.parent
+    path = (base / src.lstrip("/")).resolve()
+    if not path.is_relative_to(root_dir) or not path.is_file():
+        return None
+    return path
+
+
+def build_image_block(file_upload_id: str, caption: str = "") -> dict:
+    block = {
+        "object": "block",
+        "type": "image",
+        "image": {
+            "type": "file_upload",
+            "file_upload": {"id": file_upload_id},
+        },
+    }
+    if caption:
+        block["image"]["caption"] = [{"type": "text", "text": {"content": caption[:1900]}}]
+    return block
+
+
+class AssetCache:
+    """
+    Persistent map from an asset's content hash (sha256) to the Notion file
+    upload holding it:
+
+      {"version": 1, "assets": {sha256: {"id", "name", "size", "uploaded", "attached"}}}
+
+    File uploads belong to the integration that made them, so each target
+    needs its own cache file. Entries that were never attached to a block
+    are only reused within UPLOAD_EXPIRY_SECONDS of their upload.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.assets: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+        if not path.is_file():
+            return
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[assets] Ignoring unreadable asset cache {path}: {e}")
+            return
+        if data.get("version") != ASSET_CACHE_VERSION:
+            print(f"[assets] Ignoring asset cache {path} with unknown version.")
+            return
+        self.assets = data.get("assets", {})
+
+    def get(self, digest: str) -> dict | None:
+        with self._lock:
+            entry = self.assets.get(digest)
+        if entry is None:
+            return None
+        if not entry.get("attached") and time.time() - entry.get("uploaded", 0) > UPLOAD_EXPIRY_SECONDS:
+            return None
+        return entry
+
+    def put(self, digest: str, entry: dict):
+        with self._lock:
+            self.assets[digest] = entry
+            self._save()
+
+    def mark_attached(self, file_upload_ids: Iterable[str]):
+        ids = set(file_upload_ids)
+        with self._lock:
+            changed = False
+            for entry in self.assets.values():
+                if entry["id"] in ids and not entry.get("attached"):
+                    entry["attached"] = True
+                    changed = True
+            if changed:
+                self._save()
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump({"version": ASSET_CACHE_VERSION, "assets": self.assets}, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+        os.replace(tmp_path, self.path)
+
+
+class AssetUploader:
+    """
+    Uploads the local images referenced by pages through Notion's file
+    upload API, on a small thread pool of its own (every request still goes
+    through the client's rate limiter).
+
+    Each file is identified by its content hash: an image referenced by many
+    pages is uploaded once per run, and one found in the AssetCache is not
+    uploaded again at all. Concurrent requests for the same image share one
+    upload.
+    """
+
+    def __init__(
+        self,
+        client: NotionClient,
+        root_dir: Path,
+        cache_path: Path,
+        max_workers: int = DEFAULT_UPLOAD_WORKERS,
+    ):
+        self.client = client
+        self.root_dir = root_dir.resolve()
+        self.cache = AssetCache(cache_path)
+        self.stats = {"references": 0, "uploaded": 0, "cached": 0, "failed": 0, "bytes": 0}
+
+        self._digests: dict[Path, str] = {}
+        self._uploads: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_workers), initializer=inherit_log_prefix()
+        )
+
+    def resolve(self, src: str, page_path: Path) -> Path | None:
+        return resolve_asset(src, page_path, self.root_dir)
+
+    def digest(self, path: Path) -> str:
+        with self._lock:
+            digest = self._digests.get(path)
+        if digest is None:
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()
+            with self._lock:
+                self._digests[path] = digest
+        return digest
+
+    def forget(self, paths: Iterable[Path]):
+        """
+        Drop the remembered digests of files that changed on disk.
+        """
+        with self._lock:
+            for path in paths:
+                self._digests.pop(path, None)
+
+    def upload(self, path: Path) -> Future:
+        """
+        Return a future for the file upload id holding `path` (None if it
+        could not be uploaded), starting the upload if needed.
+        """
+        rel_display = path.relative_to(self.root_dir).as_posix()
+        return self.upload_data(self.digest(path), rel_display, path.read_bytes)
+
+    def upload_data(self, digest: str, name: str, load: Callable[[], bytes]) -> Future:
+        """
+        Like upload(), for content that is not a file under the root: `name`
+        is its path as referenced (used for the file name and content type)
+        and `load` returns its bytes.
+        """
+        with self._lock:
+            self.stats["references"] += 1
+            future = self._uploads.get(digest)
+            if future is not None:
+                return future
+
+            entry = self.cache.get(digest)
+            if entry is not None:
+                self.stats["cached"] += 1
+                future = Future()
+                future.set_result(entry["id"])
+            else:
+                future = self._executor.submit(self._upload, digest, name, load)
+            self._uploads[digest] = future
+            return future
+
+    def _upload(self, digest: str, name: str, load: Callable[[], bytes]) -> str | None:
+        filename = name.rsplit("/", 1)[-1]
+        content_type = IMAGE_CONTENT_TYPES[os.path.splitext(filename)[1].lower()]
+        try:
+            data = load()
+            size = len(data)
+            if size > MAX_SINGLE_PART_BYTES:
+                raise ValueError(f"{size} bytes is over the single-part upload limit")
+            upload = self.client.create_file_upload(filename, content_type)
+            self.client.send_file_upload(upload["id"], filename, data, content_type)
+        except Exception as e:
+            print(f"[assets] Error uploading {name}: {e}")
+            with self._lock:
+                self.stats["failed"] += 1
+            return None
+
+        self.cache.put(
+            digest,
+            {"id": upload["id"], "name": name, "size": size, "uploaded": time.time(), "attached": False},
+        )
+        with self._lock:
+            self.stats["uploaded"] += 1
+            self.stats["bytes"] += size
+        return upload["id"]
+
+    def mark_attached(self, file_upload_ids: Iterable[str]):
+        self.cache.mark_attached(file_upload_ids)
+
+    def for_page(self, page_path: Path) -> "PageImages":
+        return PageImages(self, page_path, self.client.metrics)
+
+    def page_hash(self, content_hash: str, page_path: Path, text: Iterable[str]) -> str:
+        """
+        Combine a page's content hash with the hashes of the images it
+        references, so that a page is updated when one of its images changes.
+        Pages without local images keep their plain content hash.
+        """
+        scanner = ImageRefScanner()
+        digests = []
+        for chunk in text:
+            for src, _ in scanner.feed(chunk):
+                path = self.resolve(src, page_path)
+                if path is not None:
+                    digests.append(self.digest(path))
+        for src, _ in scanner.finish():
+            path = self.resolve(src, page_path)
+            if path is not None:
+                digests.append(self.digest(path))
+
+        if not digests:
+            return content_hash
+        return hashlib.sha256(" ".join([content_hash, *digests]).encode("ascii")).hexdigest()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def print_stats(self):
+        stats = self.stats
+        print(
+            f"[assets] {stats['references']} image reference(s): {stats['uploaded']} uploaded "
+            f"({stats['bytes']} bytes), {stats['cached']} reused from {self.cache.path}, "
+            f"{stats['failed']} failed"
+        )
+
+
+class PageImages:
+    """
+    The images of one page. scan() passes the page content through while
+    starting the uploads of the images it references; block() then returns
+    the image block for a reference once its upload is done, for
+    MarkdownConverter to place where the image appears. Time spent waiting
+    for uploads is counted as the "upload_images" phase of `metrics`.
+    """
+
+    def __init__(
+        self,
+        uploader: AssetUploader,
+        page_path: Path,
+        metrics: ExportMetrics | None = None,
+    ):
+        self.uploader = uploader
+        self.page_path = page_path
+        self.metrics = metrics
+        self.uploads: dict[Path, Future] = {}
+        self.file_upload_ids: list[str] = []
+        self._scanner = ImageRefScanner()
+
+    def _start(self, refs: list[tuple[str, str]]):
+        for src, _ in refs:
+            path = self.uploader.resolve(src, self.page_path)
+            if path is not None and path not in self.uploads:
+                self.uploads[path] = self.uploader.upload(path)
+
+    def scan(self, chunks: Iterable[str]) -> Iterator[str]:
+        for chunk in chunks:
+            self._start(self._scanner.feed(chunk))
+            yield chunk
+        self._start(self._scanner.finish())
+
+    def block(self, src: str, alt: str) -> dict | None:
+        """
+        Return the image block for the image `src`, or None if it is not a
+        local image or could not be uploaded.
+        """
+        path = self.uploader.resolve(src, self.page_path)
+        if path is None:
+            return None
+        future = self.uploads.get(path)
+        if future is None:
+            future = self.uploads[path] = self.uploader.upload(path)
+
+        if self.metrics is not None:
+            with self.metrics.phase("upload_images"):
+                file_upload_id = future.result()
+        else:
+            file_upload_id = future.result()
+        if not file_upload_id:
+            return None
+        self.file_upload_ids.append(file_upload_id)
+        return build_image_block(file_upload_id, alt)
+
+    def attached(self):
+        """
+        Record that the page's blocks were written, so the uploads no longer
+        expire.
+        """
+        self.uploader.mark_attached(self.file_upload_ids)
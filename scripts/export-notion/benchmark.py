@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the Notion exporter.
+
+Generates synthetic docs.json + .mdx trees, exports them to the local Notion
+stand-in (standin.py) and reports, per export phase, wall-clock time,
+request count, bytes sent and peak RSS. Results can be written to JSON and
+compared against a previous run:
+
+  python benchmark.py --pages 100 1000 --output bench.json
+  python benchmark.py --pages 100 1000 --baseline bench.json
+"""
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+
+import main as exporter
+from notion_api import NotionClient
+from standin import start_standin
+
+DEFAULT_SIZES = [100, 1000, 10000]
+
+WORDS = (
+    "sandbox agent deploy model function job volume policy workspace token "
+    "runtime preview template network latency region image build request"
+).split()
+
+
+def generate_docs_tree(root: Path, page_count: int, seed: int = 0) -> Path:
+    """
+    Write a synthetic docs tree with `page_count` pages under `root`: a
+    docs.json with tabs, groups and nested groups, and one .mdx per page with
+    frontmatter and a long-tailed size distribution (a few pages are large).
+    """
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+
+    tabs = []
+    written = 0
+    tab_index = 0
+
+    while written < page_count:
+        tab_index += 1
+        groups = []
+
+        for group_index in range(1, rng.randint(4, 10) + 1):
+            if written >= page_count:
+                break
+
+            folder = f"Tab{tab_index}/Group{group_index}"
+            pages: list = []
+
+            for _ in range(rng.randint(5, 25)):
+                if written >= page_count:
+                    break
+                written += 1
+                slug = f"{folder}/page-{written}"
+                write_synthetic_page(root / f"{slug}.mdx", written, rng)
+
+                if pages and rng.random() < 0.1:
+                    pages.append({"group": f"Nested {written}", "pages": [slug]})
+                else:
+                    pages.append(slug)
+
+            groups.append({"group": f"Group {tab_index}.{group_index}", "pages": pages})
+
+        tabs.append({"tab": f"Tab {tab_index}", "groups": groups})
+
+    docs_json = {"name": "Synthetic docs", "navigation": {"tabs": tabs}}
+    with (root / exporter.DOCS_JSON_NAME).open("w", encoding="utf-8") as f:
+        json.dump(docs_json, f, indent=2)
+
+    return root
+
+
+def write_synthetic_page(path: Path, number: int, rng: random.Random):
+    if rng.random() < 0.01:
+        paragraphs = rng.randint(1500, 3000)
+    else:
+        paragraphs = int(rng.lognormvariate(3, 1)) + 1
+
+    body = []
+    for i in range(paragraphs):
+        if i % 12 == 0:
+            body.append(f"## Section {i // 12 + 1}\n")
+        body.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))) + "\n")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        f'---\ntitle: "Synthetic page {number}"\ndescription: "Generated"\n---\n\n'
+        + "\n".join(body),
+        encoding="utf-8",
+    )
+
+
+def reset_peak_rss():
+    """
+    Reset the kernel's peak-RSS watermark so each phase reports its own peak
+    (Linux only; elsewhere the process-wide peak is reported).
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_kb() -> int:
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class PhaseRecorder:
+    """
+    Collect wall-clock, request count, bytes and peak RSS per phase, using
+    the stand-in's own counters for the network side.
+    """
+
+    def __init__(self, standin, verbose: bool = False):
+        self.standin = standin
+        self.verbose = verbose
+        self.phases: dict[str, dict] = {}
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        with self.standin.lock:
+            requests_before = self.standin.stats["requests"]
+            bytes_before = self.standin.stats["bytes_in"]
+
+        reset_peak_rss()
+        sink = contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(io.StringIO())
+        started = time.perf_counter()
+
+        with sink:
+            yield
+
+        elapsed = time.perf_counter() - started
+
+        with self.standin.lock:
+            requests_made = self.standin.stats["requests"] - requests_before
+            bytes_sent = self.standin.stats["bytes_in"] - bytes_before
+
+        self.phases[name] = {
+            "seconds": round(elapsed, 4),
+            "requests": requests_made,
+            "bytes_sent": bytes_sent,
+            "peak_rss_kb": peak_rss_kb(),
+        }
+
+
+def run_benchmark(
+    page_count: int,
+    workers: int,
+    rps: float,
+    latency: float,
+    seed: int,
+    verbose: bool = False,
+) -> dict:
+    server, standin = start_standin(latency=latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    client = NotionClient(
+        "benchmark",
+        base_url=base_url,
+        max_requests_per_second=rps,
+        pool_size=max(workers, 1) * 2,
+    )
+    recorder = PhaseRecorder(standin, verbose=verbose)
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="notion-bench-") as tmp:
+            root_dir = Path(tmp) / "docs"
+            generate_docs_tree(root_dir, page_count, seed=seed)
+            state_path = Path(tmp) / "state.json"
+
+            with recorder.phase("load_docs_json"):
+                docs_json = exporter.load_docs_structure(root_dir)
+
+            with recorder.phase("build_nav"):
+                exporter.build_nav_nodes(docs_json, root_dir.resolve())
+
+            with recorder.phase("full_export"):
+                exporter.process_directory_incremental(
+                    root_dir, standin.root_page_id, client, state_path, max_workers=workers
+                )
+
+            with recorder.phase("incremental_noop"):
+                exporter.process_directory_incremental(
+                    root_dir, standin.root_page_id, client, state_path, max_workers=workers
+                )
+
+            with recorder.phase("clear"):
+                exporter.clear_page_children(standin.root_page_id, client, max_workers=workers)
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+    return {
+        "pages": page_count,
+        "workers": workers,
+        "rps": rps,
+        "latency": latency,
+        "phases": recorder.phases,
+    }
+
+
+def format_delta(current: float, baseline: float | None) -> str:
+    if baseline in (None, 0):
+        return ""
+    change = (current - baseline) / baseline * 100
+    return f" ({change:+.0f}%)"
+
+
+def print_report(results: list[dict], baseline: list[dict] | None = None):
+    baseline_by_size = {r["pages"]: r for r in baseline or []}
+
+    for result in results:
+        print(
+            f"\n[bench] {result['pages']} pages "
+            f"(workers={result['workers']}, rps={result['rps']:g}, latency={result['latency']:g}s)"
+        )
+        print(f"[bench]   {'phase':<18} {'seconds':>16} {'requests':>16} {'bytes sent':>20} {'peak RSS KB':>18}")
+
+        base_phases = baseline_by_size.get(result["pages"], {}).get("phases", {})
+        for name, phase in result["phases"].items():
+            base = base_phases.get(name, {})
+            print(
+                f"[bench]   {name:<18} "
+                f"{phase['seconds']:>9.3f}{format_delta(phase['seconds'], base.get('seconds')):>7} "
+                f"{phase['requests']:>9}{format_delta(phase['requests'], base.get('requests')):>7} "
+                f"{phase['bytes_sent']:>13}{format_delta(phase['bytes_sent'], base.get('bytes_sent')):>7} "
+                f"{phase['peak_rss_kb']:>11}{format_delta(phase['peak_rss_kb'], base.get('peak_rss_kb')):>7}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Notion exporter against the local API stand-in."
+    )
+    parser.add_argument("--pages", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help=f"Synthetic tree sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--workers", type=int, default=exporter.DEFAULT_WORKERS)
+    parser.add_argument("--rps", type=float, default=1000.0,
+                        help="Client-side rate limit; lower it to model Notion's ~3 req/s")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Stand-in response latency in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against a previous --output file")
+    parser.add_argument("--verbose", action="store_true", help="Show exporter output")
+
+    args = parser.parse_args()
+
+    results = [
+        run_benchmark(size, args.workers, args.rps, args.latency, args.seed, verbose=args.verbose)
+        for size in args.pages
+    ]
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    print_report(results, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": results}, f, indent=2)
+            f.write("\n")
+        print(f"\n[bench] Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
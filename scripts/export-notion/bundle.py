@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Compile the docs tree into an offline export bundle, and replay a bundle
+into Notion.
+
+  python bundle.py compile . --output export.zip        # no token needed
+  NOTION_TOKEN=... NOTION_ROOT_PAGE=... python bundle.py replay export.zip
+
+compile does all the CPU work of an export (docs.json, file reads, titles,
+block building) and writes the result as a zip file:
+
+  manifest.json            {"version", "created", "commit", "pages", "assets", ...}
+  pages/<index>/<n>.json   request batch n of page <index> (a list of blocks)
+  assets/<sha256>          image referenced by the pages
+
+manifest["pages"] lists the pages in creation (preorder) order, each with
+the index of its parent and previous sibling, so replay can create them
+with the same scheduler as a regular export. Repeated navigation entries
+are "link" pages, with the index of the page they link to. Images are
+referenced from the blocks by content hash and only uploaded during
+replay, which is pure network I/O: clear the root page, upload the
+images, create the pages.
+"""
+import os
+import sys
+import json
+import hashlib
+import zipfile
+import argparse
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+import main as exporter
+from assets import AssetUploader, PageImages, resolve_asset
+from metrics import ExportMetrics
+from notion_api import NOTION_API_BASE_URL, NotionClient
+from page_loader import PageSource
+from scheduler import run_dependency_graph
+
+BUNDLE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+DEFAULT_BUNDLE_NAME = ".notion-export/bundle.zip"
+
+# Image blocks in a bundle point at file upload ids of this form until
+# replay swaps in the ids of the uploaded files.
+BUNDLE_ASSET_PREFIX = "bundle-asset:"
+
+
+class BundleAssets:
+    """
+    Stands in for an AssetUploader while compiling: referenced images are
+    stored in the bundle (once per content hash) instead of being uploaded.
+    """
+
+    def __init__(self, bundle: zipfile.ZipFile, root_dir: Path):
+        self.bundle = bundle
+        self.root_dir = root_dir
+        self.assets: dict[str, str] = {}
+
+    def resolve(self, src: str, page_path: Path) -> Path | None:
+        return resolve_asset(src, page_path, self.root_dir)
+
+    def upload(self, path: Path) -> Future:
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        if digest not in self.assets:
+            # Images are already compressed; store them as they are.
+            self.bundle.writestr(f"assets/{digest}", data, compress_type=zipfile.ZIP_STORED)
+            self.assets[digest] = path.relative_to(self.root_dir).as_posix()
+
+        future = Future()
+        future.set_result(BUNDLE_ASSET_PREFIX + digest)
+        return future
+
+    def mark_attached(self, file_upload_ids):
+        pass
+
+    def for_page(self, page_path: Path) -> PageImages:
+        return PageImages(self, page_path)
+
+
+def compile_bundle(root_dir: Path, bundle_path: Path, images: bool = True) -> dict:
+    """
+    Build every page payload of a full export of `root_dir` and write them
+    to `bundle_path`. Returns the manifest.
+    """
+    root_dir = root_dir.resolve()
+    metrics = ExportMetrics()
+    nav_nodes = exporter.load_nav_nodes(root_dir, metrics)
+    tasks = exporter.flatten_nav_nodes(nav_nodes, None)
+    task_indexes = {task["node"]["key"]: index for index, task in enumerate(tasks)}
+
+    bundle_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = bundle_path.with_name(bundle_path.name + ".tmp")
+
+    pages = []
+    batch_count = 0
+
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+        assets = BundleAssets(bundle, root_dir) if images else None
+
+        for index, task in enumerate(tasks):
+            node = task["node"]
+            file_path: Path | None = node.get("file")
+            page = {
+                "key": node["key"],
+                "title": node["title"],
+                "kind": node.get("kind"),
+                "parent": task["parent"],
+                "prev": task["prev"],
+                "group": task["group"],
+                "file": None,
+                "batches": 0,
+            }
+
+            if node.get("link_to") is not None:
+                page["type"] = "link"
+                page["link_to"] = task_indexes[node["link_to"]]
+                pages.append(page)
+                continue
+
+            if file_path is None:
+                # Sections without children are not created (see run_nav_tasks()).
+                page["type"] = "section" if node.get("children") else "empty"
+                pages.append(page)
+                continue
+
+            page["type"] = "content"
+            page["file"] = file_path.relative_to(root_dir).as_posix()
+            source = node.get("source") or PageSource(file_path)
+
+            with metrics.phase("compile"):
+                page_images = assets.for_page(file_path) if assets is not None else None
+                batches = exporter.split_block_batches(
+                    exporter.build_page_children(
+                        source.chunks(),
+                        exporter.build_docs_url(root_dir, file_path),
+                        page_images,
+                    )
+                )
+                for n, batch in enumerate(batches):
+                    bundle.writestr(f"pages/{index}/{n}.json", json.dumps(batch))
+                    page["batches"] += 1
+                page["title"] = source.title() or file_path.stem
+
+            batch_count += page["batches"]
+            pages.append(page)
+
+        manifest = {
+            "version": BUNDLE_VERSION,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "commit": exporter.get_git_commit(),
+            "source": str(root_dir),
+            "pages": pages,
+            "assets": assets.assets if assets is not None else {},
+        }
+        bundle.writestr(MANIFEST_NAME, json.dumps(manifest, indent=1))
+
+    tmp_path.replace(bundle_path)
+
+    content_pages = sum(1 for page in pages if page["type"] == "content")
+    print(
+        f"[compile] Wrote {bundle_path}: {len(pages)} page(s) ({content_pages} with content), "
+        f"{batch_count} request batch(es), {len(manifest['assets'])} image(s), "
+        f"{bundle_path.stat().st_size} bytes"
+    )
+    metrics.print_summary()
+    return manifest
+
+
+def read_manifest(bundle: zipfile.ZipFile) -> dict:
+    try:
+        manifest = json.loads(bundle.read(MANIFEST_NAME))
+    except (KeyError, ValueError) as e:
+        raise ValueError(f"Not an export bundle: {e}") from e
+    if manifest.get("version") != BUNDLE_VERSION:
+        raise ValueError(f"Unsupported bundle version {manifest.get('version')}")
+    return manifest
+
+
+def swap_asset_ids(batch: list[dict], file_upload_ids: dict[str, str | None]) -> list[dict]:
+    """
+    Point the bundle's image blocks, at any depth, at the uploaded files,
+    dropping the ones whose upload failed.
+    """
+    blocks = []
+    for block in batch:
+        block_type = block.get("type")
+        if block_type == "image":
+            file_upload = block["image"].get("file_upload", {})
+            ref = file_upload.get("id", "")
+            if ref.startswith(BUNDLE_ASSET_PREFIX):
+                file_upload_id = file_upload_ids.get(ref[len(BUNDLE_ASSET_PREFIX):])
+                if not file_upload_id:
+                    continue
+                file_upload["id"] = file_upload_id
+        elif block.get(block_type, {}).get("children"):
+            data = block[block_type]
+            data["children"] = swap_asset_ids(data["children"], file_upload_ids)
+        blocks.append(block)
+    return blocks
+
+
+def replay_bundle(
+    bundle_path: Path,
+    parent_page_id: str,
+    client: NotionClient,
+    assets_path: Path,
+    max_workers: int = exporter.DEFAULT_WORKERS,
+) -> dict:
+    """
+    Export a compiled bundle under `parent_page_id`: upload its images (see
+    AssetUploader, cached in `assets_path`), clear the page and create every
+    page with up to `max_workers` concurrent requests. Returns the counters.
+    """
+    with zipfile.ZipFile(bundle_path) as bundle:
+        manifest = read_manifest(bundle)
+        pages = manifest["pages"]
+        bundle_lock = threading.Lock()
+
+        def read_entry(name: str) -> bytes:
+            with bundle_lock:
+                return bundle.read(name)
+
+        file_upload_ids: dict[str, str | None] = {}
+        uploader = None
+        if manifest["assets"]:
+            uploader = AssetUploader(client, bundle_path.parent, assets_path)
+            with client.metrics.phase("upload_assets"):
+                futures = {
+                    digest: uploader.upload_data(
+                        digest, name, lambda digest=digest: read_entry(f"assets/{digest}")
+                    )
+                    for digest, name in manifest["assets"].items()
+                }
+                file_upload_ids = {digest: future.result() for digest, future in futures.items()}
+
+        exporter.clear_page_children(parent_page_id, client, max_workers=max_workers)
+        exporter.add_root_update_block(parent_page_id, client, commit_id=manifest["commit"])
+
+        counters = {"total_pages": 0, "groups": {}, "failed": 0}
+
+        def batches(index: int) -> Iterator[list[dict]]:
+            for n in range(pages[index]["batches"]):
+                batch = json.loads(read_entry(f"pages/{index}/{n}.json"))
+                yield swap_asset_ids(batch, file_upload_ids)
+
+        def work(index: int, results: list) -> dict:
+            page = pages[index]
+            if page["parent"] is None:
+                parent_id = parent_page_id
+            else:
+                parent_id = results[page["parent"]]["id"]
+
+            if not parent_id or page["type"] == "empty":
+                return {"id": None, "line": None}
+
+            try:
+                if page["type"] == "link":
+                    target_id = results[page["link_to"]]["id"]
+                    if not target_id:
+                        return {"id": None, "line": f"Warning: cannot link '{page['title']}'"}
+                    block = client.append_children(
+                        parent_id, [exporter.build_link_to_page_block(target_id)]
+                    )[0]
+                    return {
+                        "id": block["id"],
+                        "line": f"[link] Linked repeated page '{page['title']}' to its first appearance",
+                    }
+
+                if page["type"] == "section":
+                    created = client.create_page(parent_id, page["title"])
+                    return {
+                        "id": created.get("id"),
+                        "line": f"[section] Created Notion page for section '{page['title']}' "
+                        f"(kind={page['kind']})",
+                    }
+
+                page_batches = batches(index)
+                created = client.create_page(parent_id, page["title"], next(page_batches, []))
+                last_block_id = None
+                for batch in page_batches:
+                    last_block_id = client.append_children(
+                        created["id"], batch, after=last_block_id
+                    )[-1]["id"]
+            except Exception as e:
+                return {"id": None, "line": f"Error creating page '{page['title']}': {e}", "failed": True}
+
+            return {
+                "id": created.get("id"),
+                "line": f"[file] Created Notion page for '{page['file']}': "
+                f"{created.get('url', '(no url in response)')}",
+                "created_file": True,
+            }
+
+        def on_release(index: int, result: dict):
+            if result["line"]:
+                exporter.log(result["line"], level=0 if result.get("failed") else 1)
+            if result.get("failed"):
+                counters["failed"] += 1
+            if result.get("created_file"):
+                counters["total_pages"] += 1
+                group = pages[index]["group"]
+                if group is not None:
+                    counters["groups"][group] = counters["groups"].get(group, 0) + 1
+
+        deps = [
+            [dep for dep in (page["parent"], page["prev"], page.get("link_to")) if dep is not None]
+            for page in pages
+        ]
+
+        try:
+            with client.metrics.phase("create"):
+                run_dependency_graph(deps, work, max_workers, on_release=on_release)
+        finally:
+            if uploader is not None:
+                uploader.mark_attached(filter(None, file_upload_ids.values()))
+                uploader.close()
+                uploader.print_stats()
+
+    exporter.print_export_stats(counters)
+    return counters
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compile the docs tree into an export bundle, or replay a bundle into Notion."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compile_parser = commands.add_parser("compile", help="Build all page payloads (no token needed)")
+    compile_parser.add_argument("root_dir", help=f"Docs directory with {exporter.DOCS_JSON_NAME}")
+    compile_parser.add_argument(
+        "--output", help=f"Bundle to write (default: <root_dir>/{DEFAULT_BUNDLE_NAME})"
+    )
+    compile_parser.add_argument("--no-images", action="store_true",
+                                help="Leave referenced images out of the bundle")
+
+    replay_parser = commands.add_parser(
+        "replay", help="Export a bundle under $NOTION_ROOT_PAGE, replacing its content"
+    )
+    replay_parser.add_argument("bundle", help="Bundle written by compile")
+    replay_parser.add_argument("--workers", type=int, default=exporter.DEFAULT_WORKERS,
+                               help=f"Concurrent requests (default: {exporter.DEFAULT_WORKERS})")
+    replay_parser.add_argument("--assets-file", default=exporter.ASSETS_FILE_NAME,
+                               help=f"Cache of uploaded images (default: {exporter.ASSETS_FILE_NAME})")
+    replay_parser.add_argument("--state-file", default=exporter.STATE_FILE_NAME,
+                               help="Incremental export state to delete, as the replay replaces "
+                               f"the pages it records (default: {exporter.STATE_FILE_NAME})")
+    replay_parser.add_argument("--metrics-file", default=exporter.METRICS_FILE_NAME,
+                               help=f"Metrics report (default: {exporter.METRICS_FILE_NAME})")
+    replay_parser.add_argument("-q", "--quiet", action="store_true",
+                               help="Only log warnings, errors and summaries")
+
+    args = parser.parse_args()
+
+    if args.command == "compile":
+        root_dir = Path(args.root_dir)
+        if not (root_dir / exporter.DOCS_JSON_NAME).is_file():
+            print(f"Error: {exporter.DOCS_JSON_NAME} not found in {root_dir}")
+            sys.exit(1)
+        output = Path(args.output) if args.output else root_dir / DEFAULT_BUNDLE_NAME
+        compile_bundle(root_dir, output, images=not args.no_images)
+        return
+
+    exporter.VERBOSITY = 0 if args.quiet else 1
+
+    notion_token = os.environ.get("NOTION_TOKEN")
+    parent_page_id = os.environ.get("NOTION_ROOT_PAGE")
+    if not notion_token or not parent_page_id:
+        print("Error: NOTION_TOKEN and NOTION_ROOT_PAGE environment variables must be set.")
+        sys.exit(1)
+
+    client = NotionClient(
+        notion_token,
+        base_url=os.environ.get("NOTION_API_BASE_URL") or NOTION_API_BASE_URL,
+        pool_size=max(args.workers, 1) * 2,
+    )
+
+    exporter.forget_export_state(Path(args.state_file))
+    try:
+        counters = replay_bundle(
+            Path(args.bundle), parent_page_id, client, Path(args.assets_file), max_workers=args.workers
+        )
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        exporter.finish_client(client, Path(args.metrics_file), None)
+
+    if counters["failed"]:
+        print(f"Error: {counters['failed']} page(s) could not be created.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+
+
+class ExportJournal:
+    """
+    Append-only JSON-lines log of the pages created by an export, so an
+    interrupted export can be resumed instead of restarted.
+
+    Each line is one event:
+
+      {"event": "start", "root_page_id": ..., "time": ...}
+      {"event": "root_block", "id": ..., "commit": ...}
+      {"event": "page", "key": ..., "id": ..., "parent_id": ..., "hash": ..., "done": bool}
+      {"event": "complete", "time": ...}
+
+    A content page is logged with done=False right after it is created and
+    again with done=True once all of its blocks are appended, so a resume
+    can tell finished pages from half-written ones. Lines are flushed as
+    they are written; a truncated last line is dropped on load.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.root_page_id: str | None = None
+        self.root_block_id: str | None = None
+        self.root_commit: str | None = None
+        self.complete = False
+        self.pages: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+    @classmethod
+    def start(cls, path: Path, root_page_id: str) -> "ExportJournal":
+        """
+        Start a new journal, replacing any previous one at `path`.
+        """
+        journal = cls(path)
+        journal.root_page_id = root_page_id
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        journal._file = path.open("w", encoding="utf-8")
+        journal._write(
+            {
+                "event": "start",
+                "root_page_id": root_page_id,
+                "time": datetime.now().isoformat(timespec="seconds"),
+            }
+        )
+        return journal
+
+    @classmethod
+    def load(cls, path: Path) -> "ExportJournal | None":
+        """
+        Read an existing journal and reopen it for appending. Returns None if
+        there is no journal at `path`.
+
+        A last line without its newline was cut short by a crash: it is
+        ignored and cut off the file, so that new entries start on a line
+        of their own.
+        """
+        if not path.is_file():
+            return None
+
+        journal = cls(path)
+        complete_bytes = 0
+
+        with path.open("rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                complete_bytes += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                journal._apply(entry)
+
+        with path.open("r+b") as f:
+            f.truncate(complete_bytes)
+
+        journal._file = path.open("a", encoding="utf-8")
+        return journal
+
+    def _apply(self, entry: dict):
+        event = entry.get("event")
+
+        if event == "start":
+            self.root_page_id = entry.get("root_page_id")
+        elif event == "root_block":
+            self.root_block_id = entry.get("id")
+            self.root_commit = entry.get("commit")
+        elif event == "page":
+            self.pages[entry["key"]] = {
+                "id": entry["id"],
+                "parent_id": entry.get("parent_id"),
+                "hash": entry.get("hash"),
+                "done": entry.get("done", True),
+            }
+        elif event == "complete":
+            self.complete = True
+
+    def _write(self, entry: dict):
+        with self._lock:
+            self._apply(entry)
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+    def record_root_block(self, block_id: str | None, commit: str | None = None):
+        self._write({"event": "root_block", "id": block_id, "commit": commit})
+
+    def record_page(
+        self,
+        key: str,
+        page_id: str,
+        parent_id: str,
+        content_hash: str | None = None,
+        done: bool = True,
+    ):
+        self._write(
+            {
+                "event": "page",
+                "key": key,
+                "id": page_id,
+                "parent_id": parent_id,
+                "hash": content_hash,
+                "done": done,
+            }
+        )
+
+    def finished_page(self, key: str) -> dict | None:
+        entry = self.pages.get(key)
+        return entry if entry and entry["done"] else None
+
+    def mark_complete(self):
+        self._write(
+            {"event": "complete", "time": datetime.now().isoformat(timespec="seconds")}
+        )
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -1,127 +1,136 @@
 import os
 import sys
-import re
 import json
+import time
+import argparse
 import textwrap
+import threading
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator
 from datetime import datetime
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from assets import IMAGE_CONTENT_TYPES, AssetUploader, PageImages
+from docs_index import IGNORED_DIR_NAMES, PAGE_SUFFIXES, DocsIndex
+from notion_api import (
+    NOTION_API_BASE_URL,
+    NOTION_MAX_BLOCKS_PER_REQUEST,
+    NOTION_MAX_REQUEST_BYTES,
+    NOTION_MAX_REQUESTS_PER_SECOND,
+    NotionClient,
+    normalize_notion_id,
+)
+from journal import ExportJournal
+from markdown_blocks import block_signature, diff_blocks, markdown_to_blocks
+from metrics import ExportMetrics
+from openapi_index import load_openapi_index, operation_slugs, render_operation, tag_slug
+from page_loader import PageCache, PageSource, TextPageSource
+from scheduler import run_dependency_graph
+from shards import (
+    load_shard_file,
+    partition_nav_nodes,
+    save_shard_file,
+    section_nodes,
+    shard_result_path,
+)
+from targets import PrefixedStdout, inherit_log_prefix, load_targets
+from watch import DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL, TreeWatcher
 
-import requests
-
-NOTION_API_URL = "https://api.notion.com/v1/pages"
-NOTION_BLOCKS_API_URL = "https://api.notion.com/v1/blocks"
-NOTION_VERSION = "2025-09-03"  # adjust if you want a newer version
 DOCS_BASE_URL = "https://docs.blaxel.ai"
 
 DOCS_JSON_NAME = "docs.json"
-IGNORED_DIR_NAMES = {"node_modules", "img", "imgs", "images", "scripts"}
-
-
-def normalize_notion_id(raw: str) -> str:
-    """
-    Accepts a Notion URL, slug+id, or raw id and returns a dashed UUID.
-    """
-    raw = raw.strip()
-
-    if raw.startswith("http://") or raw.startswith("https://"):
-        raw = raw.split("?")[0].rstrip("/")
-        raw = raw.split("/")[-1]
 
-    cleaned = raw.replace("-", "")
+DEFAULT_WORKERS = 8
 
-    m = re.search(r"([0-9a-fA-F]{32})", cleaned)
-    if not m:
-        raise ValueError(
-            f"Parent ID '{raw}' does not contain a valid 32-char Notion ID. "
-            f"Make sure you copied the full ID from the Notion URL."
-        )
+STATE_FILE_NAME = ".notion-export/state.json"
+JOURNAL_FILE_NAME = ".notion-export/journal.jsonl"
+METRICS_FILE_NAME = ".notion-export/metrics.json"
+ASSETS_FILE_NAME = ".notion-export/assets.json"
+OPENAPI_INDEX_FILE_NAME = ".notion-export/openapi-index.json"
+TARGETS_DIR_NAME = ".notion-export/targets"
+SHARDS_DIR_NAME = ".notion-export/shards"
+SHARD_PLAN_NAME = "plan.json"
 
-    hex32 = m.group(1).lower()
+# 0: warnings, errors and summaries; 1: one line per page (default);
+# 2: also one line per block listing and per HTTP request.
+VERBOSITY = 1
+STATE_VERSION = 2
 
-    return f"{hex32[0:8]}-{hex32[8:12]}-{hex32[12:16]}-{hex32[16:20]}-{hex32[20:]}"
+# Blue/green exports build the new tree under a page with this title.
+STAGING_PAGE_TITLE = "Docs export in progress (do not edit)"
 
 
-def split_for_rich_text(text: str, max_len: int = 1900, max_segments: int = 1000):
+def log(message: str, level: int = 1):
     """
-    Split text into segments small enough for Notion rich_text items.
+    Print a progress line if the current VERBOSITY is at least `level`.
     """
-    segments = []
-    start = 0
-    length = len(text)
+    if VERBOSITY >= level:
+        print(message)
 
-    while start < length:
-        end = min(start + max_len, length)
-        segments.append(text[start:end])
-        start = end
 
-        if len(segments) > max_segments:
-            raise ValueError(
-                f"Text is too long to fit into a single block even with "
-                f"{max_segments} rich_text segments (~{max_len * max_segments} chars)."
-            )
-
-    return segments
-
-
-def make_rich_text_items(text: str):
+def json_size(payload) -> int:
     """
-    Helper to build a list of Notion rich_text items from a (possibly long) string.
+    Size in bytes of `payload` as requests will serialize it.
     """
-    return [
-        {
-            "type": "text",
-            "text": {"content": segment},
-        }
-        for segment in split_for_rich_text(text)
-    ]
+    return len(json.dumps(payload))
 
 
-def extract_title_from_frontmatter(md_content: str):
+def build_page_children(
+    md_content: str | Iterable[str],
+    docs_url: str | None = None,
+    images: PageImages | None = None,
+) -> Iterator[dict]:
     """
-    Returns the title string if found, otherwise None.
+    Yield the blocks that make up a content page: the source link, then the
+    markdown converted to native blocks (see markdown_blocks), with links
+    resolved against `docs_url`. With `images`, the local images the
+    content references are uploaded while it streams and placed as image
+    blocks where they appear.
     """
-    if not md_content.startswith("---"):
-        return None
-
-    lines = md_content.splitlines()
-    if len(lines) < 3:
-        return None
+    if docs_url:
+        yield build_source_link_block(docs_url)
+    if images is None:
+        yield from markdown_to_blocks(md_content, page_url=docs_url)
+        return
+    md_content = images.scan((md_content,) if isinstance(md_content, str) else md_content)
+    yield from markdown_to_blocks(md_content, page_url=docs_url, image_block=images.block)
 
-    end_idx = None
-    for i in range(1, len(lines)):
-        if lines[i].strip() == "---":
-            end_idx = i
-            break
 
-    if end_idx is None:
-        return None
+def with_signatures(blocks: Iterable[dict], signatures: list[str]) -> Iterator[dict]:
+    """
+    Pass blocks through, appending each one's block_signature() to `signatures`.
+    """
+    for block in blocks:
+        signatures.append(block_signature(block))
+        yield block
 
-    meta_lines = lines[1:end_idx]
-    title_re = re.compile(r'^title:\s*["\']?(.*?)["\']?\s*$')
 
-    for line in meta_lines:
-        m = title_re.match(line.strip())
-        if m:
-            return m.group(1).strip()
+def split_block_batches(blocks: Iterable[dict]) -> Iterator[list[dict]]:
+    """
+    Group blocks into as few request-sized batches as possible, each holding
+    at most NOTION_MAX_BLOCKS_PER_REQUEST blocks and NOTION_MAX_REQUEST_BYTES
+    of JSON. Batches are yielded as they fill up; there is always at least
+    one (possibly empty) batch.
+    """
+    batch: list[dict] = []
+    batch_bytes = 0
 
-    return None
+    for block in blocks:
+        size = json_size(block)
+        if batch and (
+            len(batch) >= NOTION_MAX_BLOCKS_PER_REQUEST
+            or batch_bytes + size > NOTION_MAX_REQUEST_BYTES
+        ):
+            yield batch
+            batch, batch_bytes = [], 0
 
+        batch.append(block)
+        batch_bytes += size
 
-def build_markdown_code_block(md_content: str):
-    """
-    Build ONE Notion code block (language=markdown) that contains the entire
-    markdown content, internally chunked into multiple rich_text segments.
-    """
-    return {
-        "object": "block",
-        "type": "code",
-        "code": {
-            "language": "markdown",
-            "rich_text": make_rich_text_items(md_content),
-        },
-    }
+    yield batch
 
 
 def build_source_link_block(url: str):
@@ -146,183 +155,293 @@ def build_source_link_block(url: str):
     }
 
 
-def clear_page_children(parent_page_id: str, notion_token: str):
+def build_link_to_page_block(page_id: str) -> dict:
     """
-    Remove all existing blocks (including child pages) from the given page.
+    Block linking to another page, used for repeated navigation entries.
     """
-    parent_uuid = normalize_notion_id(parent_page_id)
-
-    headers = {
-        "Authorization": f"Bearer {notion_token}",
-        "Notion-Version": NOTION_VERSION,
-        "Content-Type": "application/json",
+    return {
+        "object": "block",
+        "type": "link_to_page",
+        "link_to_page": {"type": "page_id", "page_id": normalize_notion_id(page_id)},
     }
 
-    print(f"[clear] Fetching children of page {parent_uuid}...")
-
-    next_cursor = None
-    total_archived = 0
 
-    while True:
-        params = {"page_size": 100}
-        if next_cursor:
-            params["start_cursor"] = next_cursor
-
-        resp = requests.get(
-            f"{NOTION_BLOCKS_API_URL}/{parent_uuid}/children",
-            headers=headers,
-            params=params,
-        )
+def clear_page_children(
+    parent_page_id: str,
+    client: NotionClient,
+    max_workers: int = DEFAULT_WORKERS,
+):
+    """
+    Remove all existing blocks (including child pages) from the given page.
 
-        if not resp.ok:
-            raise RuntimeError(
-                f"Failed to list children for page {parent_uuid}: "
-                f"{resp.status_code} {resp.text}"
-            )
+    Archiving a child page archives its whole subtree, so only the direct
+    children are archived. They are archived on a thread pool while the next
+    page of children is being listed, and the run ends with archived/failed
+    counts and the elapsed time.
+    """
+    with client.metrics.phase("clear"):
+        return _clear_page_children(parent_page_id, client, max_workers)
 
-        data = resp.json()
-        results = data.get("results", [])
 
-        print(f"[clear]   Retrieved {len(results)} children")
+def _clear_page_children(parent_page_id: str, client: NotionClient, max_workers: int):
+    parent_uuid = normalize_notion_id(parent_page_id)
 
-        if not results and not data.get("has_more"):
-            break
+    log(f"[clear] Fetching children of page {parent_uuid}...")
 
-        for block in results:
-            block_id = block.get("id")
-            obj_type = block.get("object")       # "block" or "page"
-            block_type = block.get("type")       # "paragraph", "child_page", etc.
+    started = time.monotonic()
+    futures = []
 
-            if not block_id:
-                print("[clear]   Warning: found child without ID, skipping")
-                continue
+    def archive_child(block: dict):
+        try:
+            client.archive(block)
+        except Exception as e:
+            kind = "page" if block.get("type") == "child_page" else "block"
+            print(f"[clear]   ❌ Failed to archive {kind} id={block['id']}: {e}")
+            return False
+        return True
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, max_workers), initializer=inherit_log_prefix()
+    ) as executor:
+        for data in client.list_children_pages(parent_uuid):
+            results = data.get("results", [])
+            log(f"[clear]   Retrieved {len(results)} children", level=2)
+
+            for block in results:
+                if not block.get("id"):
+                    print("[clear]   Warning: found child without ID, skipping")
+                    continue
+                futures.append(executor.submit(archive_child, block))
 
-            if obj_type == "page" or block_type == "child_page":
-                endpoint = f"{NOTION_API_URL}/{block_id}"
-                endpoint_type = "page"
-            else:
-                endpoint = f"{NOTION_BLOCKS_API_URL}/{block_id}"
-                endpoint_type = "block"
+        outcomes = [future.result() for future in futures]
 
-            print(
-                f"[clear]   Archiving {endpoint_type:<5} "
-                f"id={block_id} (object={obj_type}, type={block_type})"
-            )
+    total_archived = sum(1 for ok in outcomes if ok)
+    total_failed = len(outcomes) - total_archived
+    elapsed = time.monotonic() - started
 
-            patch_resp = requests.patch(
-                endpoint,
-                headers=headers,
-                json={"archived": True},
-            )
+    print(
+        f"[clear] Done. Archived {total_archived} child blocks/pages under {parent_uuid} "
+        f"({total_failed} failed) in {elapsed:.1f}s."
+    )
 
-            if not patch_resp.ok:
-                print(
-                    f"[clear]     ❌ Failed: {patch_resp.status_code} {patch_resp.text}"
-                )
-            else:
-                print(f"[clear]     ✔ Archived successfully")
-                total_archived += 1
+    if total_failed:
+        raise RuntimeError(
+            f"Failed to archive {total_failed} child block(s)/page(s) under {parent_uuid} "
+            f"after retries; not importing on top of a partially cleared page."
+        )
 
-        if not data.get("has_more"):
-            break
+    return {"archived": total_archived, "failed": total_failed, "elapsed": elapsed}
 
-        next_cursor = data.get("next_cursor")
-        if next_cursor:
-            print("[clear]   Fetching next page of children...")
 
-    print(f"[clear] Done. Archived {total_archived} child blocks/pages under {parent_uuid}.")
+def build_link_placeholder_block() -> dict:
+    """
+    Empty paragraph holding the place of a link_to_page block whose target
+    does not exist yet.
+    """
+    return {"object": "block", "type": "paragraph", "paragraph": {"rich_text": []}}
 
 
-def create_simple_notion_page(title: str, parent_page_id: str, notion_token: str):
+def create_simple_notion_page(title: str, parent_page_id: str, client: NotionClient):
     """
     Create a simple Notion page (used for structural / section nodes).
     """
-    parent_uuid = normalize_notion_id(parent_page_id)
-
-    headers = {
-        "Authorization": f"Bearer {notion_token}",
-        "Notion-Version": NOTION_VERSION,
-        "Content-Type": "application/json",
-    }
-
-    payload = {
-        "parent": {"page_id": parent_uuid},
-        "properties": {
-            "title": {
-                "title": [
-                    {
-                        "type": "text",
-                        "text": {"content": title},
-                    }
-                ]
-            }
-        },
-        "children": [],
-    }
+    return client.create_page(parent_page_id, title)
 
-    response = requests.post(NOTION_API_URL, headers=headers, json=payload)
 
-    if not response.ok:
-        raise RuntimeError(
-            f"Failed to create Notion directory/section page: {response.status_code} {response.text}"
-        )
-
-    return response.json()
+def page_title(source: PageSource) -> str:
+    """
+    Title of the page for a markdown file: its frontmatter title, or the
+    file name when it has none.
+    """
+    return source.title() or source.path.stem
 
 
 def create_notion_page_from_markdown(
-    markdown_path: str | Path,
+    markdown_path: str | Path | PageSource,
     parent_page_id: str,
-    notion_token: str,
+    client: NotionClient,
     docs_url: str | None = None,
+    on_created: Callable[[dict], None] | None = None,
+    assets: AssetUploader | None = None,
+    signatures: list[str] | None = None,
 ):
-    markdown_path = Path(markdown_path)
-    if not markdown_path.is_file():
-        raise FileNotFoundError(f"Markdown file not found: {markdown_path}")
+    """
+    Create a content page from a markdown file. Large pages are created with
+    their first batch of blocks and completed with appends; `on_created` is
+    called with the new page before those appends.
+
+    The file is streamed (see PageSource): at most two request batches are
+    held in memory at a time, whatever the file size. With `assets`, the
+    images the page references are placed where they appear. The signatures
+    of the blocks written are appended to `signatures`, for later updates.
+    """
+    source = PageSource.of(markdown_path)
+    images = assets.for_page(source.path) if assets is not None else None
+    blocks = build_page_children(source.chunks(), docs_url, images)
+    if signatures is not None:
+        blocks = with_signatures(blocks, signatures)
+    batches = split_block_batches(blocks)
 
-    with markdown_path.open("r", encoding="utf-8") as f:
-        md_content = f.read()
+    with client.metrics.phase("read_files"):
+        first_batch = next(batches)
+        next_batch = next(batches, None)
+        title = page_title(source)
 
-    meta_title = extract_title_from_frontmatter(md_content)
+    page = client.create_page(parent_page_id, title, first_batch)
 
-    title = meta_title or markdown_path.stem
+    if next_batch is not None and on_created is not None:
+        on_created(page)
 
-    parent_uuid = normalize_notion_id(parent_page_id)
+    last_block_id = None
+    while next_batch is not None:
+        last_block_id = client.append_children(page["id"], next_batch, after=last_block_id)[-1]["id"]
+        with client.metrics.phase("read_files"):
+            next_batch = next(batches, None)
 
-    children = []
-    if docs_url:
-        children.append(build_source_link_block(docs_url))
-    children.append(build_markdown_code_block(md_content))
+    if images is not None:
+        images.attached()
 
-    headers = {
-        "Authorization": f"Bearer {notion_token}",
-        "Notion-Version": NOTION_VERSION,
-        "Content-Type": "application/json",
-    }
+    return page
 
-    payload = {
-        "parent": {"page_id": parent_uuid},
-        "properties": {
-            "title": {
-                "title": [
-                    {
-                        "type": "text",
-                        "text": {"content": title},
-                    }
-                ]
-            }
-        },
-        "children": children,
-    }
 
-    response = requests.post(NOTION_API_URL, headers=headers, json=payload)
+def update_notion_page_from_markdown(
+    page_id: str,
+    markdown_path: str | Path | PageSource,
+    client: NotionClient,
+    docs_url: str | None = None,
+    assets: AssetUploader | None = None,
+    previous_blocks: list[str] | None = None,
+    previous_title: str | None = None,
+) -> list[str]:
+    """
+    Bring the title and content blocks of an existing page in line with a
+    markdown file, in place, so the page keeps its id and its position
+    under its parent. Returns the signatures of the blocks now on the page
+    (see block_signature()), to pass as `previous_blocks` next time.
+
+    With the `previous_blocks` recorded when the page was last written,
+    only the blocks that changed are inserted, updated or archived (see
+    diff_blocks()), so a small edit costs a few requests. Without them, or
+    when the page no longer has that many blocks, or when the diff would
+    cost more, every block is archived and re-appended. Nested child pages
+    and link blocks are left untouched. The title is only set when it
+    differs from `previous_title`.
+
+    The full rewrite streams the file like create_notion_page_from_markdown();
+    only the diff needs the whole page's blocks at once.
+    """
+    source = PageSource.of(markdown_path)
+    images = assets.for_page(source.path) if assets is not None else None
+
+    with client.metrics.phase("read_files"):
+        title = page_title(source)
+    if title != previous_title:
+        client.set_page_title(page_id, title)
+
+    existing_ids = [
+        block["id"]
+        for block in client.list_children(page_id)
+        if block.get("id")
+        and block.get("object") != "page"
+        and block.get("type") not in ("child_page", "link_to_page")
+    ]
 
-    if not response.ok:
-        raise RuntimeError(
-            f"Failed to create Notion page: {response.status_code} {response.text}"
+    if previous_blocks is not None and len(previous_blocks) == len(existing_ids):
+        with client.metrics.phase("read_files"):
+            blocks = list(build_page_children(source.chunks(), docs_url, images))
+        signatures = [block_signature(block) for block in blocks]
+        plan = diff_blocks(previous_blocks, blocks, signatures)
+        rewrite_cost = len(existing_ids) + sum(1 for _ in split_block_batches(blocks))
+        if plan is not None and block_diff_cost(plan) < rewrite_cost:
+            apply_block_diff(page_id, existing_ids, blocks, plan, client)
+            if images is not None:
+                images.attached()
+            return signatures
+        batches = split_block_batches(blocks)
+    else:
+        signatures = []
+        batches = split_block_batches(
+            with_signatures(build_page_children(source.chunks(), docs_url, images), signatures)
         )
 
-    return response.json()
+    for block_id in existing_ids:
+        client.archive_block(block_id)
+    last_block_id = None
+    while True:
+        with client.metrics.phase("read_files"):
+            batch = next(batches, None)
+        if batch is None:
+            break
+        if batch:
+            last_block_id = client.append_children(page_id, batch, after=last_block_id)[-1]["id"]
+
+    if images is not None:
+        images.attached()
+
+    return signatures
+
+
+def block_diff_cost(plan: list[tuple]) -> int:
+    """
+    Requests apply_block_diff() makes for `plan`: one per update and archive,
+    one per run of inserts.
+    """
+    cost = 0
+    previous = None
+    for op, _, _ in plan:
+        if op in ("update", "archive") or (op == "insert" and previous != "insert"):
+            cost += 1
+        previous = op
+    return cost
+
+
+def apply_block_diff(
+    page_id: str,
+    existing_ids: list[str],
+    blocks: list[dict],
+    plan: list[tuple],
+    client: NotionClient,
+):
+    """
+    Carry out a diff_blocks() plan on a page whose content blocks are
+    `existing_ids`. Runs of inserted blocks are appended after the block
+    before them in one request per batch.
+    """
+    anchor: str | None = None
+    pending: list[dict] = []
+
+    def flush():
+        nonlocal anchor
+        for batch in split_block_batches(pending):
+            if batch:
+                anchor = client.append_children(page_id, batch, after=anchor)[-1]["id"]
+        pending.clear()
+
+    for op, old, new in plan:
+        if op == "insert":
+            pending.append(blocks[new])
+            continue
+        flush()
+        if op == "keep":
+            anchor = existing_ids[old]
+        elif op == "update":
+            block_type = blocks[new]["type"]
+            client.update_block(existing_ids[old], {block_type: blocks[new][block_type]})
+            anchor = existing_ids[old]
+        else:
+            client.archive_block(existing_ids[old])
+    flush()
+
+
+def page_content_hash(source: PageSource, assets: AssetUploader | None = None) -> str:
+    """
+    Hash recorded for a content page: the file's hash, combined with the
+    hashes of the local images it references when images are exported.
+    """
+    content_hash = source.hash()
+    if assets is None:
+        return content_hash
+    return assets.page_hash(content_hash, source.path, source.chunks())
 
 
 def load_docs_structure(root_dir: Path) -> dict:
@@ -339,7 +458,7 @@ def load_docs_structure(root_dir: Path) -> dict:
         return json.load(f)
 
 
-def resolve_page_to_file(root_dir: Path, slug: str) -> Path | None:
+def resolve_page_to_file(index: DocsIndex, slug: str) -> Path | None:
     """
     Given a page slug like:
       - "Overview"
@@ -351,29 +470,25 @@ def resolve_page_to_file(root_dir: Path, slug: str) -> Path | None:
       - <root>/Sandboxes/Overview.mdx or .md
       - <root>/api-reference/introduction.mdx or .md
 
+      - A leading "/" is ignored ("/cli-reference/commands/bl_apply").
       - Ignore if the *root-level* directory is in IGNORED_DIR_NAMES.
       - Prefer .mdx over .md.
       - If slug already has an extension and the file exists, accept it
         (but still enforce .md/.mdx).
-    """
-    rel = Path(slug)
 
-    if rel.parts and rel.parts[0] in IGNORED_DIR_NAMES:
-        print(f"[skip] Slug under ignored root dir '{rel.parts[0]}': {slug}")
+    Lookups are answered from `index`, without touching the filesystem.
+    """
+    ignored = index.ignored_root(slug)
+    if ignored:
+        log(f"[skip] Slug under ignored root dir '{ignored}': {slug}")
         return None
 
-    if rel.suffix == "":
-        for ext in (".mdx", ".md"):
-            candidate = (root_dir / (str(rel) + ext)).resolve()
-            if candidate.is_file():
-                return candidate
-
-    candidate = (root_dir / rel).resolve()
-    if candidate.is_file() and candidate.suffix.lower() in (".md", ".mdx"):
-        return candidate
+    entry = index.lookup(slug)
+    if entry is None:
+        print(f"[warn] Could not resolve slug '{slug}' to a markdown file under {index.root_dir}")
+        return None
 
-    print(f"[warn] Could not resolve slug '{slug}' to a markdown file under {root_dir}")
-    return None
+    return entry["path"]
 
 
 def build_docs_url(root_dir: Path, file_path: Path) -> str:
@@ -386,7 +501,11 @@ def build_docs_url(root_dir: Path, file_path: Path) -> str:
     return DOCS_BASE_URL.rstrip("/") + "/" + rel_str.lstrip("/")
 
 
-def build_nav_nodes(docs_json: dict, root_dir: Path) -> list[dict]:
+def build_nav_nodes(
+    docs_json: dict,
+    root_dir: Path,
+    index: DocsIndex | None = None,
+) -> list[dict]:
     """
     Convert docs.json to a simple navigation tree:
 
@@ -395,6 +514,7 @@ def build_nav_nodes(docs_json: dict, root_dir: Path) -> list[dict]:
         "file": Optional[Path],
         "children": list[node],
         "kind": "tab" | "group" | "section" | "page",
+        "key": str,
       }
 
     Behaviour:
@@ -405,26 +525,46 @@ def build_nav_nodes(docs_json: dict, root_dir: Path) -> list[dict]:
       - Only files that resolve to .md/.mdx under root_dir are included.
       - Paths starting under ignored root-level dirs (node_modules, img, etc.)
         are skipped.
+
+    `key` identifies a node by its position in the navigation, e.g.
+    "tab:Documentation > group:Sandboxes > page:Sandboxes/Overview". It is
+    stable across runs as long as the node keeps its place in docs.json.
+
+    Slugs are resolved through `index` (built from root_dir if not given).
     """
+    if index is None:
+        index = DocsIndex(root_dir)
 
     nav = docs_json.get("navigation", {})
     tabs = nav.get("tabs", [])
 
-    def build_group_node(group_obj: dict) -> dict | None:
+    seen_keys: set[str] = set()
+
+    def make_key(parent_key: str, segment: str) -> str:
+        key = f"{parent_key} > {segment}" if parent_key else segment
+        base, n = key, 1
+        while key in seen_keys:
+            n += 1
+            key = f"{base}#{n}"
+        seen_keys.add(key)
+        return key
+
+    def build_group_node(group_obj: dict, parent_key: str) -> dict | None:
         group_title = group_obj.get("group") or "Untitled group"
         pages = group_obj.get("pages", [])
+        group_key = make_key(parent_key, f"group:{group_title}")
 
         children: list[dict] = []
 
         for entry in pages:
             if isinstance(entry, dict) and "group" in entry:
-                nested = build_group_node(entry)
+                nested = build_group_node(entry, group_key)
                 if nested:
                     children.append(nested)
                 continue
 
             if isinstance(entry, str):
-                file_path = resolve_page_to_file(root_dir, entry)
+                file_path = resolve_page_to_file(index, entry)
                 if not file_path:
                     continue
 
@@ -434,6 +574,7 @@ def build_nav_nodes(docs_json: dict, root_dir: Path) -> list[dict]:
                         "file": file_path,
                         "children": [],
                         "kind": "page",
+                        "key": make_key(group_key, f"page:{entry}"),
                     }
                 )
                 continue
@@ -441,7 +582,7 @@ def build_nav_nodes(docs_json: dict, root_dir: Path) -> list[dict]:
             print(f"[skip] Unrecognized pages entry in group '{group_title}': {entry!r}")
 
         if not children:
-            print(f"[info] Group '{group_title}' has no usable children, skipping.")
+            log(f"[info] Group '{group_title}' has no usable children, skipping.")
             return None
 
         return {
@@ -449,6 +590,7 @@ def build_nav_nodes(docs_json: dict, root_dir: Path) -> list[dict]:
             "file": None,
             "children": children,
             "kind": "group",
+            "key": group_key,
         }
 
     nodes: list[dict] = []
@@ -460,15 +602,16 @@ def build_nav_nodes(docs_json: dict, root_dir: Path) -> list[dict]:
         if not groups:
             continue
 
+        tab_key = make_key("", f"tab:{tab_title}")
         tab_children: list[dict] = []
 
         for group_obj in groups:
-            group_node = build_group_node(group_obj)
+            group_node = build_group_node(group_obj, tab_key)
             if group_node:
                 tab_children.append(group_node)
 
         if not tab_children:
-            print(f"[info] Tab '{tab_title}' has no usable groups, skipping.")
+            log(f"[info] Tab '{tab_title}' has no usable groups, skipping.")
             continue
 
         nodes.append(
@@ -477,227 +620,2365 @@ def build_nav_nodes(docs_json: dict, root_dir: Path) -> list[dict]:
                 "file": None,
                 "children": tab_children,
                 "kind": "tab",
+                "key": tab_key,
             }
         )
 
     return nodes
 
 
-def process_nav_nodes(
+def flatten_nav_nodes(
     nodes: list[dict],
-    root_dir: Path,
     parent_page_id: str,
-    notion_token: str,
-    counters: dict,
     current_group: str | None = None,
-):
+    tasks: list[dict] | None = None,
+    existing: dict[str, str] | None = None,
+) -> list[dict]:
     """
-    Recursively create Notion pages according to the docs.json-derived structure.
+    Flatten a navigation subtree into preorder creation tasks:
+
+      task = {
+        "node": node,
+        "parent": index of the parent task, or None for `nodes` themselves,
+        "parent_id": Notion page id to create root tasks under,
+        "prev": index of the previous sibling task, or None,
+        "group": Mintlify group the node's page counts towards,
+        "move": id of the existing page to move instead, if any,
+      }
 
-    Rules:
-      - Node with `file` -> create a content page from that markdown file.
-      - Node without `file` but with children -> create a structural Notion page.
-      - Node with both `file` and children -> children are nested under the file page.
+    Pass `tasks` to append several subtrees (with different parents) to one
+    task list that can run in a single scheduler pass. Nodes of `nodes`
+    that already have a page (`existing`: key -> page id) are moved after
+    their previous sibling instead of being created; their subtrees are
+    left out.
+    """
+    if tasks is None:
+        tasks = []
+    existing = existing or {}
+
+    def walk(children: list[dict], parent: int | None, group: str | None):
+        prev = None
+        for node in children:
+            index = len(tasks)
+            tasks.append(
+                {
+                    "node": node,
+                    "parent": parent,
+                    "parent_id": parent_page_id if parent is None else None,
+                    "prev": prev,
+                    "group": group,
+                    "move": existing.get(node["key"]) if parent is None else None,
+                }
+            )
+            prev = index
 
-    Counters:
-      - counters["total_pages"]: total number of content pages (file-backed) created.
-      - counters["groups"][group_title]: pages created under that Mintlify group.
+            if tasks[index]["move"] is None:
+                next_group = node["title"] if node.get("kind") == "group" else group
+                walk(node.get("children", []), index, next_group)
+
+    walk(nodes, None, current_group)
+    return tasks
+
+
+def run_nav_tasks(
+    tasks: list[dict],
+    root_dir: Path,
+    client: NotionClient,
+    counters: dict,
+    page_records: dict | None = None,
+    max_workers: int = DEFAULT_WORKERS,
+    journal: ExportJournal | None = None,
+    assets: AssetUploader | None = None,
+    deferred_links: list[dict] | None = None,
+):
     """
-    for node in nodes:
+    Create the pages for tasks built by flatten_nav_nodes() on a worker pool.
+
+    A task runs once its parent page exists and its previous sibling has been
+    created, because Notion orders child pages by creation time. Subtrees
+    under different parents therefore proceed in parallel, while every
+    request still goes through the client's rate limiter. Logs, counters and
+    `page_records` are updated in task (preorder) order.
+
+    Tasks with a "move" page id move that existing page under its parent,
+    which makes it the last child, instead of creating one. If that fails,
+    the page's record in `page_records` is flagged "misplaced".
+
+    With a `journal`, every created page is logged as soon as it exists, and
+    pages the journal already lists as finished are reused instead of being
+    created again. A content page that was created but not fully written is
+    rewritten in place, so it keeps its position.
+
+    Link nodes (see link_repeated_pages()) become a link_to_page block
+    pointing at the page of their `link_to` node: the task for it when it is
+    in `tasks` (and the link waits for it), otherwise its entry in
+    `page_records`. With `deferred_links` (sharded exports), a link whose
+    target is in neither holds its place with an empty paragraph, and
+    {"key", "parent", "placeholder", "link_to"} is appended to
+    `deferred_links` so the merge step can swap in the link.
+    """
+    task_indexes = {task["node"]["key"]: index for index, task in enumerate(tasks)}
+
+    def link_target(task: dict) -> int | None:
+        link_to = task["node"].get("link_to")
+        return task_indexes.get(link_to) if link_to is not None else None
+
+    def work(index: int, results: list) -> dict:
+        task = tasks[index]
+        node = task["node"]
         title = node["title"]
         file_path: Path | None = node.get("file")
         children = node.get("children", [])
         kind = node.get("kind")
 
-        current_parent_id = parent_page_id
+        if task["parent"] is None:
+            parent_id = task["parent_id"]
+        else:
+            parent_id = results[task["parent"]]["id"]
+
+        if not parent_id:
+            return {"id": None, "lines": [], "created_file": False}
+
+        key = node["key"]
+        if journal is not None:
+            finished = journal.finished_page(key)
+            if finished:
+                return {
+                    "id": finished["id"],
+                    "lines": [],
+                    "created_file": False,
+                    "resumed": True,
+                    "hash": finished["hash"],
+                }
 
-        next_group = current_group
-        if kind == "group":
-            next_group = title
+        if task["move"] is not None:
+            try:
+                client.move_page(task["move"], parent_id)
+            except Exception as e:
+                return {
+                    "id": task["move"],
+                    "lines": [f"Error moving page '{title}' into place: {e}"],
+                    "created_file": False,
+                    "failed": True,
+                    "moved": True,
+                }
+            return {
+                "id": task["move"],
+                "lines": [f"[move] Moved page '{title}' after its new siblings"],
+                "created_file": False,
+                "moved": True,
+            }
+
+        link_to = node.get("link_to")
+        if link_to is not None:
+            target = link_target(task)
+            if target is not None:
+                target_id = results[target]["id"]
+            else:
+                target_id = (page_records or {}).get(link_to, {}).get("id")
+            if not target_id and deferred_links is not None and target is None:
+                try:
+                    placeholder = client.append_children(parent_id, [build_link_placeholder_block()])[0]
+                except Exception as e:
+                    return {
+                        "id": None,
+                        "lines": [f"Error holding the place of repeated page '{title}': {e}"],
+                        "created_file": False,
+                        "failed": True,
+                    }
+                return {
+                    "id": None,
+                    "lines": [f"[link] Deferred link for repeated page '{title}' to the merge step"],
+                    "created_file": False,
+                    "deferred": {
+                        "key": key,
+                        "parent": parent_id,
+                        "placeholder": placeholder["id"],
+                        "link_to": link_to,
+                    },
+                }
+            if not target_id:
+                return {
+                    "id": None,
+                    "lines": [f"Warning: cannot link '{title}', its first appearance has no page."],
+                    "created_file": False,
+                }
+
+            try:
+                block = client.append_children(parent_id, [build_link_to_page_block(target_id)])[0]
+            except Exception as e:
+                return {
+                    "id": None,
+                    "lines": [f"Error linking repeated page '{title}': {e}"],
+                    "created_file": False,
+                    "failed": True,
+                }
+
+            link_hash = f"link:{normalize_notion_id(target_id)}"
+            if journal is not None:
+                journal.record_page(key, block["id"], parent_id, link_hash)
+
+            return {
+                "id": block["id"],
+                "lines": [f"[link] Linked repeated page '{title}' to its first appearance"],
+                "created_file": False,
+                "linked": True,
+                "hash": link_hash,
+            }
 
         if file_path is None and children:
             try:
-                page = create_simple_notion_page(title, parent_page_id, notion_token)
+                page = create_simple_notion_page(title, parent_id, client)
             except Exception as e:
-                print(f"Error creating structural page '{title}': {e}")
-                continue
+                return {
+                    "id": None,
+                    "lines": [f"Error creating structural page '{title}': {e}"],
+                    "created_file": False,
+                    "failed": True,
+                }
 
             page_id = page.get("id")
             if not page_id:
-                print(f"Warning: structural page for '{title}' has no 'id' in response.")
-                continue
+                return {
+                    "id": None,
+                    "lines": [f"Warning: structural page for '{title}' has no 'id' in response."],
+                    "created_file": False,
+                }
 
-            current_parent_id = page_id
-            print(f"[section] Created Notion page for section '{title}' (kind={kind})")
+            if journal is not None:
+                journal.record_page(key, page_id, parent_id)
 
-            process_nav_nodes(
-                children,
-                root_dir,
-                current_parent_id,
-                notion_token,
-                counters,
-                current_group=next_group,
-            )
-            continue
+            return {
+                "id": page_id,
+                "lines": [f"[section] Created Notion page for section '{title}' (kind={kind})"],
+                "created_file": False,
+            }
 
-        if file_path is not None:
-            if not file_path.is_file():
-                print(f"[warn] File listed in docs.json not found: {file_path}")
-                continue
+        if file_path is None:
+            return {"id": None, "lines": [], "created_file": False}
 
+        rel_display = file_path.relative_to(root_dir).as_posix()
+        docs_url = build_docs_url(root_dir, file_path)
+        # Title, content and hash all come from one read of the file (and
+        # from one read per run when the node carries a shared source).
+        source = node.get("source") or PageSource(file_path)
+
+        half_written = journal.pages.get(key) if journal is not None else None
+        if half_written:
             try:
-                docs_url = build_docs_url(root_dir, file_path)
-                page = create_notion_page_from_markdown(
-                    file_path,
-                    current_parent_id,
-                    notion_token,
-                    docs_url=docs_url,
+                signatures = update_notion_page_from_markdown(
+                    half_written["id"], source, client, docs_url=docs_url, assets=assets
                 )
             except Exception as e:
-                print(f"Error creating page for file '{file_path}': {e}")
-                continue
+                return {
+                    "id": None,
+                    "lines": [f"Error finishing page for file '{file_path}': {e}"],
+                    "created_file": False,
+                    "failed": True,
+                }
 
-            page_id = page.get("id")
-            notion_url = page.get("url", "(no url in response)")
-            rel_display = file_path.relative_to(root_dir).as_posix()
-            print(f"[file] Created Notion page for '{rel_display}': {notion_url}")
+            content_hash = page_content_hash(source, assets)
+            journal.record_page(key, half_written["id"], parent_id, content_hash)
+            return {
+                "id": half_written["id"],
+                "lines": [f"[resume] Finished half-written Notion page for '{rel_display}'"],
+                "created_file": True,
+                "hash": content_hash,
+                "title": page_title(source),
+                "blocks": signatures,
+            }
+
+        def on_created(page: dict):
+            if journal is not None and page.get("id"):
+                journal.record_page(key, page["id"], parent_id, done=False)
+
+        signatures: list[str] = []
+        try:
+            page = create_notion_page_from_markdown(
+                source,
+                parent_id,
+                client,
+                docs_url=docs_url,
+                on_created=on_created,
+                assets=assets,
+                signatures=signatures,
+            )
+        except Exception as e:
+            return {
+                "id": None,
+                "lines": [f"Error creating page for file '{file_path}': {e}"],
+                "created_file": False,
+                "failed": True,
+            }
+
+        page_id = page.get("id")
+        notion_url = page.get("url", "(no url in response)")
+        lines = [f"[file] Created Notion page for '{rel_display}': {notion_url}"]
+
+        content_hash = None
+        if page_records is not None or journal is not None:
+            content_hash = page_content_hash(source, assets)
+
+        if journal is not None and page_id:
+            journal.record_page(key, page_id, parent_id, content_hash)
 
+        if children and not page_id:
+            lines.append(
+                f"Warning: cannot attach children under '{title}' "
+                f"because created page has no 'id'."
+            )
+
+        return {
+            "id": page_id,
+            "lines": lines,
+            "created_file": True,
+            "hash": content_hash,
+            "title": page_title(source),
+            "blocks": signatures,
+        }
+
+    def on_release(index: int, result: dict):
+        for line in result["lines"]:
+            log(line, level=0 if result.get("failed") else 1)
+
+        task = tasks[index]
+
+        if result.get("resumed"):
+            counters["resumed"] = counters.get("resumed", 0) + 1
+        if result.get("failed"):
+            counters["failed"] = counters.get("failed", 0) + 1
+        if result.get("linked"):
+            counters["linked"] = counters.get("linked", 0) + 1
+        if result.get("deferred"):
+            deferred_links.append(result["deferred"])
+        if result.get("moved"):
+            # The page and its subtree were recorded by the incremental sync.
+            if result.get("failed"):
+                if page_records is not None and task["node"]["key"] in page_records:
+                    page_records[task["node"]["key"]]["misplaced"] = True
+            else:
+                counters["moved"] = counters.get("moved", 0) + 1
+            return
+
+        if result["created_file"]:
             counters["total_pages"] += 1
-            if current_group is not None:
-                counters["groups"][current_group] = counters["groups"].get(current_group, 0) + 1
-
-            if children:
-                if not page_id:
-                    print(
-                        f"Warning: cannot attach children under '{title}' "
-                        f"because created page has no 'id'."
-                    )
-                else:
-                    process_nav_nodes(
-                        children,
-                        root_dir,
-                        page_id,
-                        notion_token,
-                        counters,
-                        current_group=next_group,
-                    )
+            group = task["group"]
+            if group is not None:
+                counters["groups"][group] = counters["groups"].get(group, 0) + 1
+
+        if page_records is not None and result["id"]:
+            page_records[task["node"]["key"]] = {
+                "id": result["id"],
+                "hash": result.get("hash"),
+            }
+            if result.get("title") is not None:
+                page_records[task["node"]["key"]]["title"] = result["title"]
+            if result.get("blocks") is not None:
+                page_records[task["node"]["key"]]["blocks"] = result["blocks"]
+
+    deps = [
+        [dep for dep in (task["parent"], task["prev"], link_target(task)) if dep is not None]
+        for task in tasks
+    ]
 
+    with client.metrics.phase("create"):
+        run_dependency_graph(deps, work, max_workers, on_release=on_release)
 
-def process_directory_with_docs_json(
+
+def process_nav_nodes(
+    nodes: list[dict],
     root_dir: Path,
     parent_page_id: str,
-    notion_token: str,
+    client: NotionClient,
+    counters: dict,
+    current_group: str | None = None,
+    page_records: dict | None = None,
+    max_workers: int = DEFAULT_WORKERS,
+    journal: ExportJournal | None = None,
+    assets: AssetUploader | None = None,
 ):
-    root_dir = root_dir.resolve()
+    """
+    Create Notion pages according to the docs.json-derived structure.
 
-    docs_json = load_docs_structure(root_dir)
-    nav_nodes = build_nav_nodes(docs_json, root_dir)
+    Rules:
+      - Node with `file` -> create a content page from that markdown file.
+      - Node without `file` but with children -> create a structural Notion page.
+      - Node with both `file` and children -> children are nested under the file page.
 
-    if not nav_nodes:
-        print(f"No usable navigation entries found in {DOCS_JSON_NAME} under {root_dir}")
-        return {"total_pages": 0, "groups": {}}
+    Pages are created concurrently (see run_nav_tasks()), but sibling order
+    in Notion, log output and counters are the same as a sequential
+    depth-first walk.
 
-    counters = {"total_pages": 0, "groups": {}}
+    Counters:
+      - counters["total_pages"]: total number of content pages (file-backed) created.
+      - counters["groups"][group_title]: pages created under that Mintlify group.
 
-    process_nav_nodes(
-        nav_nodes,
+    If `page_records` is given, every created page is recorded in it as
+    node key -> {"id": page_id, "hash": content hash or None[, "title"]}.
+
+    If `journal` is given, created pages are appended to it as they are
+    created and pages it already lists as finished are skipped.
+
+    If `assets` is given, the local images pages reference are uploaded and
+    added to them.
+    """
+    tasks = flatten_nav_nodes(nodes, parent_page_id, current_group)
+
+    run_nav_tasks(
+        tasks,
         root_dir,
-        parent_page_id,
-        notion_token,
+        client,
         counters,
-        current_group=None,
+        page_records=page_records,
+        max_workers=max_workers,
+        journal=journal,
+        assets=assets,
     )
 
-    print("\n[stats] Pages created per group:")
-    if not counters["groups"]:
-        print("[stats]   (no group-scoped pages)")
-    else:
-        for group_name, count in sorted(counters["groups"].items()):
-            print(f"[stats]   {group_name}: {count} page(s)")
 
-    print(f"[stats] Total content pages created: {counters['total_pages']}")
+def load_nav_nodes(root_dir: Path, metrics: ExportMetrics) -> list[dict]:
+    """
+    Load docs.json, index the docs tree and build the navigation nodes,
+    timing each step and reporting unresolved slugs and unreferenced files.
+    """
+    with metrics.phase("load_docs_json"):
+        docs_json = load_docs_structure(root_dir)
+    with metrics.phase("index"):
+        # Titles are read together with the content, not during the scan.
+        index = DocsIndex(root_dir, read_titles=False)
+    with metrics.phase("build_nav"):
+        nav_nodes = build_nav_nodes(docs_json, root_dir, index)
+    index.print_report("[index]", limit=None if VERBOSITY >= 2 else 20)
+    with metrics.phase("openapi"):
+        add_openapi_nodes(nav_nodes, docs_json, root_dir)
 
-    return counters
+    linked = link_repeated_pages(nav_nodes)
+    if linked:
+        log(f"[nav] {linked} repeated page(s) will link to their first appearance")
+
+    return nav_nodes
 
-from datetime import datetime
-import subprocess
 
-def add_root_update_block(parent_page_id: str, notion_token: str):
+def link_repeated_pages(nodes: list[dict]) -> int:
     """
-    Insert a paragraph block at the top of the root page showing
-    the date/time of the import and the git commit ID.
+    Turn every page node whose file already appeared earlier in the
+    navigation (in preorder) into a link node:
+
+      {"title", "file": None, "children": [], "kind": "link", "key",
+       "link_to": key of the node of the first appearance}
+
+    so each file is read, built and uploaded once per run, and repeated
+    entries only cost a link_to_page block. Generated pages (OpenAPI
+    operations) are never linked: their path is not a file in the tree.
+    Returns the number of links.
     """
-    parent_uuid = normalize_notion_id(parent_page_id)
+    first: dict[Path, str] = {}
+    linked = 0
+
+    def walk(children: list[dict]):
+        nonlocal linked
+        for node in children:
+            file_path = node.get("file")
+            if file_path is not None and not isinstance(node.get("source"), TextPageSource):
+                resolved = Path(file_path).resolve()
+                if resolved in first and not node.get("children"):
+                    node.update({"file": None, "kind": "link", "link_to": first[resolved]})
+                    node.pop("source", None)
+                    linked += 1
+                    continue
+                first.setdefault(resolved, node["key"])
+            walk(node.get("children", []))
 
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    walk(nodes)
+    return linked
 
-    try:
-        commit_id = (
-            subprocess.check_output(["git", "rev-parse", "HEAD"])
-            .decode("utf-8")
-            .strip()
-        )
-    except Exception:
-        commit_id = "(unknown)"
 
-    lines = [
-        f"Last updated: {now}",
+def add_openapi_nodes(nav_nodes: list[dict], docs_json: dict, root_dir: Path):
+    """
+    Add the API reference generated from each tab's local OpenAPI spec
+    (docs.json `"openapi": {"source": ..., "directory": ...}`) to that tab:
+    one group per tag and one page per operation, after the tab's groups.
+    Tabs with only a spec, which build_nav_nodes() skips, are inserted at
+    their place in the navigation.
+
+    Operation pages carry a TextPageSource with the rendered markdown, so
+    they are exported, hashed and diffed like file pages; their `file` is
+    the path the docs site serves them at. The spec is loaded through the
+    index cache (OPENAPI_INDEX_FILE_NAME), so it is only parsed when it
+    changed.
+    """
+    tabs = docs_json.get("navigation", {}).get("tabs", [])
+    tab_titles = [tab.get("tab") or "Untitled tab" for tab in tabs]
+
+    for position, tab in enumerate(tabs):
+        spec = tab.get("openapi")
+        if not spec:
+            continue
+
+        source = spec.get("source") if isinstance(spec, dict) else spec
+        if not isinstance(source, str) or source.startswith(("http://", "https://")):
+            log(f"[skip] OpenAPI spec of tab '{tab_titles[position]}' is not a local file: {source}")
+            continue
+
+        spec_path = root_dir / source.lstrip("/")
+        if not spec_path.is_file():
+            print(f"[warn] OpenAPI spec of tab '{tab_titles[position]}' not found: {spec_path}")
+            continue
+
+        directory = (spec.get("directory") if isinstance(spec, dict) else None) or "api-reference"
+
+        try:
+            index, cached = load_openapi_index(spec_path, root_dir / OPENAPI_INDEX_FILE_NAME)
+        except (OSError, ValueError) as e:
+            print(f"[warn] Could not load OpenAPI spec {spec_path}: {e}")
+            continue
+
+        tab_key = f"tab:{tab_titles[position]}"
+        tab_node = next((node for node in nav_nodes if node["key"] == tab_key), None)
+        if tab_node is None:
+            tab_node = {"title": tab_titles[position], "file": None, "children": [], "kind": "tab", "key": tab_key}
+            earlier = {f"tab:{title}" for title in tab_titles[:position]}
+            nav_nodes.insert(sum(1 for node in nav_nodes if node["key"] in earlier), tab_node)
+
+        operations = {operation["key"]: operation for operation in index["operations"]}
+        for tag, keys in index["tags"].items():
+            tag_key = f"{tab_key} > api-tag:{tag}"
+            pages = []
+            tag_operations = [operations[key] for key in keys]
+            for key, operation, slug in zip(keys, tag_operations, operation_slugs(tag_operations)):
+                file_path = root_dir / directory / tag_slug(tag) / f"{slug}.mdx"
+                pages.append(
+                    {
+                        "title": operation["summary"],
+                        "file": file_path,
+                        "source": TextPageSource(file_path, render_operation(index, operation)),
+                        "children": [],
+                        "kind": "page",
+                        "key": f"{tag_key} > api:{key}",
+                    }
+                )
+            tab_node["children"].append(
+                {"title": tag, "file": None, "children": pages, "kind": "group", "key": tag_key}
+            )
+
+        log(
+            f"[openapi] {spec_path.relative_to(root_dir).as_posix()}: {len(index['operations'])} "
+            f"operation page(s) in {len(index['tags'])} tag group(s) "
+            f"({'cached index' if cached else 'spec parsed'})"
+        )
+
+
+def share_page_sources(nodes: list[dict], cache: PageCache | None = None) -> PageCache:
+    """
+    Attach one shared PageSource to every file-backed node, so exports that
+    reuse the same nodes (one per target) read each file only once.
+    """
+    cache = cache or PageCache()
+    for node in nodes:
+        # Generated pages already carry their (in-memory) source.
+        if node.get("file") is not None and node.get("source") is None:
+            node["source"] = cache.get(node["file"])
+        share_page_sources(node.get("children", []), cache)
+    return cache
+
+
+def process_directory_with_docs_json(
+    root_dir: Path,
+    parent_page_id: str,
+    client: NotionClient,
+    max_workers: int = DEFAULT_WORKERS,
+    journal: ExportJournal | None = None,
+    nav_nodes: list[dict] | None = None,
+    assets: AssetUploader | None = None,
+    shard_index: int | None = None,
+    shard_count: int | None = None,
+    sections: dict[str, str] | None = None,
+    page_records: dict | None = None,
+    deferred_links: list[dict] | None = None,
+):
+    """
+    Export the docs tree under `parent_page_id`. Pass `nav_nodes` if they
+    are already built, and `page_records` to collect the created pages
+    (see process_nav_nodes()).
+
+    With `shard_index` and `shard_count`, only that shard's units of the
+    navigation tree (see partition_nav_nodes()) are exported, each under
+    its section page in `sections` (node key -> page id, created by
+    prepare_sharded_export()). Links to pages of other shards are recorded
+    in `deferred_links` instead.
+    """
+    root_dir = root_dir.resolve()
+
+    if nav_nodes is None:
+        nav_nodes = load_nav_nodes(root_dir, client.metrics)
+
+    if not nav_nodes:
+        print(f"No usable navigation entries found in {DOCS_JSON_NAME} under {root_dir}")
+        return {"total_pages": 0, "groups": {}}
+
+    counters = {"total_pages": 0, "groups": {}}
+
+    if shard_count is not None:
+        tasks: list[dict] = []
+        for unit in partition_nav_nodes(nav_nodes, shard_count)[shard_index]:
+            node = unit["node"]
+            section_id = (sections or {}).get(node["key"])
+            if section_id is None:
+                raise RuntimeError(
+                    f"No section page for '{node['key']}': the docs tree changed since the "
+                    "shards were prepared"
+                )
+            flatten_nav_nodes(
+                node.get("children", []),
+                section_id,
+                node["title"] if node.get("kind") == "group" else None,
+                tasks=tasks,
+            )
+            log(
+                f"[shard] Exporting '{node['title']}': {unit['pages']} page(s), "
+                f"{unit['bytes']} bytes"
+            )
+
+        run_nav_tasks(
+            tasks,
+            root_dir,
+            client,
+            counters,
+            page_records=page_records,
+            max_workers=max_workers,
+            assets=assets,
+            deferred_links=deferred_links,
+        )
+    else:
+        process_nav_nodes(
+            nav_nodes,
+            root_dir,
+            parent_page_id,
+            client,
+            counters,
+            current_group=None,
+            page_records=page_records,
+            max_workers=max_workers,
+            journal=journal,
+            assets=assets,
+        )
+
+    print_export_stats(counters)
+
+    return counters
+
+
+def print_export_stats(counters: dict):
+    """
+    Print the per-group and total page counts of an export.
+    """
+    print("\n[stats] Pages created per group:")
+    if not counters["groups"]:
+        print("[stats]   (no group-scoped pages)")
+    else:
+        for group_name, count in sorted(counters["groups"].items()):
+            print(f"[stats]   {group_name}: {count} page(s)")
+
+    print(f"[stats] Total content pages created: {counters['total_pages']}")
+    for name, label in (
+        ("updated", "Content pages updated"),
+        ("unchanged", "Content pages unchanged"),
+        ("archived", "Pages archived"),
+        ("moved", "Pages moved into place"),
+        ("resumed", "Pages reused from the journal"),
+        ("linked", "Repeated pages linked to their first appearance"),
+    ):
+        if name in counters and (counters[name] or name not in ("resumed", "linked", "moved")):
+            print(f"[stats] {label}: {counters[name]}")
+
+from datetime import datetime
+import subprocess
+
+def get_git_commit() -> str:
+    """
+    Return the current git commit id, or "(unknown)" outside a git checkout.
+    """
+    try:
+        return (
+            subprocess.check_output(["git", "rev-parse", "HEAD"])
+            .decode("utf-8")
+            .strip()
+        )
+    except Exception:
+        return "(unknown)"
+
+
+def build_root_update_rich_text(now: str, commit_id: str):
+    """
+    Build the rich_text of the "Last updated" paragraph on the root page.
+    """
+    lines = [
+        f"Last updated: {now}",
         f"Commit: {commit_id}",
     ]
     block_text = "\n".join(lines)
 
-    block = {
-        "children": [
-            {
-                "object": "block",
-                "type": "paragraph",
-                "paragraph": {
-                    "rich_text": [
-                        {
-                            "type": "text",
-                            "text": {"content": block_text}
-                        }
-                    ]
-                }
-            }
-        ]
-    }
+    return [
+        {
+            "type": "text",
+            "text": {"content": block_text}
+        }
+    ]
+
+
+def add_root_update_block(
+    parent_page_id: str,
+    client: NotionClient,
+    commit_id: str | None = None,
+):
+    """
+    Insert a paragraph block at the top of the root page showing
+    the date/time of the import and the git commit ID (`commit_id`, or the
+    current checkout's).
+
+    Returns {"block_id": ..., "commit": ...} so the block can later be
+    updated in place.
+    """
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if commit_id is None:
+        commit_id = get_git_commit()
+
+    block = {
+        "object": "block",
+        "type": "paragraph",
+        "paragraph": {
+            "rich_text": build_root_update_rich_text(now, commit_id)
+        }
+    }
+
+    try:
+        results = client.append_children(parent_page_id, [block])
+    except RuntimeError as e:
+        raise RuntimeError(f"Failed to insert root update block: {e}") from e
+
+    print(f"[root] Added 'Last updated' block to root page ({now}, commit {commit_id})")
+
+    block_id = results[-1].get("id") if results else None
+
+    return {"block_id": block_id, "commit": commit_id}
+
+
+def update_root_update_block(block_id: str, client: NotionClient) -> str:
+    """
+    Rewrite an existing "Last updated" block in place. Returns the commit id.
+    """
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    commit_id = get_git_commit()
+
+    client.update_block(
+        block_id,
+        {"paragraph": {"rich_text": build_root_update_rich_text(now, commit_id)}},
+    )
+
+    print(f"[root] Updated 'Last updated' block on root page ({now}, commit {commit_id})")
+
+    return commit_id
+
+
+def start_export_journal(
+    journal_path: Path,
+    parent_page_id: str,
+    client: NotionClient,
+    resume: bool = False,
+    max_workers: int = DEFAULT_WORKERS,
+) -> ExportJournal:
+    """
+    Prepare the root page for a full export and return the journal to log it
+    in.
+
+    With `resume`, an unfinished journal for the same root page is reopened
+    and the root page is left as is, so the export continues where the
+    interrupted run stopped. Otherwise (or if there is nothing to resume) the
+    root page is cleared, a new journal is started and the "Last updated"
+    block is added.
+    """
+    parent_uuid = normalize_notion_id(parent_page_id)
+
+    journal = ExportJournal.load(journal_path) if resume else None
+    if journal is not None:
+        if journal.complete:
+            print("[resume] Previous export finished, nothing to resume.")
+            journal.close()
+            journal = None
+        elif journal.root_page_id != parent_uuid:
+            print("[resume] Journal belongs to another root page, ignoring it.")
+            journal.close()
+            journal = None
+    elif resume:
+        print(f"[resume] No journal at {journal_path}, running a full export.")
+
+    if journal is not None:
+        finished = sum(1 for entry in journal.pages.values() if entry["done"])
+        print(f"[resume] Resuming from {journal_path}: {finished} page(s) already exported.")
+    else:
+        clear_page_children(parent_uuid, client, max_workers=max_workers)
+        journal = ExportJournal.start(journal_path, parent_uuid)
+
+    if journal.root_block_id is None:
+        root_block = add_root_update_block(parent_uuid, client)
+        journal.record_root_block(root_block["block_id"], root_block["commit"])
+
+    return journal
+
+
+def finish_export_journal(journal: ExportJournal, counters: dict):
+    """
+    Mark the journal complete, unless some pages failed; those are retried
+    by the next --resume run.
+    """
+    if counters.get("failed"):
+        print(
+            f"[resume] {counters['failed']} page(s) failed, rerun with --resume "
+            f"to retry them from {journal.path}."
+        )
+        return
+    journal.mark_complete()
+
+
+def load_export_state(state_path: Path) -> dict | None:
+    """
+    Load the state written by a previous incremental export, or None if there
+    is no usable state file.
+    """
+    if not state_path.is_file():
+        return None
+
+    try:
+        with state_path.open("r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[incremental] Ignoring unreadable state file {state_path}: {e}")
+        return None
+
+    if state.get("version") != STATE_VERSION:
+        print(f"[incremental] Ignoring state file {state_path} with unknown version.")
+        return None
+
+    return state
+
+
+def export_state_is_live(state: dict, client: NotionClient) -> bool:
+    """
+    Check, with one listing of the root page, that the pages the state
+    records at the top of the export are still there. A full export, a
+    bundle replay or a manual clean-up archives them, and then none of the
+    recorded page ids can be trusted.
+    """
+    parent_uuid = state["root_page_id"]
+    content_root = state.get("content_root_id") or parent_uuid
+    if content_root != parent_uuid:
+        expected = {content_root}
+    else:
+        expected = {entry["id"] for entry in state.get("pages", {}).values() if entry["parent"] == ""}
+
+    try:
+        live = {
+            normalize_notion_id(block["id"])
+            for block in client.list_children(parent_uuid)
+            if not block.get("archived") and not block.get("in_trash")
+        }
+    except RuntimeError as e:
+        print(f"[incremental] Could not list the root page to check the state: {e}")
+        return False
+
+    missing = {normalize_notion_id(page_id) for page_id in expected} - live
+    if missing:
+        print(
+            f"[incremental] {len(missing)} top-level page(s) of the previous export are no "
+            "longer under the root page, ignoring the state."
+        )
+        return False
+    return True
+
+
+def forget_export_state(state_path: Path):
+    """
+    Delete the state of an export whose pages were replaced without
+    recording the new ones, so no later --incremental run trusts it.
+    """
+    try:
+        state_path.unlink()
+    except FileNotFoundError:
+        return
+    print(f"[incremental] Deleted {state_path}, the pages it records were replaced.")
+
+
+def build_export_state(
+    parent_uuid: str,
+    root_block_id: str | None,
+    commit_id: str | None,
+    pages: dict,
+    content_root: str,
+) -> dict:
+    """
+    The contents of the state file after an export of `pages` (see
+    build_export_state_pages()) under the root page `parent_uuid`, whose
+    top-level pages live under `content_root`.
+    """
+    return {
+        "version": STATE_VERSION,
+        "root_page_id": parent_uuid,
+        "root_block_id": root_block_id,
+        "commit": commit_id,
+        "pages": pages,
+        **({"content_root_id": content_root} if content_root != parent_uuid else {}),
+    }
+
+
+def save_export_state(state_path: Path, state: dict):
+    """
+    Atomically write the export state next to where it will be read back.
+    """
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = state_path.with_name(state_path.name + ".tmp")
+
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    os.replace(tmp_path, state_path)
+
+
+def build_export_state_pages(nav_nodes: list[dict], page_records: dict) -> dict:
+    """
+    Combine the navigation tree with the page ids known after an export into
+    the "pages" section of the state file:
+
+      key -> {"id", "parent", "index", "kind", "hash"[, "title"][, "blocks"]
+              [, "misplaced"]}
+
+    where "title" and "blocks" are the title and block signatures a
+    content page was last written with (see
+    update_notion_page_from_markdown()) and "misplaced" marks a page that
+    could not be moved to its position. Nodes without a recorded page
+    (failed creations) are left out along with their subtree, so the next
+    run creates them again.
+    """
+    pages: dict[str, dict] = {}
+
+    def walk(nodes: list[dict], parent_key: str):
+        for index, node in enumerate(nodes):
+            record = page_records.get(node["key"])
+            if not record:
+                continue
+
+            pages[node["key"]] = {
+                "id": record["id"],
+                "parent": parent_key,
+                "index": index,
+                "kind": node.get("kind"),
+                "hash": record.get("hash"),
+            }
+            if record.get("title") is not None:
+                pages[node["key"]]["title"] = record["title"]
+            if record.get("blocks") is not None:
+                pages[node["key"]]["blocks"] = record["blocks"]
+            if record.get("misplaced"):
+                pages[node["key"]]["misplaced"] = True
+            walk(node.get("children", []), node["key"])
+
+    walk(nav_nodes, "")
+    return pages
+
+
+def sync_nav_nodes_incremental(
+    nodes: list[dict],
+    root_dir: Path,
+    parent_page_id: str,
+    client: NotionClient,
+    previous_pages: dict,
+    page_records: dict,
+    counters: dict,
+    pending_tasks: list[dict],
+    parent_key: str = "",
+    current_group: str | None = None,
+    assets: AssetUploader | None = None,
+    changed_files: set[Path] | None = None,
+):
+    """
+    Bring the pages under `parent_page_id` in line with `nodes`, reusing the
+    pages recorded by the previous run.
+
+    The Notion API can only append child pages, so siblings are compared by
+    position: the longest run of nodes whose keys match the previous run's
+    children in order stays in place. After the first difference, pages
+    that are still in the group are moved to the end in their new order,
+    between the new pages created around them; link blocks cannot be
+    moved and are re-created, and the other old children are archived.
+    Kept content pages are only updated when their file hash changed, and
+    then only in the blocks that changed. With `changed_files` (watch
+    mode), kept pages whose file is not in it are not even read.
+
+    Pages that need creating or moving are not handled here: they are
+    appended to `pending_tasks` (see flatten_nav_nodes()) so that all of
+    them can run in one concurrent pass afterwards, in sibling order.
+    """
+    old_children = sorted(
+        (key for key, entry in previous_pages.items() if entry["parent"] == parent_key),
+        key=lambda key: previous_pages[key]["index"],
+    )
+
+    keep = 0
+    while (
+        keep < len(nodes)
+        and keep < len(old_children)
+        and nodes[keep]["key"] == old_children[keep]
+        # A page that became a link to a repeated entry (or the other way
+        # round) is a different kind of child: recreate it.
+        and nodes[keep].get("kind") == previous_pages[old_children[keep]].get("kind")
+        and not previous_pages[old_children[keep]].get("misplaced")
+    ):
+        keep += 1
+
+    old_tail = set(old_children[keep:])
+    moved = {
+        node["key"]: previous_pages[node["key"]]["id"]
+        for node in nodes[keep:]
+        if node["key"] in old_tail
+        and node.get("kind") != "link"
+        and node.get("kind") == previous_pages[node["key"]].get("kind")
+    }
+
+    for stale_key in old_children[keep:]:
+        if stale_key in moved:
+            continue
+        try:
+            if previous_pages[stale_key].get("kind") == "link":
+                client.archive_block(previous_pages[stale_key]["id"])
+            else:
+                client.archive_page(previous_pages[stale_key]["id"])
+        except Exception as e:
+            print(f"Error archiving stale page '{stale_key}': {e}")
+            continue
+        log(f"[archive] Archived '{stale_key}'")
+        counters["archived"] += 1
+
+    for node in nodes[:keep] + [node for node in nodes[keep:] if node["key"] in moved]:
+        entry = previous_pages[node["key"]]
+        file_path: Path | None = node.get("file")
+        title = node["title"]
+
+        next_group = current_group
+        if node.get("kind") == "group":
+            next_group = title
+
+        record = {"id": entry["id"], "hash": entry.get("hash")}
+        if entry.get("title") is not None:
+            record["title"] = entry["title"]
+        if entry.get("blocks") is not None:
+            record["blocks"] = entry["blocks"]
+
+        if (
+            file_path is not None
+            and changed_files is not None
+            and node.get("source") is None
+            and file_path.resolve() not in changed_files
+        ):
+            counters["unchanged"] += 1
+        elif file_path is not None:
+            source = node.get("source") or PageSource(file_path)
+            try:
+                with client.metrics.phase("read_files"):
+                    content_hash = page_content_hash(source, assets)
+            except OSError as e:
+                print(f"[warn] Could not read {file_path}, keeping previous page: {e}")
+                content_hash = entry.get("hash")
+
+            if content_hash == entry.get("hash"):
+                counters["unchanged"] += 1
+            else:
+                rel_display = file_path.relative_to(root_dir).as_posix()
+                try:
+                    record["blocks"] = update_notion_page_from_markdown(
+                        entry["id"],
+                        source,
+                        client,
+                        docs_url=build_docs_url(root_dir, file_path),
+                        assets=assets,
+                        previous_blocks=entry.get("blocks"),
+                        previous_title=entry.get("title"),
+                    )
+                except Exception as e:
+                    print(f"Error updating page for file '{file_path}': {e}")
+                    # The page may be half updated: rewrite it in full next time.
+                    record.pop("blocks", None)
+                else:
+                    record["hash"] = content_hash
+                    record["title"] = page_title(source)
+                    counters["updated"] += 1
+                    log(f"[file] Updated Notion page for '{rel_display}'")
+
+        page_records[node["key"]] = record
+
+        sync_nav_nodes_incremental(
+            node.get("children", []),
+            root_dir,
+            entry["id"],
+            client,
+            previous_pages,
+            page_records,
+            counters,
+            pending_tasks,
+            parent_key=node["key"],
+            current_group=next_group,
+            assets=assets,
+            changed_files=changed_files,
+        )
+
+    if nodes[keep:]:
+        flatten_nav_nodes(
+            nodes[keep:], parent_page_id, current_group, tasks=pending_tasks, existing=moved
+        )
+
+
+def relink_kept_links(nodes: list[dict], page_records: dict, client: NotionClient):
+    """
+    Point link blocks kept by an incremental sync at the current page of
+    their first appearance, which may have been re-created in this run.
+    """
+    for node in nodes:
+        record = page_records.get(node["key"])
+        if node.get("link_to") is not None and record:
+            target = page_records.get(node["link_to"])
+            if not target:
+                continue
+            link_hash = f"link:{normalize_notion_id(target['id'])}"
+            if record.get("hash") != link_hash:
+                try:
+                    client.update_block(
+                        record["id"], {"link_to_page": build_link_to_page_block(target["id"])["link_to_page"]}
+                    )
+                except Exception as e:
+                    print(f"Error updating link for '{node['title']}': {e}")
+                else:
+                    record["hash"] = link_hash
+                    log(f"[link] Updated link for repeated page '{node['title']}'")
+        relink_kept_links(node.get("children", []), page_records, client)
+
+
+def is_root_update_block(block: dict) -> bool:
+    """
+    Whether a root page child is the "Last updated" paragraph.
+    """
+    if block.get("type") != "paragraph":
+        return False
+    rich_text = block.get("paragraph", {}).get("rich_text", [])
+    text = "".join(item.get("text", {}).get("content", "") for item in rich_text)
+    return text.startswith("Last updated:")
+
+
+def archive_blocks(blocks: list[dict], client: NotionClient, max_workers: int = DEFAULT_WORKERS):
+    """
+    Archive blocks/pages returned by list_children() on a thread pool.
+    Returns the number that could not be archived.
+    """
+    def archive(block: dict) -> bool:
+        try:
+            client.archive(block)
+        except Exception as e:
+            print(f"[blue-green]   Failed to archive {block['id']}: {e}")
+            return False
+        return True
+
+    if not blocks:
+        return 0
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, max_workers), initializer=inherit_log_prefix()
+    ) as executor:
+        return sum(1 for ok in executor.map(archive, blocks) if not ok)
+
+
+def export_blue_green(
+    nav_nodes: list[dict],
+    root_dir: Path,
+    parent_page_id: str,
+    client: NotionClient,
+    counters: dict,
+    page_records: dict,
+    staging_parent_id: str | None = None,
+    max_workers: int = DEFAULT_WORKERS,
+    assets: AssetUploader | None = None,
+) -> dict:
+    """
+    Build the whole tree under a staging page, then swap it in.
+
+    The staging page is created under `staging_parent_id`, which must be a
+    page outside the root page so readers never see the half-built tree.
+    Only once every page exists are the new top-level pages moved under the
+    root page; the previous tree is then archived and the "Last updated"
+    block rewritten. Readers see the old tree until the move and the new one
+    right after. If the build fails, the staging page is archived and the
+    root page is left exactly as it was. If a move fails, the pages already
+    moved are moved back under the staging page first, so the root page
+    again shows only the old tree.
+
+    Returns {"root_block_id", "commit", "content_root_id"}, where
+    content_root_id is the page the top-level pages now live under.
+    """
+    parent_uuid = normalize_notion_id(parent_page_id)
+    if not staging_parent_id:
+        raise ValueError(
+            "Blue/green exports need a staging page outside the root page "
+            "(--staging-page or $NOTION_STAGING_PAGE)"
+        )
+    staging_parent = normalize_notion_id(staging_parent_id)
+    if staging_parent == parent_uuid:
+        raise ValueError("The staging page must not be the root page itself")
+
+    leftovers = [
+        block
+        for block in client.list_children(staging_parent)
+        if block.get("type") == "child_page"
+        and block.get("child_page", {}).get("title") == STAGING_PAGE_TITLE
+    ]
+    if leftovers:
+        print(f"[blue-green] Archiving {len(leftovers)} staging page(s) left by a failed run.")
+        archive_blocks(leftovers, client, max_workers)
+
+    staging_id = client.create_page(staging_parent, STAGING_PAGE_TITLE)["id"]
+    print(f"[blue-green] Building the new tree under staging page {staging_id}")
+
+    try:
+        process_nav_nodes(
+            nav_nodes,
+            root_dir,
+            staging_id,
+            client,
+            counters,
+            current_group=None,
+            page_records=page_records,
+            max_workers=max_workers,
+            assets=assets,
+        )
+        if counters.get("failed"):
+            raise RuntimeError(f"{counters['failed']} page(s) could not be created")
+    except Exception:
+        print("[blue-green] Export failed, leaving the published tree untouched.")
+        try:
+            client.archive_page(staging_id)
+        except Exception as e:
+            print(f"[blue-green] Could not archive staging page {staging_id}: {e}")
+        raise
+
+    old_children = [
+        block for block in client.list_children(parent_uuid) if block["id"] != staging_id
+    ]
+    root_block = next((block for block in old_children if is_root_update_block(block)), None)
+    stale = [block for block in old_children if block is not root_block]
+
+    top_level_ids = [
+        page_records[node["key"]]["id"] for node in nav_nodes if node["key"] in page_records
+    ]
+
+    started = time.monotonic()
+    moved: list[str] = []
+    try:
+        with client.metrics.phase("swap"):
+            for page_id in top_level_ids:
+                client.move_page(page_id, parent_uuid)
+                moved.append(page_id)
+    except RuntimeError as e:
+        print(f"[blue-green] Swap failed after {len(moved)} page(s) ({e}), moving them back.")
+        if not unmove_pages(moved, staging_id, client):
+            raise RuntimeError(
+                f"Could not move the new tree under the root page ({e}), nor move "
+                f"every page back; the staging page {staging_id} holds the rest."
+            ) from e
+        try:
+            client.archive_page(staging_id)
+        except Exception as archive_error:
+            print(f"[blue-green] Could not archive staging page {staging_id}: {archive_error}")
+        raise RuntimeError(
+            f"Could not move the new tree under the root page ({e}); the published "
+            "tree was left untouched."
+        ) from e
+
+    print(
+        f"[blue-green] Swapped in {len(top_level_ids)} top-level page(s) in "
+        f"{time.monotonic() - started:.1f}s; archiving {len(stale)} old block(s)/page(s)."
+    )
+
+    stale.append({"id": staging_id, "type": "child_page"})
+    with client.metrics.phase("archive_old"):
+        failed = archive_blocks(stale, client, max_workers)
+    if failed:
+        print(f"[blue-green] {failed} old block(s)/page(s) could not be archived.")
+
+    if root_block is not None:
+        try:
+            commit_id = update_root_update_block(root_block["id"], client)
+            root_block_id = root_block["id"]
+        except Exception as e:
+            print(f"[root] Could not update block in place ({e}), appending a new one.")
+            root_block = None
+    if root_block is None:
+        added = add_root_update_block(parent_uuid, client)
+        root_block_id = added["block_id"]
+        commit_id = added["commit"]
+
+    return {"root_block_id": root_block_id, "commit": commit_id, "content_root_id": parent_uuid}
+
+
+def unmove_pages(page_ids: list[str], staging_id: str, client: NotionClient) -> bool:
+    """
+    Move pages a failed swap already published back under the staging page,
+    last moved first. Returns whether all of them were moved back.
+    """
+    ok = True
+    for page_id in reversed(page_ids):
+        try:
+            client.move_page(page_id, staging_id)
+        except RuntimeError as e:
+            print(f"[blue-green] Could not move page {page_id} back to staging: {e}")
+            ok = False
+    return ok
+
+
+def process_directory_blue_green(
+    root_dir: Path,
+    parent_page_id: str,
+    client: NotionClient,
+    state_path: Path,
+    max_workers: int = DEFAULT_WORKERS,
+    staging_parent_id: str | None = None,
+    nav_nodes: list[dict] | None = None,
+    assets: AssetUploader | None = None,
+):
+    """
+    Full directory export through export_blue_green(), without the window
+    where the root page is empty or half-filled. The state of the new tree
+    is written to `state_path` for later --incremental runs.
+    """
+    root_dir = root_dir.resolve()
+    parent_uuid = normalize_notion_id(parent_page_id)
+    if nav_nodes is None:
+        nav_nodes = load_nav_nodes(root_dir, client.metrics)
+
+    counters = {"total_pages": 0, "groups": {}}
+    page_records: dict[str, dict] = {}
+    swapped = export_blue_green(
+        nav_nodes,
+        root_dir,
+        parent_uuid,
+        client,
+        counters,
+        page_records,
+        staging_parent_id=staging_parent_id,
+        max_workers=max_workers,
+        assets=assets,
+    )
+    save_export_state(
+        state_path,
+        build_export_state(
+            parent_uuid,
+            swapped["root_block_id"],
+            swapped["commit"],
+            build_export_state_pages(nav_nodes, page_records),
+            swapped["content_root_id"],
+        ),
+    )
+
+    print_export_stats(counters)
+    return counters
+
+
+def process_directory_incremental(
+    root_dir: Path,
+    parent_page_id: str,
+    client: NotionClient,
+    state_path: Path,
+    max_workers: int = DEFAULT_WORKERS,
+    journal_path: Path | None = None,
+    resume: bool = False,
+    blue_green: bool = False,
+    staging_parent_id: str | None = None,
+    nav_nodes: list[dict] | None = None,
+    assets: AssetUploader | None = None,
+):
+    """
+    Export the docs tree, only touching pages that changed since the run that
+    wrote `state_path`. Without a usable state file this falls back to a full
+    clear + rebuild, and records the state for the next run. That full export
+    is journaled to `journal_path` (if given) and can be resumed, or with
+    `blue_green` goes through export_blue_green() instead.
+    """
+    root_dir = root_dir.resolve()
+    parent_uuid = normalize_notion_id(parent_page_id)
+
+    state = load_export_state(state_path)
+    if state is not None and state.get("root_page_id") != parent_uuid:
+        print("[incremental] State file belongs to another root page, ignoring it.")
+        state = None
+    if state is not None and not export_state_is_live(state, client):
+        state = None
+
+    if nav_nodes is None:
+        nav_nodes = load_nav_nodes(root_dir, client.metrics)
+
+    counters = {
+        "total_pages": 0,
+        "groups": {},
+        "updated": 0,
+        "unchanged": 0,
+        "archived": 0,
+    }
+    page_records: dict[str, dict] = {}
+    content_root = parent_uuid
+
+    if state is None and blue_green:
+        print("[incremental] No previous export state, running a blue/green full export.")
+        swapped = export_blue_green(
+            nav_nodes,
+            root_dir,
+            parent_uuid,
+            client,
+            counters,
+            page_records,
+            staging_parent_id=staging_parent_id,
+            max_workers=max_workers,
+            assets=assets,
+        )
+        root_block_id = swapped["root_block_id"]
+        commit_id = swapped["commit"]
+        content_root = swapped["content_root_id"]
+        pages = build_export_state_pages(nav_nodes, page_records)
+    elif state is None:
+        print("[incremental] No previous export state, running a full export.")
+        journal = None
+        if journal_path is not None:
+            journal = start_export_journal(
+                journal_path, parent_uuid, client, resume=resume, max_workers=max_workers
+            )
+            root_block_id = journal.root_block_id
+            commit_id = journal.root_commit
+        else:
+            clear_page_children(parent_uuid, client, max_workers=max_workers)
+            root_block = add_root_update_block(parent_uuid, client)
+            root_block_id = root_block["block_id"]
+            commit_id = root_block["commit"]
+
+        try:
+            process_nav_nodes(
+                nav_nodes,
+                root_dir,
+                parent_uuid,
+                client,
+                counters,
+                current_group=None,
+                page_records=page_records,
+                max_workers=max_workers,
+                journal=journal,
+                assets=assets,
+            )
+            if journal is not None:
+                finish_export_journal(journal, counters)
+        finally:
+            if journal is not None:
+                journal.close()
+
+        pages = build_export_state_pages(nav_nodes, page_records)
+    else:
+        state = sync_export_state(
+            nav_nodes,
+            root_dir,
+            client,
+            state,
+            counters,
+            max_workers=max_workers,
+            assets=assets,
+        )
+        save_export_state(state_path, state)
+        print_export_stats(counters)
+        return counters
+
+    save_export_state(
+        state_path,
+        build_export_state(parent_uuid, root_block_id, commit_id, pages, content_root),
+    )
+
+    print_export_stats(counters)
+
+    return counters
+
+
+def sync_export_state(
+    nav_nodes: list[dict],
+    root_dir: Path,
+    client: NotionClient,
+    state: dict,
+    counters: dict,
+    max_workers: int = DEFAULT_WORKERS,
+    assets: AssetUploader | None = None,
+    changed_files: set[Path] | None = None,
+) -> dict:
+    """
+    Bring an existing export, described by `state`, in line with
+    `nav_nodes`: sync the kept pages, create the new ones, re-point links
+    and refresh the root update block if anything changed. Returns the new
+    state; `state` itself is not modified.
+    """
+    parent_uuid = state["root_page_id"]
+    content_root = state.get("content_root_id") or parent_uuid
+    page_records: dict[str, dict] = {}
+    pending_tasks: list[dict] = []
+
+    with client.metrics.phase("sync"):
+        sync_nav_nodes_incremental(
+            nav_nodes,
+            root_dir,
+            content_root,
+            client,
+            state.get("pages", {}),
+            page_records,
+            counters,
+            pending_tasks,
+            assets=assets,
+            changed_files=changed_files,
+        )
+    run_nav_tasks(
+        pending_tasks,
+        root_dir,
+        client,
+        counters,
+        page_records=page_records,
+        max_workers=max_workers,
+        assets=assets,
+    )
+    relink_kept_links(nav_nodes, page_records, client)
+    pages = build_export_state_pages(nav_nodes, page_records)
+
+    root_block_id = state.get("root_block_id")
+    commit_id = state.get("commit")
+
+    if pages != state.get("pages") or get_git_commit() != commit_id:
+        try:
+            if not root_block_id:
+                raise RuntimeError("no root update block recorded")
+            commit_id = update_root_update_block(root_block_id, client)
+        except Exception as e:
+            print(f"[root] Could not update block in place ({e}), appending a new one.")
+            root_block = add_root_update_block(parent_uuid, client)
+            root_block_id = root_block["block_id"]
+            commit_id = root_block["commit"]
+    else:
+        print("[root] No changes since the last export, leaving root page as is.")
+
+    return build_export_state(parent_uuid, root_block_id, commit_id, pages, content_root)
+
+
+def nav_page_files(nodes: list[dict]) -> set[Path]:
+    """
+    Resolved paths of the files behind the file-backed pages of `nodes`.
+    """
+    files: set[Path] = set()
+    for node in nodes:
+        if node.get("file") is not None and node.get("source") is None:
+            files.add(Path(node["file"]).resolve())
+        files |= nav_page_files(node.get("children", []))
+    return files
+
+
+def watch_directory(
+    root_dir: Path,
+    client: NotionClient,
+    state_path: Path,
+    nav_nodes: list[dict],
+    max_workers: int = DEFAULT_WORKERS,
+    assets: AssetUploader | None = None,
+    interval: float = DEFAULT_POLL_INTERVAL,
+    debounce: float = DEFAULT_DEBOUNCE,
+    stop: threading.Event | None = None,
+):
+    """
+    Keep the export of `root_dir` in line with the files on disk until
+    interrupted (or `stop` is set).
+
+    Starts from the state an incremental export wrote to `state_path`; from
+    then on the state (slug -> Notion page id) and `nav_nodes` stay in
+    memory. Each debounced batch of changes (see watch.TreeWatcher) is
+    pushed with sync_export_state():
+
+      - edited pages are rewritten in place, and no other page is read;
+      - a change to docs.json or to a spec file, or a page file appearing
+        or disappearing, reloads the navigation, so the sections whose
+        children changed are rebuilt and the rest is kept;
+      - a changed image re-hashes every page, updating those that show it.
+
+    The state file is rewritten after every batch, so a later --incremental
+    run continues from where watching stopped.
+    """
+    root_dir = root_dir.resolve()
+    state = load_export_state(state_path)
+    if state is None:
+        raise RuntimeError(f"No export state to watch from in {state_path}")
+
+    watcher = TreeWatcher(root_dir, interval=interval, debounce=debounce)
+    print(
+        f"[watch] Watching {root_dir} (polling every {interval:g}s, {debounce:g}s debounce). "
+        "Press Ctrl-C to stop."
+    )
+
+    try:
+        while True:
+            changed = watcher.wait_for_changes(stop)
+            if changed is None:
+                return
+            started = time.time()
+            changed = {path.resolve() for path in changed}
+
+            names = sorted(path.relative_to(root_dir).as_posix() for path in changed)
+            more = f" and {len(names) - 5} more" if len(names) > 5 else ""
+            print(f"[watch] {len(names)} file(s) changed: {', '.join(names[:5])}{more}")
+
+            page_files = nav_page_files(nav_nodes)
+            reload_nav = False
+            rehash_all = False
+            for path in changed:
+                suffix = path.suffix.lower()
+                # docs.json and the OpenAPI specs it points at.
+                if suffix in (".json", ".yml", ".yaml"):
+                    reload_nav = True
+                elif suffix in PAGE_SUFFIXES:
+                    # A page file appearing or disappearing can change what
+                    # the docs.json slugs resolve to.
+                    if (path in page_files) != path.is_file():
+                        reload_nav = True
+                elif suffix in IMAGE_CONTENT_TYPES and assets is not None:
+                    rehash_all = True
+
+            if not (reload_nav or rehash_all or changed & page_files):
+                log("[watch] No exported page affected.")
+                continue
+
+            if assets is not None:
+                assets.forget(changed)
+
+            counters = {
+                "total_pages": 0,
+                "groups": {},
+                "updated": 0,
+                "unchanged": 0,
+                "archived": 0,
+            }
+            try:
+                if reload_nav:
+                    nav_nodes = load_nav_nodes(root_dir, client.metrics)
+                state = sync_export_state(
+                    nav_nodes,
+                    root_dir,
+                    client,
+                    state,
+                    counters,
+                    max_workers=max_workers,
+                    assets=assets,
+                    changed_files=None if rehash_all else changed,
+                )
+                save_export_state(state_path, state)
+            except Exception as e:
+                print(f"[watch] Sync failed, waiting for the next change: {e}")
+                continue
+
+            print(
+                f"[watch] Synced in {time.time() - started:.1f}s: {counters['total_pages']} page(s) "
+                f"created, {counters['updated']} updated, {counters['archived']} archived"
+                + (f", {counters['failed']} failed" if counters.get("failed") else "")
+            )
+    except KeyboardInterrupt:
+        print("\n[watch] Stopped.")
+
+
+def prepare_sharded_export(
+    root_dir: Path,
+    parent_page_id: str,
+    client: NotionClient,
+    shard_count: int,
+    plan_path: Path,
+    max_workers: int = DEFAULT_WORKERS,
+    nav_nodes: list[dict] | None = None,
+):
+    """
+    First step of a sharded export: clear the root page, add a placeholder
+    for the "Last updated" block, create the section page of every unit
+    (see shard_units()) in navigation order, and write the plan the shards
+    and the merge step read:
+
+      {"root_page_id", "root_block_id", "commit", "shard_count",
+       "sections": {node key: page id}, "shards": [[unit node key, ...], ...]}
+    """
+    root_dir = root_dir.resolve()
+    parent_uuid = normalize_notion_id(parent_page_id)
+
+    if nav_nodes is None:
+        nav_nodes = load_nav_nodes(root_dir, client.metrics)
+    if not nav_nodes:
+        raise RuntimeError(f"No usable navigation entries found in {DOCS_JSON_NAME} under {root_dir}")
+
+    shards = partition_nav_nodes(nav_nodes, shard_count)
+
+    clear_page_children(parent_uuid, client, max_workers=max_workers)
+    placeholder = {
+        "object": "block",
+        "type": "paragraph",
+        "paragraph": {
+            "rich_text": [
+                {"type": "text", "text": {"content": f"Export in progress ({shard_count} shard(s))"}}
+            ]
+        },
+    }
+    try:
+        root_block_id = client.append_children(parent_uuid, [placeholder])[-1]["id"]
+    except RuntimeError as e:
+        raise RuntimeError(f"Failed to insert root update block: {e}") from e
+
+    sections: dict[str, str] = {}
+    for node, parent_key in section_nodes(shards, nav_nodes):
+        parent_id = parent_uuid if parent_key is None else sections[parent_key]
+        sections[node["key"]] = create_simple_notion_page(node["title"], parent_id, client)["id"]
+        log(f"[section] Created Notion page for section '{node['title']}' (kind={node.get('kind')})")
+
+    for index, units in enumerate(shards):
+        print(
+            f"[shard] Shard {index}: {len(units)} unit(s), {sum(unit['pages'] for unit in units)} "
+            f"page(s), {sum(unit['bytes'] for unit in units)} bytes"
+        )
+
+    save_shard_file(
+        plan_path,
+        {
+            "root_page_id": parent_uuid,
+            "root_block_id": root_block_id,
+            "commit": get_git_commit(),
+            "shard_count": shard_count,
+            "sections": sections,
+            "shards": [[unit["node"]["key"] for unit in units] for units in shards],
+        },
+    )
+    print(f"[shard] Created {len(sections)} section page(s), wrote the shard plan to {plan_path}")
+
+
+def load_shard_plan(
+    plan_path: Path,
+    parent_uuid: str,
+    nav_nodes: list[dict],
+    shard_count: int | None = None,
+) -> dict:
+    """
+    Read the plan written by prepare_sharded_export() and check that it
+    belongs to this root page and matches the partition of `nav_nodes`
+    (i.e. the jobs were run on the same docs tree).
+    """
+    plan = load_shard_file(plan_path, "shard plan")
+    if plan.get("root_page_id") != parent_uuid:
+        raise RuntimeError(f"Shard plan {plan_path} belongs to another root page")
+    if shard_count is not None and plan["shard_count"] != shard_count:
+        raise RuntimeError(
+            f"Shard plan {plan_path} was prepared for {plan['shard_count']} shard(s), not {shard_count}"
+        )
+
+    shards = partition_nav_nodes(nav_nodes, plan["shard_count"])
+    if [[unit["node"]["key"] for unit in units] for units in shards] != plan["shards"]:
+        raise RuntimeError(
+            f"The docs tree differs from the one shard plan {plan_path} was prepared from; "
+            "run every step of a sharded export on the same commit"
+        )
+    return plan
+
+
+def export_shard(
+    root_dir: Path,
+    parent_page_id: str,
+    client: NotionClient,
+    shard_index: int,
+    shard_count: int,
+    shard_dir: Path,
+    max_workers: int = DEFAULT_WORKERS,
+    nav_nodes: list[dict] | None = None,
+    assets: AssetUploader | None = None,
+):
+    """
+    Export one shard of a prepared sharded export and write its result
+    (created pages, counters, deferred links) for the merge step. The
+    shard's section pages are cleared first, so a failed shard can simply
+    be run again.
+    """
+    root_dir = root_dir.resolve()
+    parent_uuid = normalize_notion_id(parent_page_id)
 
-    headers = {
-        "Authorization": f"Bearer {notion_token}",
-        "Notion-Version": NOTION_VERSION,
-        "Content-Type": "application/json",
-    }
+    if nav_nodes is None:
+        nav_nodes = load_nav_nodes(root_dir, client.metrics)
+    plan_path = shard_dir / SHARD_PLAN_NAME
+    plan = load_shard_plan(plan_path, parent_uuid, nav_nodes, shard_count)
+
+    units = plan["shards"][shard_index]
+    for key in units:
+        clear_page_children(plan["sections"][key], client, max_workers=max_workers)
+
+    page_records: dict[str, dict] = {}
+    deferred_links: list[dict] = []
+    counters = process_directory_with_docs_json(
+        root_dir,
+        parent_uuid,
+        client,
+        max_workers=max_workers,
+        nav_nodes=nav_nodes,
+        assets=assets,
+        shard_index=shard_index,
+        shard_count=shard_count,
+        sections=plan["sections"],
+        page_records=page_records,
+        deferred_links=deferred_links,
+    )
 
-    resp = requests.patch(
-        f"{NOTION_BLOCKS_API_URL}/{parent_uuid}/children",
-        headers=headers,
-        json=block,
+    result_path = shard_result_path(shard_dir, shard_index)
+    save_shard_file(
+        result_path,
+        {
+            "root_block_id": plan["root_block_id"],
+            "shard_index": shard_index,
+            "shard_count": shard_count,
+            "units": units,
+            "counters": counters,
+            "pages": page_records,
+            "deferred_links": deferred_links,
+        },
     )
+    print(f"[shard] Wrote the result of shard {shard_index} to {result_path}")
+    if counters.get("failed"):
+        print(f"[shard] {counters['failed']} page(s) failed, rerun shard {shard_index} before merging.")
+
+    return counters
+
+
+def merge_sharded_export(
+    root_dir: Path,
+    parent_page_id: str,
+    client: NotionClient,
+    shard_dir: Path,
+    state_path: Path,
+    nav_nodes: list[dict] | None = None,
+):
+    """
+    Last step of a sharded export: check that every shard of the plan
+    finished without failures, replace the placeholders of links between
+    shards with the links, write the "Last updated" block and save the
+    export state, so the next --incremental run picks up from the sharded
+    export.
+    """
+    root_dir = root_dir.resolve()
+    parent_uuid = normalize_notion_id(parent_page_id)
 
-    if not resp.ok:
+    if nav_nodes is None:
+        nav_nodes = load_nav_nodes(root_dir, client.metrics)
+    plan_path = shard_dir / SHARD_PLAN_NAME
+    plan = load_shard_plan(plan_path, parent_uuid, nav_nodes)
+    shard_count = plan["shard_count"]
+
+    results = []
+    problems = []
+    for index in range(shard_count):
+        try:
+            result = load_shard_file(shard_result_path(shard_dir, index), "shard result")
+        except RuntimeError as e:
+            problems.append(str(e))
+            continue
+        if result.get("root_block_id") != plan["root_block_id"] or result.get("shard_index") != index:
+            problems.append(f"Result of shard {index} belongs to another sharded export")
+        elif result["counters"].get("failed"):
+            problems.append(f"Shard {index} has {result['counters']['failed']} failed page(s)")
+        else:
+            results.append(result)
+
+    if problems:
+        for problem in problems:
+            print(f"[shard] {problem}")
         raise RuntimeError(
-            f"Failed to insert root update block: {resp.status_code} {resp.text}"
+            f"{len(problems)} of {shard_count} shard(s) did not finish, rerun them before merging"
         )
 
-    print(f"[root] Added 'Last updated' block to root page ({now}, commit {commit_id})")
+    counters = {"total_pages": 0, "groups": {}, "linked": 0}
+    page_records = {key: {"id": page_id, "hash": None} for key, page_id in plan["sections"].items()}
+    for result in results:
+        page_records.update(result["pages"])
+        counters["total_pages"] += result["counters"]["total_pages"]
+        counters["linked"] += result["counters"].get("linked", 0)
+        for group, count in result["counters"]["groups"].items():
+            counters["groups"][group] = counters["groups"].get(group, 0) + count
+
+    for link in (link for result in results for link in result["deferred_links"]):
+        target_id = page_records.get(link["link_to"], {}).get("id")
+        try:
+            if not target_id:
+                raise RuntimeError("its first appearance has no page")
+            block = client.append_children(
+                link["parent"], [build_link_to_page_block(target_id)], after=link["placeholder"]
+            )[0]
+            client.archive_block(link["placeholder"])
+        except Exception as e:
+            print(f"Error linking repeated page '{link['key']}': {e}")
+            counters["failed"] = counters.get("failed", 0) + 1
+            continue
+        page_records[link["key"]] = {"id": block["id"], "hash": f"link:{normalize_notion_id(target_id)}"}
+        counters["linked"] += 1
+
+    commit_id = update_root_update_block(plan["root_block_id"], client)
+    save_export_state(
+        state_path,
+        build_export_state(
+            parent_uuid,
+            plan["root_block_id"],
+            commit_id,
+            build_export_state_pages(nav_nodes, page_records),
+            parent_uuid,
+        ),
+    )
+    print(f"[shard] Merged {shard_count} shard(s), wrote the export state to {state_path}")
 
+    print_export_stats(counters)
 
-def main():
-    if len(sys.argv) < 2:
-        print(
-            textwrap.dedent(
-                f"""
-                Usage:
-                  python import.py
+    return counters
+
+
+def run_export(
+    markdown_path: Path,
+    parent_page_id: str,
+    client: NotionClient,
+    args: argparse.Namespace,
+    nav_nodes: list[dict] | None = None,
+):
+    """
+    Run the export selected by the command-line arguments, exiting with
+    status 1 on failure. Directory exports reuse `nav_nodes` when given.
+    """
+    assets = None
+    if not args.no_images:
+        report_dir = markdown_path if markdown_path.is_dir() else markdown_path.parent
+        assets = AssetUploader(
+            client,
+            report_dir,
+            Path(args.assets_file) if args.assets_file else report_dir / ASSETS_FILE_NAME,
+        )
+
+    try:
+        run_selected_export(markdown_path, parent_page_id, client, args, nav_nodes, assets)
+    finally:
+        if assets is not None:
+            assets.close()
+            assets.print_stats()
+
+
+def run_selected_export(
+    markdown_path: Path,
+    parent_page_id: str,
+    client: NotionClient,
+    args: argparse.Namespace,
+    nav_nodes: list[dict] | None,
+    assets: AssetUploader | None,
+):
+    journal_path = Path(args.journal) if args.journal else markdown_path / JOURNAL_FILE_NAME
+    report_dir = markdown_path if markdown_path.is_dir() else markdown_path.parent
+    state_path = Path(args.state_file) if args.state_file else report_dir / STATE_FILE_NAME
+
+    if args.prepare_shards or args.shard_index is not None or args.merge_shards:
+        shard_dir = Path(args.shard_dir) if args.shard_dir else markdown_path / SHARDS_DIR_NAME
+        try:
+            if args.prepare_shards:
+                prepare_sharded_export(
+                    markdown_path,
+                    parent_page_id,
+                    client,
+                    args.shard_count,
+                    shard_dir / SHARD_PLAN_NAME,
+                    max_workers=args.workers,
+                    nav_nodes=nav_nodes,
+                )
+                # --merge-shards writes the state of the new tree.
+                forget_export_state(state_path)
+            elif args.shard_index is not None:
+                export_shard(
+                    markdown_path,
+                    parent_page_id,
+                    client,
+                    args.shard_index,
+                    args.shard_count,
+                    shard_dir,
+                    max_workers=args.workers,
+                    nav_nodes=nav_nodes,
+                    assets=assets,
+                )
+            else:
+                merge_sharded_export(
+                    markdown_path,
+                    parent_page_id,
+                    client,
+                    shard_dir,
+                    state_path,
+                    nav_nodes=nav_nodes,
+                )
+        except Exception as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        return
+
+    if args.incremental and markdown_path.is_dir():
+        try:
+            if args.watch and nav_nodes is None:
+                nav_nodes = load_nav_nodes(markdown_path.resolve(), client.metrics)
+            process_directory_incremental(
+                markdown_path,
+                parent_page_id,
+                client,
+                state_path,
+                max_workers=args.workers,
+                journal_path=journal_path,
+                resume=args.resume,
+                blue_green=args.blue_green,
+                staging_parent_id=args.staging_page,
+                nav_nodes=nav_nodes,
+                assets=assets,
+            )
+            if args.watch:
+                watch_directory(
+                    markdown_path,
+                    client,
+                    state_path,
+                    nav_nodes,
+                    max_workers=args.workers,
+                    assets=assets,
+                    interval=args.poll_interval,
+                    debounce=args.debounce,
+                )
+        except Exception as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        return
+
+    if args.incremental:
+        print("[incremental] Single files are always exported in full.")
+
+    if args.blue_green and markdown_path.is_dir():
+        try:
+            process_directory_blue_green(
+                markdown_path,
+                parent_page_id,
+                client,
+                state_path,
+                max_workers=args.workers,
+                staging_parent_id=args.staging_page,
+                nav_nodes=nav_nodes,
+                assets=assets,
+            )
+        except Exception as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        return
+
+    if args.blue_green:
+        print("[blue-green] Single files are always exported in place.")
+
+    if markdown_path.is_dir():
+        journal = None
+        try:
+            # The root page is cleared: the previous state is wrong from here
+            # on, and is replaced by the new tree's once it exists.
+            forget_export_state(state_path)
+            if nav_nodes is None:
+                nav_nodes = load_nav_nodes(markdown_path.resolve(), client.metrics)
+            journal = start_export_journal(
+                journal_path,
+                parent_page_id,
+                client,
+                resume=args.resume,
+                max_workers=args.workers,
+            )
+            page_records: dict[str, dict] = {}
+            counters = process_directory_with_docs_json(
+                markdown_path,
+                parent_page_id,
+                client,
+                max_workers=args.workers,
+                journal=journal,
+                nav_nodes=nav_nodes,
+                page_records=page_records,
+                assets=assets,
+            )
+            finish_export_journal(journal, counters)
+            parent_uuid = normalize_notion_id(parent_page_id)
+            save_export_state(
+                state_path,
+                build_export_state(
+                    parent_uuid,
+                    journal.root_block_id,
+                    journal.root_commit,
+                    build_export_state_pages(nav_nodes, page_records),
+                    parent_uuid,
+                ),
+            )
+        except Exception as e:
+            print(f"Error: {e}")
+            if journal is not None:
+                print(f"[resume] Rerun with --resume to continue from {journal_path}.")
+            sys.exit(1)
+        finally:
+            if journal is not None:
+                journal.close()
+        return
+
+    if args.resume:
+        print("[resume] Single files are always exported in full.")
+
+    forget_export_state(state_path)
+
+    try:
+        clear_page_children(parent_page_id, client, max_workers=args.workers)
+    except Exception as e:
+        print(f"Error clearing existing content under parent page: {e}")
+        sys.exit(1)
+
+    try:
+        add_root_update_block(parent_page_id, client)
+    except Exception as e:
+        print(f"Error updating root page: {e}")
+        sys.exit(1)
+
+    if markdown_path.is_file():
+        root_dir = markdown_path.parent.resolve()
+        docs_url = build_docs_url(root_dir, markdown_path.resolve())
+
+        try:
+            page = create_notion_page_from_markdown(
+                markdown_path,
+                parent_page_id,
+                client,
+                docs_url=docs_url,
+                assets=assets,
+            )
+            url = page.get("url", "(no url in response)")
+            print(f"Notion page created successfully: {url}")
+            print("[stats] Total content pages created: 1")
+        except Exception as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    else:
+        print(f"Error: Path not found: {markdown_path}")
+        sys.exit(1)
 
-                Args:
-                  markdown_path          Path to a directory (with {DOCS_JSON_NAME}) or single .md/.mdx file
 
+def finish_client(client: NotionClient, metrics_path: Path, prometheus_path: Path | None):
+    """
+    Print the client's request statistics and metrics summary, close it and
+    write the metrics reports.
+    """
+    client.print_stats()
+    client.metrics.print_summary()
+    client.close()
+
+    client.metrics.write_json(metrics_path)
+    print(f"[metrics] Wrote {metrics_path}")
+    if prometheus_path:
+        client.metrics.write_prometheus(prometheus_path)
+        print(f"[metrics] Wrote {prometheus_path}")
+
+
+def target_file_path(explicit: str | None, default_name: str, target: str, report_dir: Path) -> Path:
+    """
+    Path of a per-target file: `explicit` with {target} filled in, or
+    <report_dir>/.notion-export/targets/<target>/<file name of default_name>.
+    """
+    if explicit is None:
+        return report_dir / TARGETS_DIR_NAME / target / Path(default_name).name
+    if "{target}" not in explicit:
+        raise ValueError(
+            f"'{explicit}' would be shared by all targets; include {{target}} in the path"
+        )
+    return Path(explicit.replace("{target}", target))
+
+
+def export_to_targets(markdown_path: Path, targets: list[dict], args: argparse.Namespace):
+    """
+    Export the docs to several Notion root pages at once.
+
+    docs.json and the docs tree are parsed once and every page is read from
+    disk once; each target then runs the export selected by `args` in its own
+    thread, with its own client (and so its own rate limiter, retries and
+    metrics) and its own state, journal, image cache and metrics files. A
+    failing target does not stop the others. Exits with status 1 if any
+    target failed.
+    """
+    report_dir = markdown_path if markdown_path.is_dir() else markdown_path.parent
+    base_url = os.environ.get("NOTION_API_BASE_URL") or NOTION_API_BASE_URL
+
+    runs = []
+    try:
+        for target in targets:
+            name = target["name"]
+            target_args = argparse.Namespace(**vars(args))
+            target_args.staging_page = target.get("staging_page") or args.staging_page
+            if args.blue_green and not target_args.staging_page:
+                raise ValueError(
+                    f"Target '{name}' has no staging_page and --staging-page is not set"
+                )
+            target_args.state_file = str(
+                target_file_path(args.state_file, STATE_FILE_NAME, name, report_dir)
+            )
+            target_args.journal = str(
+                target_file_path(args.journal, JOURNAL_FILE_NAME, name, report_dir)
+            )
+            target_args.assets_file = str(
+                target_file_path(args.assets_file, ASSETS_FILE_NAME, name, report_dir)
+            )
+            metrics_path = target_file_path(args.metrics_file, METRICS_FILE_NAME, name, report_dir)
+            prometheus_path = (
+                target_file_path(args.prometheus_file, "metrics.prom", name, report_dir)
+                if args.prometheus_file
+                else None
+            )
+            runs.append((target, target_args, metrics_path, prometheus_path))
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    parse_metrics = ExportMetrics()
+    nav_nodes = None
+    if markdown_path.is_dir():
+        try:
+            nav_nodes = load_nav_nodes(markdown_path.resolve(), parse_metrics)
+        except Exception as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        cache = share_page_sources(nav_nodes)
+
+    print(f"[targets] Exporting to {len(targets)} target(s): {', '.join(t['name'] for t in targets)}")
+
+    results: dict[str, str] = {}
+
+    def export_one(target: dict, target_args: argparse.Namespace, metrics_path, prometheus_path):
+        name = target["name"]
+        out.set_prefix(f"[{name}] ")
+        started = time.time()
+
+        client = NotionClient(
+            target["token"],
+            base_url=base_url,
+            pool_size=max(target_args.workers, 1) * 2,
+            trace=VERBOSITY >= 2,
+        )
+        client.metrics.merge_phases(parse_metrics)
+
+        try:
+            run_export(markdown_path, target["root_page"], client, target_args, nav_nodes=nav_nodes)
+            results[name] = "ok"
+        except SystemExit as e:
+            results[name] = "ok" if not e.code else "failed"
+        except Exception as e:
+            print(f"Error: {e}")
+            results[name] = "failed"
+        finally:
+            try:
+                finish_client(client, metrics_path, prometheus_path)
+            except Exception as e:
+                print(f"Error writing metrics: {e}")
+            print(f"[targets] Finished in {time.time() - started:.1f}s: {results.get(name, 'failed')}")
+            out.flush()
+
+    with PrefixedStdout() as out:
+        with ThreadPoolExecutor(max_workers=len(runs)) as executor:
+            futures = [executor.submit(export_one, *run) for run in runs]
+            for future in futures:
+                future.result()
+
+    if nav_nodes is not None:
+        reads = sum(source.reads for source in cache.sources())
+        print(f"[targets] {len(cache.sources())} page file(s) shared, {reads} disk read(s) in total.")
+
+    failed = [t["name"] for t in targets if results.get(t["name"]) != "ok"]
+    for target in targets:
+        print(f"[targets] {target['name']}: {results.get(target['name'], 'failed')}")
+    if failed:
+        print(f"Error: {len(failed)} of {len(targets)} target(s) failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export the docs tree (or a single markdown file) to Notion.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=textwrap.dedent(
+                f"""
                 Behaviour:
-                  - The script ALWAYS wipes (archives) all existing content under
+                  - By default the script wipes (archives) all existing content under
                     the given parent page before importing.
 
+                  - With --incremental (directories only):
+                      * Reads the state left by the previous run from --state-file
+                        (slug -> Notion page id, content hash, navigation position).
+                      * Only creates, updates or archives the pages whose file
+                        content or navigation position changed, and only
+                        updates the blocks of a page that changed. Pages
+                        that shift within their group are moved, not
+                        re-created.
+                      * Falls back to a full export when no state is available,
+                        or when the pages it records at the top are no longer
+                        under the root page (one listing call checks this).
+                      * Full exports, bundle replays and --prepare-shards
+                        write or delete the state, since they replace the pages
+                        it records.
+
+                  - With --watch (directories only), an incremental export is
+                    run first, then the script keeps the page id map in memory
+                    and polls the docs tree for changes every --poll-interval
+                    seconds. Saves are batched until the tree has been quiet
+                    for --debounce seconds; each batch updates only the edited
+                    pages, or rebuilds the affected sections when docs.json
+                    changed, and rewrites --state-file. Stop with Ctrl-C.
+
+                  - A full directory export can be split over parallel jobs, each
+                    with its own process and token (e.g. a CI matrix), in three
+                    steps sharing --shard-dir:
+                      * --prepare-shards --shard-count N clears the root page,
+                        splits the navigation into N shards of whole tabs, or
+                        of groups for tabs larger than 1/N of the tree, balanced
+                        by page count and size, and creates their section pages.
+                      * --shard-index I --shard-count N exports shard I under
+                        its section pages and writes its result.
+                      * --merge-shards checks that every shard finished, links
+                        repeated pages across shards, adds the 'Last updated'
+                        block and writes --state-file for later --incremental
+                        runs.
+                    All steps must run on the same commit.
+
+                  - Every run writes per-endpoint request counts, latencies, status
+                    codes, retries and bytes, plus per-phase wall-clock and
+                    thread-summed timings (waiting for image uploads is its
+                    own phase), to --metrics-file (and --prometheus-file if
+                    given). Use -v for per-request logging, -q to keep only
+                    summaries.
+
+                  - With --blue-green, full directory exports are built under a
+                    staging page (--staging-page, a page outside the root page)
+                    and moved under the root page once complete; the old tree
+                    is archived afterwards. A failed export or swap leaves the
+                    published tree as it was. With --incremental this applies
+                    to the fallback full export.
+
+                  - With --targets, docs.json and the pages are parsed and read
+                    once and exported to every listed root page concurrently.
+                    Each target has its own token, rate limiter, retries and
+                    error handling, and its own state, journal, image cache
+                    and metrics under <markdown_path>/.notion-export/targets/<name>/ (or
+                    the given paths, which must then contain {{target}}).
+                    Log lines are prefixed with the target name.
+
+                  - Full directory exports log every created page to --journal.
+                    If a run is interrupted, rerunning with --resume skips the
+                    clear, reuses the pages the journal lists as finished and
+                    continues from the first unfinished one.
+
                   - If markdown_path is a directory:
                       * Expects a {DOCS_JSON_NAME} file in that directory.
                       * Reads the navigation structure from navigation.tabs[*].groups[*].pages.
@@ -716,7 +2997,22 @@ def main():
                       * Each file page gets:
                           - A paragraph block at the top with a link
                             "{DOCS_BASE_URL}/<relative-path-without-extension>"
-                          - A single markdown code block with the entire file contents.
+                          - The file converted to native Notion blocks: headings,
+                            paragraphs, lists, tables, code blocks with their
+                            language, and callouts / toggles for Mintlify
+                            components (frontmatter is left out).
+                      * Local images the file references (![alt](/img/x.png) or
+                        <img src=...>) are uploaded through the Notion file
+                        upload API and placed as image blocks where they
+                        appear, unless --no-images is given. Uploads are cached
+                        by content hash in --assets-file, so each image is
+                        uploaded once, not once per page or per run.
+                      * Tabs with a local OpenAPI spec ("openapi" in docs.json)
+                        also get one section per tag and one page per operation,
+                        rendered from a compiled index of the spec cached in
+                        <markdown_path>/{OPENAPI_INDEX_FILE_NAME} by the spec's
+                        hash. With --incremental only changed operations are
+                        re-exported.
                       * At the end, logs:
                           - Count of pages created per Mintlify group
                           - Total pages created
@@ -736,12 +3032,199 @@ def main():
                 Environment:
                   NOTION_TOKEN must be set to your Notion integration token.
                   NOTION_ROOT_PAGE must be set to your Notion root page ID.
+                  Neither is needed with --targets / NOTION_TARGETS.
+                  NOTION_API_BASE_URL optionally overrides {NOTION_API_BASE_URL}.
                 """
-            ).strip()
+            ).strip(),
+    )
+    parser.add_argument(
+        "markdown_path",
+        help=f"Path to a directory (with {DOCS_JSON_NAME}) or single .md/.mdx file",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only push pages that changed since the previous export",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Concurrent page creations and archives (default: {DEFAULT_WORKERS}); all "
+        f"requests share a {NOTION_MAX_REQUESTS_PER_SECOND:g} req/s rate limit",
+    )
+    parser.add_argument(
+        "--state-file",
+        help=f"Incremental export state (default: <markdown_path>/{STATE_FILE_NAME})",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted directory export from its journal instead of "
+        "starting over",
+    )
+    parser.add_argument(
+        "--blue-green",
+        action="store_true",
+        help="Build full exports under a staging page and swap them in at the end, "
+        "leaving the published tree untouched if the export fails",
+    )
+    parser.add_argument(
+        "--staging-page",
+        default=os.environ.get("NOTION_STAGING_PAGE"),
+        help="Page outside the root page to build blue/green exports under "
+        "(default: $NOTION_STAGING_PAGE); required with --blue-green",
+    )
+    parser.add_argument(
+        "--journal",
+        help=f"Export journal (default: <markdown_path>/{JOURNAL_FILE_NAME})",
+    )
+    parser.add_argument(
+        "--no-images",
+        action="store_true",
+        help="Do not upload the local images pages reference",
+    )
+    parser.add_argument(
+        "--assets-file",
+        help="Cache of uploaded images by content hash "
+        f"(default: <markdown_path>/{ASSETS_FILE_NAME})",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        help="JSON report of per-endpoint HTTP metrics and per-phase timings "
+        f"(default: <markdown_path>/{METRICS_FILE_NAME})",
+    )
+    parser.add_argument(
+        "--prometheus-file",
+        help="Also write the metrics in Prometheus text format to this file",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="After an incremental export, keep running and push edited pages "
+        "as they are saved (directories only)",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help=f"Seconds between two scans of the docs tree in --watch mode "
+        f"(default: {DEFAULT_POLL_INTERVAL:g})",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        help="Seconds without further changes before a batch of saves is pushed "
+        f"in --watch mode (default: {DEFAULT_DEBOUNCE:g})",
+    )
+    parser.add_argument(
+        "--shard-count",
+        type=int,
+        help="Number of shards of a sharded export (with --prepare-shards and --shard-index)",
+    )
+    parser.add_argument(
+        "--prepare-shards",
+        action="store_true",
+        help="Clear the root page, create the section pages of a sharded export and "
+        "write its plan",
+    )
+    parser.add_argument(
+        "--shard-index",
+        type=int,
+        help="Export this shard (0-based) of a prepared sharded export",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        action="store_true",
+        help="Check that every shard finished, then finish the sharded export",
+    )
+    parser.add_argument(
+        "--shard-dir",
+        help=f"Shard plan and results (default: <markdown_path>/{SHARDS_DIR_NAME})",
+    )
+    parser.add_argument(
+        "--targets",
+        default=os.environ.get("NOTION_TARGETS"),
+        help="JSON list (or file) of Notion root pages to export to at once, each "
+        'like {"name": ..., "root_page": ..., "token_env": ...} '
+        "(default: $NOTION_TARGETS)",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="count",
+        default=0,
+        help="Also log every block listing and HTTP request",
+    )
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="Only log warnings, errors and summaries",
+    )
+
+    if len(sys.argv) < 2:
+        parser.print_help()
+        sys.exit(1)
+
+    args = parser.parse_args()
+
+    global VERBOSITY
+    VERBOSITY = 0 if args.quiet else 1 + args.verbose
+
+    markdown_path = Path(args.markdown_path)
+
+    if args.watch:
+        if args.targets:
+            print("Error: --watch exports to a single root page and cannot be used with --targets.")
+            sys.exit(1)
+        if not markdown_path.is_dir():
+            print("Error: --watch needs a docs directory, not a single file.")
+            sys.exit(1)
+        args.incremental = True
+
+    if args.blue_green and not args.staging_page and not args.targets:
+        print(
+            "Error: --blue-green needs --staging-page (or $NOTION_STAGING_PAGE), a page "
+            "outside the root page to build the new tree under."
         )
         sys.exit(1)
 
-    markdown_path = Path(sys.argv[1])
+    shard_steps = sum((args.prepare_shards, args.shard_index is not None, args.merge_shards))
+    if shard_steps:
+        if shard_steps > 1:
+            print("Error: use only one of --prepare-shards, --shard-index and --merge-shards.")
+            sys.exit(1)
+        if args.targets or args.watch or args.incremental or args.resume or args.blue_green:
+            print(
+                "Error: sharded exports are full exports to a single root page and cannot be "
+                "combined with --targets, --watch, --incremental, --resume or --blue-green."
+            )
+            sys.exit(1)
+        if not markdown_path.is_dir():
+            print("Error: sharded exports need a docs directory, not a single file.")
+            sys.exit(1)
+        if not args.merge_shards and (args.shard_count is None or args.shard_count < 1):
+            print("Error: --prepare-shards and --shard-index need --shard-count (1 or more).")
+            sys.exit(1)
+        if args.shard_index is not None and not 0 <= args.shard_index < args.shard_count:
+            print(f"Error: --shard-index must be between 0 and {args.shard_count - 1}.")
+            sys.exit(1)
+
+    if args.targets:
+        try:
+            targets = load_targets(args.targets, os.environ)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        export_to_targets(markdown_path, targets, args)
+        return
+
+    report_dir = markdown_path if markdown_path.is_dir() else markdown_path.parent
+    metrics_path = (
+        Path(args.metrics_file) if args.metrics_file else report_dir / METRICS_FILE_NAME
+    )
 
     notion_token = os.environ.get("NOTION_TOKEN")
     if not notion_token:
@@ -753,46 +3236,21 @@ def main():
         print("Error: NOTION_ROOT_PAGE environment variable is not set.")
         sys.exit(1)
 
-    try:
-        clear_page_children(parent_page_id, notion_token)
-    except Exception as e:
-        print(f"Error clearing existing content under parent page: {e}")
-        sys.exit(1)
+    client = NotionClient(
+        notion_token,
+        base_url=os.environ.get("NOTION_API_BASE_URL") or NOTION_API_BASE_URL,
+        pool_size=max(args.workers, 1) * 2,
+        trace=VERBOSITY >= 2,
+    )
 
     try:
-        add_root_update_block(parent_page_id, notion_token)
-    except Exception as e:
-        print(f"Error updating root page: {e}")
-        sys.exit(1)
-
-    if markdown_path.is_dir():
-        try:
-            counters = process_directory_with_docs_json(
-                markdown_path, parent_page_id, notion_token
-            )
-        except Exception as e:
-            print(f"Error: {e}")
-            sys.exit(1)
-    elif markdown_path.is_file():
-        root_dir = markdown_path.parent.resolve()
-        docs_url = build_docs_url(root_dir, markdown_path.resolve())
-
-        try:
-            page = create_notion_page_from_markdown(
-                markdown_path,
-                parent_page_id,
-                notion_token,
-                docs_url=docs_url,
-            )
-            url = page.get("url", "(no url in response)")
-            print(f"Notion page created successfully: {url}")
-            print("[stats] Total content pages created: 1")
-        except Exception as e:
-            print(f"Error: {e}")
-            sys.exit(1)
-    else:
-        print(f"Error: Path not found: {markdown_path}")
-        sys.exit(1)
+        run_export(markdown_path, parent_page_id, client, args)
+    finally:
+        finish_client(
+            client,
+            metrics_path,
+            Path(args.prometheus_file) if args.prometheus_file else None,
+        )
 
 
 if __name__ == "__main__":
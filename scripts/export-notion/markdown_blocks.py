@@ -0,0 +1,910 @@
+"""
+Single-pass conversion of Mintlify markdown/MDX pages to native Notion blocks.
+
+MarkdownConverter reads a page line by line, straight from the chunks a
+PageSource streams, and yields each top-level block as soon as it is
+complete:
+
+  - headings, paragraphs, quotes and dividers;
+  - bulleted, numbered and to-do lists, nested by indentation;
+  - fenced code blocks, with the fence language mapped to one Notion
+    knows and the fence title (```bash Install) as caption;
+  - tables;
+  - Mintlify components: Note, Tip, Info, Warning, Danger, Check and
+    Callout become callouts; Accordion, Expandable and Tab toggles; Card,
+    Step, ParamField and ResponseField list items holding their content;
+    Update a heading. Wrappers (CodeGroup, CardGroup, Steps, Tabs, Frame,
+    ...) are dropped and their content kept.
+
+Inline **bold**, *italic*, ~~strikethrough~~, `code` and [links](...) become
+rich text annotations; relative links are resolved against the page URL.
+Frontmatter, MDX imports and exports, comments and HTML tags are left
+out. Images ![...](...) and <img> become image blocks where they appear
+when the converter is given an `image_block` callback (PageImages.block()
+uploads local images); otherwise, and for images it returns None for,
+they are left out too.
+
+Blocks nest at most NOTION_MAX_NESTING levels deep, as many as Notion
+accepts in one request; deeper blocks are lifted to the deepest allowed
+level. Every block and rich text list is kept within the API's size limits.
+"""
+import re
+import json
+import difflib
+import hashlib
+from typing import Callable, Iterable, Iterator
+from urllib.parse import urljoin, urlsplit
+
+from assets import IMAGE_RE, image_ref
+from notion_api import NOTION_MAX_BLOCKS_PER_REQUEST, NOTION_MAX_RICH_TEXT_ITEMS
+
+# Characters per rich_text item (the API allows 2000).
+MAX_TEXT_CHARS = 1900
+
+# Levels of children a block may carry in a single create/append request.
+NOTION_MAX_NESTING = 2
+
+# Languages accepted for code blocks.
+NOTION_CODE_LANGUAGES = {
+    "abap", "agda", "arduino", "ascii art", "assembly", "bash", "basic", "bnf", "c", "c#",
+    "c++", "clojure", "coffeescript", "coq", "css", "dart", "dhall", "diff", "docker",
+    "ebnf", "elixir", "elm", "erlang", "f#", "flow", "fortran", "gherkin", "glsl", "go",
+    "graphql", "groovy", "haskell", "hcl", "html", "idris", "java", "javascript", "json",
+    "julia", "kotlin", "latex", "less", "lisp", "livescript", "llvm ir", "lua", "makefile",
+    "markdown", "markup", "mathematica", "matlab", "mermaid", "nix", "notion formula",
+    "objective-c", "ocaml", "pascal", "perl", "php", "plain text", "powershell", "prolog",
+    "protobuf", "purescript", "python", "r", "racket", "reason", "ruby", "rust", "sass",
+    "scala", "scheme", "scss", "shell", "smalltalk", "solidity", "sql", "swift", "toml",
+    "typescript", "vb.net", "verilog", "vhdl", "visual basic", "webassembly", "xml", "yaml",
+    "java/c/c++/c#",
+}
+
+CODE_LANGUAGE_ALIASES = {
+    "sh": "shell",
+    "zsh": "shell",
+    "fish": "shell",
+    "console": "shell",
+    "shellscript": "shell",
+    "terminal": "shell",
+    "js": "javascript",
+    "jsx": "javascript",
+    "mjs": "javascript",
+    "ts": "typescript",
+    "tsx": "typescript",
+    "py": "python",
+    "yml": "yaml",
+    "dockerfile": "docker",
+    "golang": "go",
+    "cs": "c#",
+    "csharp": "c#",
+    "cpp": "c++",
+    "rb": "ruby",
+    "rs": "rust",
+    "md": "markdown",
+    "mdx": "markdown",
+    "jsonc": "json",
+    "json5": "json",
+    "kt": "kotlin",
+    "ps1": "powershell",
+    "proto": "protobuf",
+    "tf": "hcl",
+    "terraform": "hcl",
+    "text": "plain text",
+    "txt": "plain text",
+    "plaintext": "plain text",
+}
+
+# Mintlify callout components: (icon, color).
+CALLOUTS = {
+    "Note": ("📝", "blue_background"),
+    "Info": ("ℹ️", "gray_background"),
+    "Tip": ("💡", "green_background"),
+    "Check": ("✅", "green_background"),
+    "Warning": ("⚠️", "yellow_background"),
+    "Danger": ("🚨", "red_background"),
+    "Callout": ("💬", "gray_background"),
+}
+
+TOGGLE_COMPONENTS = {"Accordion", "Expandable", "Tab"}
+ITEM_COMPONENTS = {"Card", "Step", "ParamField", "ResponseField"}
+
+# Block types whose content can be changed with an update request.
+UPDATABLE_TYPES = {
+    "paragraph", "heading_1", "heading_2", "heading_3", "bulleted_list_item",
+    "numbered_list_item", "to_do", "toggle", "quote", "callout", "code",
+}
+
+FENCE_RE = re.compile(r"^(`{3,}|~{3,})\s*(.*)$")
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+DIVIDER_RE = re.compile(r"^(?:\*\s*){3,}$|^(?:-\s*){3,}$|^(?:_\s*){3,}$")
+LIST_RE = re.compile(r"^([-*+]|\d{1,9}[.)])(\s+)(.*)$")
+TASK_RE = re.compile(r"^\[([ xX])\]\s+(.*)$")
+TABLE_DELIMITER_RE = re.compile(r"^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$")
+OPEN_TAG_RE = re.compile(r"^<([A-Z][\w.]*)((?:\s[^>]*?)?)(/?)>(.*)$")
+CLOSE_TAG_RE = re.compile(r"^</([A-Z][\w.]*)\s*>$")
+TRAILING_CLOSE_TAG_RE = re.compile(r"^(.*?)</([A-Z][\w.]*)\s*>$")
+HTML_LINE_RE = re.compile(r"^(?:</?[a-z][^<>]*>\s*)+$")
+ATTRIBUTE_RE = re.compile(r"""([\w-]+)(?:=(?:"([^"]*)"|'([^']*)'|\{([^}]*)\}))?""")
+ESM_RE = re.compile(r"^(?:import|export)\s")
+
+INLINE_RE = re.compile(
+    r"(?P<ticks>`+)(?P<code>.+?)(?P=ticks)"
+    r"|!\[(?P<alt>[^\]]*)\]\([^)]*\)"
+    r"|\[(?P<label>(?:[^\[\]]|\[[^\]]*\])+)\]\((?P<href><[^>]*>|[^)\s]+)(?:\s+\"[^\"]*\")?\)"
+    r"|<(?P<autolink>(?:https?://|mailto:)[^>\s]+)>"
+    r"|(?P<br><br\s*/?>)"
+    r"|(?P<tag></?[A-Za-z][\w.-]*(?:\s[^<>]*)?/?>)"
+    r"|\*\*(?P<bold>.+?)\*\*"
+    r"|(?<!\w)__(?P<bold2>.+?)__(?!\w)"
+    r"|~~(?P<strike>.+?)~~"
+    r"|\*(?P<italic>[^*\s](?:[^*]*[^*\s])?)\*"
+    r"|(?<!\w)_(?P<italic2>[^_\s](?:[^_]*[^_\s])?)_(?!\w)"
+    r"|\\(?P<escaped>[!-/:-@\[-`{-~])"
+)
+
+
+def code_language(name: str) -> str:
+    """
+    Notion code block language for a fence's language name.
+    """
+    name = name.strip().lower()
+    name = CODE_LANGUAGE_ALIASES.get(name, name)
+    return name if name in NOTION_CODE_LANGUAGES else "plain text"
+
+
+def parse_attributes(text: str) -> dict[str, str]:
+    """
+    Attributes of a JSX tag: name="x", name='x', name={x}, or bare `name`.
+    """
+    attributes = {}
+    for m in ATTRIBUTE_RE.finditer(text):
+        value = next((v for v in m.group(2, 3, 4) if v is not None), "true")
+        attributes[m.group(1)] = value.strip().strip("\"'")
+    return attributes
+
+
+def resolve_link(href: str, page_url: str | None) -> str | None:
+    """
+    URL a link points at: absolute links as is, others resolved against
+    the page URL (dropping .md/.mdx), or None when they cannot be.
+    """
+    href = href.strip("<>").strip()
+    if not href:
+        return None
+    if href.startswith(("http://", "https://", "mailto:")):
+        return href
+    if page_url is None:
+        return None
+    path, _, fragment = href.partition("#")
+    for suffix in (".mdx", ".md"):
+        if path.endswith(suffix):
+            path = path[: -len(suffix)]
+    url = urljoin(page_url, path) + (f"#{fragment}" if fragment else "")
+    return url if urlsplit(url).scheme in ("http", "https") else None
+
+
+def split_text(text: str, max_len: int = MAX_TEXT_CHARS) -> list[str]:
+    return [text[start:start + max_len] for start in range(0, len(text), max_len)] or [""]
+
+
+def parse_inline(
+    text: str,
+    page_url: str | None = None,
+    styles: frozenset = frozenset(),
+    link: str | None = None,
+) -> list[tuple[str, frozenset, str | None]]:
+    """
+    Split inline markdown into (text, annotations, link url) runs.
+    """
+    runs: list[tuple[str, frozenset, str | None]] = []
+    pos = 0
+
+    for m in INLINE_RE.finditer(text):
+        if m.start() > pos:
+            runs.append((text[pos:m.start()], styles, link))
+        pos = m.end()
+
+        if m.group("code") is not None:
+            runs.append((m.group("code"), styles | {"code"}, link))
+        elif m.group("label") is not None:
+            target = resolve_link(m.group("href"), page_url) or link
+            runs.extend(parse_inline(m.group("label"), page_url, styles, target))
+        elif m.group("autolink") is not None:
+            runs.append((m.group("autolink"), styles, m.group("autolink")))
+        elif m.group("br") is not None:
+            runs.append(("\n", styles, link))
+        elif m.group("bold") is not None or m.group("bold2") is not None:
+            inner = m.group("bold") if m.group("bold") is not None else m.group("bold2")
+            runs.extend(parse_inline(inner, page_url, styles | {"bold"}, link))
+        elif m.group("strike") is not None:
+            runs.extend(parse_inline(m.group("strike"), page_url, styles | {"strikethrough"}, link))
+        elif m.group("italic") is not None or m.group("italic2") is not None:
+            inner = m.group("italic") if m.group("italic") is not None else m.group("italic2")
+            runs.extend(parse_inline(inner, page_url, styles | {"italic"}, link))
+        elif m.group("escaped") is not None:
+            runs.append((m.group("escaped"), styles, link))
+        # Images (placed as image blocks) and HTML/JSX tags are dropped.
+
+    if pos < len(text):
+        runs.append((text[pos:], styles, link))
+    return runs
+
+
+def rich_text(
+    runs: list[tuple[str, frozenset, str | None]],
+    max_items: int | None = NOTION_MAX_RICH_TEXT_ITEMS,
+) -> list[dict]:
+    """
+    Build rich_text items from runs, merging neighbours with the same
+    formatting. Past `max_items` items, the rest is kept as plain text.
+    """
+    merged: list[list] = []
+    for content, styles, link in runs:
+        if not content:
+            continue
+        if merged and merged[-1][1] == styles and merged[-1][2] == link:
+            merged[-1][0] += content
+        else:
+            merged.append([content, styles, link])
+
+    items = []
+    for content, styles, link in merged:
+        for segment in split_text(content):
+            item = {"type": "text", "text": {"content": segment}}
+            if link:
+                item["text"]["link"] = {"url": link}
+            if styles:
+                item["annotations"] = {name: True for name in sorted(styles)}
+            items.append(item)
+
+    if max_items is not None and len(items) > max_items:
+        rest = "".join(item["text"]["content"] for item in items[max_items - 1:])
+        items = items[:max_items - 1] + [
+            {"type": "text", "text": {"content": segment}} for segment in split_text(rest)
+        ]
+        items = items[:max_items]
+    return items
+
+
+def inline_text(text: str, page_url: str | None = None) -> list[dict]:
+    return rich_text(parse_inline(text.strip(), page_url))
+
+
+def new_block(block_type: str, **data) -> dict:
+    """
+    A block under construction: its children are kept in "children" until
+    finalize_block() moves them into the payload.
+    """
+    return {"type": block_type, block_type: data, "children": []}
+
+
+def code_blocks(code: str, language: str, caption: str = "") -> list[dict]:
+    """
+    Code blocks holding `code`, split over several blocks when it needs more
+    than NOTION_MAX_RICH_TEXT_ITEMS rich_text items.
+    """
+    segments = split_text(code)
+    blocks = []
+    for start in range(0, len(segments), NOTION_MAX_RICH_TEXT_ITEMS):
+        block = new_block(
+            "code",
+            rich_text=[
+                {"type": "text", "text": {"content": segment}}
+                for segment in segments[start:start + NOTION_MAX_RICH_TEXT_ITEMS]
+                if segment
+            ],
+            language=language,
+        )
+        if caption:
+            block["code"]["caption"] = inline_text(caption)
+        blocks.append(block)
+    return blocks
+
+
+def finalize_block(block: dict, depth: int = 0) -> list[dict]:
+    """
+    Turn a block under construction into request payloads: children move
+    into the block's data, at most NOTION_MAX_BLOCKS_PER_REQUEST of them.
+    At NOTION_MAX_NESTING, or past that many children, the extra children
+    follow the block as siblings instead.
+    """
+    block_type = block["type"]
+    children = block.pop("children", [])
+    data = block[block_type]
+
+    if block_type == "table":
+        return finalize_table(block, depth)
+
+    child_depth = min(depth + 1, NOTION_MAX_NESTING)
+    flat = [payload for child in children for payload in finalize_block(child, child_depth)]
+
+    payload = {"object": "block", "type": block_type, block_type: data}
+    if depth >= NOTION_MAX_NESTING or not flat:
+        return [payload, *flat]
+
+    data["children"] = flat[:NOTION_MAX_BLOCKS_PER_REQUEST]
+    return [payload, *flat[NOTION_MAX_BLOCKS_PER_REQUEST:]]
+
+
+def finalize_table(block: dict, depth: int) -> list[dict]:
+    """
+    Tables keep their rows as children, so one nested too deep becomes a
+    code block of its source, and one with too many rows is split into
+    tables repeating the header row.
+    """
+    data = block["table"]
+    rows = data.pop("rows")
+    source = data.pop("source")
+
+    if depth >= NOTION_MAX_NESTING:
+        return [finalize_block(code, depth)[0] for code in code_blocks("\n".join(source), "markdown")]
+
+    width = data["table_width"]
+    payload_rows = [
+        {
+            "object": "block",
+            "type": "table_row",
+            "table_row": {"cells": [cells[i] if i < len(cells) else [] for i in range(width)]},
+        }
+        for cells in rows
+    ]
+
+    header, body = payload_rows[:1], payload_rows[1:]
+    per_table = NOTION_MAX_BLOCKS_PER_REQUEST - 1
+    tables = []
+    for start in range(0, max(len(body), 1), per_table):
+        tables.append(
+            {
+                "object": "block",
+                "type": "table",
+                "table": {**data, "children": header + body[start:start + per_table]},
+            }
+        )
+    return tables
+
+
+def block_signature(block: dict) -> str:
+    """
+    Short fingerprint of a block payload, prefixed with its type and "+"
+    when it carries children, e.g. "paragraph:3f2a...". Two blocks with
+    the same signature render the same.
+    """
+    block_type = block["type"]
+    digest = hashlib.sha256(json.dumps(block, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    nested = "+" if block[block_type].get("children") else ""
+    return f"{block_type}{nested}:{digest}"
+
+
+def can_update_in_place(old_signature: str, new_block: dict) -> bool:
+    """
+    Whether the block behind `old_signature` can be turned into `new_block`
+    with one update request (same type, no children on either side).
+    """
+    old_type = old_signature.split(":", 1)[0]
+    block_type = new_block["type"]
+    return (
+        old_type == block_type
+        and block_type in UPDATABLE_TYPES
+        and not new_block[block_type].get("children")
+    )
+
+
+def diff_blocks(
+    old_signatures: list[str],
+    new_blocks: list[dict],
+    new_signatures: list[str],
+) -> list[tuple[str, int | None, int | None]] | None:
+    """
+    Plan how to turn a page's blocks, known by the signatures recorded when
+    they were written, into `new_blocks`. Returns, in page order:
+
+      ("keep", i, j)       old block i stays as new block j
+      ("update", i, j)     old block i is updated in place to new block j
+      ("archive", i, None) old block i goes
+      ("insert", None, j)  new block j is appended after the previous block
+
+    or None when a block would have to be inserted before the first block
+    kept, which appends cannot do.
+    """
+    matcher = difflib.SequenceMatcher(None, old_signatures, new_signatures, autojunk=False)
+    plan: list[tuple[str, int | None, int | None]] = []
+
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            plan.extend(("keep", i1 + k, j1 + k) for k in range(i2 - i1))
+            continue
+
+        pairs = min(i2 - i1, j2 - j1) if tag == "replace" else 0
+        for k in range(pairs):
+            if can_update_in_place(old_signatures[i1 + k], new_blocks[j1 + k]):
+                plan.append(("update", i1 + k, j1 + k))
+            else:
+                plan.append(("archive", i1 + k, None))
+                plan.append(("insert", None, j1 + k))
+        plan.extend(("archive", i, None) for i in range(i1 + pairs, i2))
+        plan.extend(("insert", None, j) for j in range(j1 + pairs, j2))
+
+    for op, _, _ in plan:
+        if op in ("keep", "update"):
+            return plan
+        if op == "insert":
+            return None
+    return plan
+
+
+def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Yield the lines of chunked text, without their line endings.
+    """
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split("\n")
+        yield from lines
+    if pending:
+        yield pending
+
+
+class Container:
+    """
+    Where blocks are added: the page, a component or a list item. `blocks`
+    is the list new blocks go to; transparent components share their
+    parent's. List items record the column their content starts at.
+    """
+
+    def __init__(self, kind: str, blocks: list, tag: str | None = None, block: dict | None = None, indent: int = 0):
+        self.kind = kind
+        self.blocks = blocks
+        self.tag = tag
+        self.block = block
+        self.indent = indent
+
+
+class MarkdownConverter:
+    """
+    Line-driven converter from Mintlify markdown to Notion blocks; see the
+    module docstring. Use convert(), or markdown_to_blocks().
+    """
+
+    def __init__(
+        self,
+        page_url: str | None = None,
+        image_block: Callable[[str, str], dict | None] | None = None,
+    ):
+        self.page_url = page_url
+        self.image_block = image_block
+        self.root: list[dict] = []
+        self.stack = [Container("root", self.root)]
+
+        self.paragraph: list[str] = []
+        self.paragraph_item: dict | None = None
+        self.quote = False
+        self.fence: dict | None = None
+        self.table: dict | None = None
+        self.table_header: tuple[str, int] | None = None
+        self.comment_end: str | None = None
+        self.open_tag: list[str] | None = None
+        self.in_frontmatter = False
+
+    # -- driving --------------------------------------------------------
+
+    def convert(self, chunks: Iterable[str]) -> Iterator[dict]:
+        """
+        Yield the request payloads of the page's top-level blocks, each as
+        soon as no later line can change it. Yielded blocks are dropped, so
+        only the last top-level block is held while converting.
+        """
+        for number, line in enumerate(iter_lines(chunks)):
+            if number == 0 and line.strip() == "---":
+                self.in_frontmatter = True
+                continue
+            self.feed(line)
+            if len(self.root) > 1:
+                done = self.root[:-1]
+                # In place: the root container and transparent components
+                # share this list.
+                del self.root[:-1]
+                for block in done:
+                    yield from finalize_block(block)
+
+        self.finish()
+        done = self.root[:]
+        self.root.clear()
+        for block in done:
+            yield from finalize_block(block)
+
+    def finish(self):
+        if self.fence is not None:
+            self.close_fence()
+        if self.table_header is not None:
+            header, _ = self.table_header
+            self.table_header = None
+            self.add_text(header)
+        self.flush_paragraph()
+        self.table = None
+        while len(self.stack) > 1:
+            self.pop()
+
+    # -- containers ----------------------------------------------------
+
+    @property
+    def top(self) -> Container:
+        return self.stack[-1]
+
+    def add(self, block: dict):
+        self.top.blocks.append(block)
+
+    def pop(self):
+        container = self.stack.pop()
+        block = container.block
+        if container.kind == "callout" and block["children"]:
+            first = block["children"][0]
+            if first["type"] == "paragraph":
+                block["callout"]["rich_text"] = first["paragraph"]["rich_text"]
+                block["children"] = block["children"][1:] + first["children"]
+
+    def close_items(self, indent: int):
+        """
+        Close the list items a line starting at column `indent` is not part of.
+        """
+        while self.top.kind == "item" and self.top.indent > indent:
+            self.flush_paragraph()
+            self.pop()
+
+    def open_component(self, tag: str, attributes: dict[str, str]):
+        self.flush_paragraph()
+        self.table = None
+
+        if tag in CALLOUTS:
+            icon, color = CALLOUTS[tag]
+            block = new_block("callout", rich_text=[], icon={"type": "emoji", "emoji": icon}, color=color)
+            self.add(block)
+            self.stack.append(Container("callout", block["children"], tag, block))
+            return
+
+        title = attributes.get("title") or attributes.get("label") or ""
+        if tag in TOGGLE_COMPONENTS:
+            block = new_block("toggle", rich_text=inline_text(title, self.page_url))
+            self.add(block)
+            self.stack.append(Container("toggle", block["children"], tag, block))
+            return
+
+        if tag in ITEM_COMPONENTS:
+            if tag in ("ParamField", "ResponseField"):
+                name = next(
+                    (attributes[k] for k in ("path", "query", "body", "header", "name") if k in attributes),
+                    "",
+                )
+                runs = [(name, frozenset({"code"}), None)]
+                if attributes.get("type"):
+                    runs.append((f" {attributes['type']}", frozenset({"italic"}), None))
+                if attributes.get("required") == "true":
+                    runs.append((" required", frozenset({"bold"}), None))
+                if attributes.get("default"):
+                    runs.append((f" (default: {attributes['default']})", frozenset(), None))
+                text = rich_text(runs)
+            else:
+                link = resolve_link(attributes["href"], self.page_url) if attributes.get("href") else None
+                text = rich_text([(title, frozenset({"bold"}), link)])
+            block_type = "numbered_list_item" if tag == "Step" else "bulleted_list_item"
+            block = new_block(block_type, rich_text=text)
+            self.add(block)
+            self.stack.append(Container("component", block["children"], tag, block))
+            return
+
+        if tag == "Update":
+            if title:
+                self.add(new_block("heading_2", rich_text=inline_text(title, self.page_url)))
+            if attributes.get("description"):
+                self.add(
+                    new_block(
+                        "paragraph",
+                        rich_text=rich_text([(attributes["description"], frozenset({"italic"}), None)]),
+                    )
+                )
+
+        self.stack.append(Container("transparent", self.top.blocks, tag))
+
+    def close_component(self, tag: str):
+        if not any(c.tag == tag and c.kind != "item" for c in self.stack[1:]):
+            return
+        self.flush_paragraph()
+        self.table = None
+        while True:
+            container = self.top
+            self.pop()
+            if container.tag == tag and container.kind != "item":
+                return
+
+    # -- text ----------------------------------------------------------
+
+    def flush_paragraph(self):
+        if not self.paragraph:
+            self.paragraph_item = None
+            self.quote = False
+            return
+        text = " ".join(line.strip() for line in self.paragraph)
+        if self.quote:
+            text = "\n".join(line.strip() for line in self.paragraph)
+        # Text after an image continues in a new paragraph (or quote), also
+        # within a list item.
+        images = IMAGE_RE.finditer(text) if self.image_block is not None else ()
+        pos = 0
+        for m in images:
+            self.add_paragraph(text[pos:m.start()])
+            self.paragraph_item = None
+            pos = m.end()
+            self.add_image(image_ref(m))
+        self.add_paragraph(text[pos:])
+        self.paragraph = []
+        self.paragraph_item = None
+        self.quote = False
+
+    def add_paragraph(self, text: str):
+        items = inline_text(text, self.page_url)
+        if self.paragraph_item is not None:
+            block_type = self.paragraph_item["type"]
+            self.paragraph_item[block_type]["rich_text"] = items
+        elif items:
+            self.add(new_block("quote" if self.quote else "paragraph", rich_text=items))
+
+    def add_image(self, ref: tuple[str, str] | None):
+        block = self.image_block(*ref) if ref is not None else None
+        if block is not None:
+            self.add(new_block("image", **block["image"]))
+
+    def add_text(self, text: str):
+        if self.quote:
+            self.flush_paragraph()
+        self.paragraph.append(text)
+
+    # -- lines ---------------------------------------------------------
+
+    def feed(self, line: str):
+        raw = line.expandtabs(4).rstrip("\r")
+        stripped = raw.strip()
+        indent = len(raw) - len(raw.lstrip())
+
+        if self.in_frontmatter:
+            if stripped == "---":
+                self.in_frontmatter = False
+            return
+
+        if self.fence is not None:
+            fence = self.fence
+            if stripped.startswith(fence["marker"]) and not stripped.strip(fence["marker"][0]):
+                self.close_fence()
+            else:
+                drop = min(fence["indent"], len(raw) - len(raw.lstrip(" ")))
+                fence["lines"].append(raw[drop:])
+            return
+
+        if self.comment_end is not None:
+            if self.comment_end in stripped:
+                self.comment_end = None
+            return
+
+        if self.open_tag is not None:
+            self.open_tag.append(stripped)
+            if stripped.endswith(">"):
+                tag_line, self.open_tag = " ".join(self.open_tag), None
+                self.feed_tag(tag_line, indent)
+            return
+
+        if not stripped:
+            self.flush_paragraph()
+            self.table = None
+            return
+
+        if self.table_header is not None:
+            header, header_indent = self.table_header
+            self.table_header = None
+            if TABLE_DELIMITER_RE.match(stripped):
+                self.start_table(header, stripped)
+                return
+            self.close_items(header_indent)
+            self.add_text(header)
+
+        if self.table is not None:
+            if stripped.startswith("|"):
+                self.table["table"]["rows"].append(self.table_cells(stripped))
+                self.table["table"]["source"].append(stripped)
+                return
+            self.table = None
+
+        for start, end in (("{/*", "*/}"), ("<!--", "-->")):
+            if stripped.startswith(start):
+                if end not in stripped:
+                    self.comment_end = end
+                return
+
+        if indent == 0 and ESM_RE.match(stripped) and len(self.stack) == 1:
+            return
+
+        if stripped.startswith("<") and not stripped.startswith("<http"):
+            if self.feed_tag(stripped, indent):
+                return
+
+        m = TRAILING_CLOSE_TAG_RE.match(stripped)
+        if m and m.group(1).strip() and any(c.tag == m.group(2) for c in self.stack[1:]):
+            self.feed(" " * indent + m.group(1))
+            self.close_component(m.group(2))
+            return
+
+        m = FENCE_RE.match(stripped)
+        if m and not (m.group(1)[0] == "`" and "`" in m.group(2)):
+            self.flush_paragraph()
+            self.close_items(indent)
+            self.open_fence(m.group(1), m.group(2), indent)
+            return
+
+        m = LIST_RE.match(stripped)
+        if m and not DIVIDER_RE.match(stripped):
+            self.add_list_item(m, indent)
+            return
+
+        # Continuation of a list item's text, indented or not.
+        if self.paragraph_item is not None and not self.block_start(stripped):
+            self.paragraph.append(stripped)
+            return
+
+        self.flush_paragraph()
+        self.close_items(indent)
+
+        if DIVIDER_RE.match(stripped):
+            self.add(new_block("divider"))
+            return
+
+        m = HEADING_RE.match(stripped)
+        if m:
+            level = min(len(m.group(1)), 3)
+            self.add(new_block(f"heading_{level}", rich_text=inline_text(m.group(2), self.page_url)))
+            return
+
+        if stripped.startswith("|"):
+            self.table_header = (stripped, indent)
+            return
+
+        if stripped.startswith(">"):
+            if not self.quote:
+                self.flush_paragraph()
+                self.quote = True
+            self.paragraph.append(stripped[1:].strip())
+            return
+
+        self.add_text(stripped)
+
+    def block_start(self, stripped: str) -> bool:
+        return bool(
+            HEADING_RE.match(stripped)
+            or DIVIDER_RE.match(stripped)
+            or stripped.startswith(("|", ">", "<", "```", "~~~"))
+        )
+
+    def feed_tag(self, stripped: str, indent: int) -> bool:
+        """
+        Handle a line that starts with a tag. Returns False for lines that
+        are text after all.
+        """
+        m = CLOSE_TAG_RE.match(stripped)
+        if m:
+            self.close_component(m.group(1))
+            return True
+
+        m = OPEN_TAG_RE.match(stripped)
+        if m:
+            tag, attributes, self_closing, rest = m.groups()
+            self.flush_paragraph()
+            self.close_items(indent)
+            self.open_component(tag, parse_attributes(attributes))
+            if self_closing:
+                self.close_component(tag)
+                return True
+            rest = rest.strip()
+            if rest:
+                closing = f"</{tag}>"
+                if rest.endswith(closing):
+                    self.feed(" " * (indent + 2) + rest[: -len(closing)])
+                    self.close_component(tag)
+                else:
+                    self.feed(" " * (indent + 2) + rest)
+            return True
+
+        if re.match(r"^<[A-Za-z][\w.]*(\s|$)", stripped) and ">" not in stripped:
+            self.flush_paragraph()
+            self.open_tag = [stripped]
+            return True
+
+        if HTML_LINE_RE.match(stripped):
+            self.flush_paragraph()
+            if self.image_block is not None:
+                for m in IMAGE_RE.finditer(stripped):
+                    self.add_image(image_ref(m))
+            return True
+
+        return False
+
+    def add_list_item(self, m: re.Match, indent: int):
+        marker, spacing, text = m.groups()
+        self.flush_paragraph()
+        content_indent = indent + len(marker) + len(spacing)
+        while self.top.kind == "item" and self.top.indent > indent:
+            self.pop()
+
+        task = TASK_RE.match(text)
+        if task:
+            block = new_block("to_do", rich_text=[], checked=task.group(1) != " ")
+            text = task.group(2)
+        elif marker[0].isdigit():
+            block = new_block("numbered_list_item", rich_text=[])
+        else:
+            block = new_block("bulleted_list_item", rich_text=[])
+
+        self.add(block)
+        self.stack.append(Container("item", block["children"], block=block, indent=content_indent))
+        self.paragraph = [text]
+        self.paragraph_item = block
+
+        fence = FENCE_RE.match(text)
+        if fence:
+            self.paragraph = []
+            self.paragraph_item = None
+            self.open_fence(fence.group(1), fence.group(2), content_indent)
+
+    # -- code and tables -------------------------------------------------
+
+    def open_fence(self, marker: str, info: str, indent: int):
+        language, _, meta = info.strip().partition(" ")
+        title = re.search(r"""title=(?:"([^"]*)"|'([^']*)')""", meta)
+        if title:
+            caption = title.group(1) or title.group(2) or ""
+        else:
+            caption = re.sub(r"\{[^}]*\}|[\w-]+=(?:\"[^\"]*\"|'[^']*'|\S+)", "", meta).strip()
+        self.fence = {
+            "marker": marker,
+            "language": code_language(language.strip("{}")) if language else "plain text",
+            "caption": caption,
+            "indent": indent,
+            "lines": [],
+        }
+
+    def close_fence(self):
+        fence, self.fence = self.fence, None
+        for block in code_blocks("\n".join(fence["lines"]), fence["language"], fence["caption"]):
+            self.add(block)
+
+    def table_cells(self, row: str) -> list[list[dict]]:
+        row = row.strip()
+        if row.startswith("|"):
+            row = row[1:]
+        if row.endswith("|") and not row.endswith("\\|"):
+            row = row[:-1]
+        cells = re.split(r"(?<!\\)\|", row)
+        return [inline_text(cell.replace("\\|", "|"), self.page_url) for cell in cells]
+
+    def start_table(self, header: str, delimiter: str):
+        cells = self.table_cells(header)
+        block = new_block(
+            "table",
+            table_width=len(cells),
+            has_column_header=True,
+            has_row_header=False,
+            rows=[cells],
+            source=[header, delimiter],
+        )
+        self.add(block)
+        self.table = block
+
+
+def markdown_to_blocks(
+    md_content: str | Iterable[str],
+    page_url: str | None = None,
+    image_block: Callable[[str, str], dict | None] | None = None,
+) -> Iterator[dict]:
+    """
+    Yield the Notion blocks for a markdown page (a string or a stream of
+    chunks), resolving relative links against `page_url` and placing the
+    images `image_block` returns a block for.
+    """
+    chunks = (md_content,) if isinstance(md_content, str) else md_content
+    yield from MarkdownConverter(page_url, image_block).convert(chunks)
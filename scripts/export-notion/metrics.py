@@ -0,0 +1,310 @@
+import re
+import json
+import time
+import threading
+import contextlib
+from pathlib import Path
+
+# Upper bounds (seconds) of the request latency histogram buckets.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+
+ID_PATTERN = re.compile(r"[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}")
+
+
+def endpoint_label(method: str, path: str) -> str:
+    """
+    Group requests by endpoint: "PATCH blocks/<uuid>/children" becomes
+    "PATCH /blocks/{id}/children".
+    """
+    path = path.split("?")[0].strip("/")
+    return f"{method.upper()} /{ID_PATTERN.sub('{id}', path)}"
+
+
+def new_endpoint_stats() -> dict:
+    return {
+        "requests": 0,
+        "retries": 0,
+        "errors": 0,
+        "status": {},
+        "bytes_out": 0,
+        "bytes_in": 0,
+        "latency_sum": 0.0,
+        "latency_max": 0.0,
+        "latency_buckets": [0] * len(LATENCY_BUCKETS),
+    }
+
+
+def bucket_quantile(buckets: list[int], total: int, q: float) -> float | None:
+    """
+    Approximate a latency quantile as the upper bound of the histogram
+    bucket it falls into.
+    """
+    if not total:
+        return None
+
+    rank = q * total
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS, buckets):
+        seen += count
+        if seen >= rank:
+            return bound
+    return LATENCY_BUCKETS[-1]
+
+
+class ExportMetrics:
+    """
+    Thread-safe counters for one export run: per-endpoint HTTP statistics
+    (fed by NotionClient.request()) and per-phase timings (fed by phase()).
+
+    Phases may be entered from several worker threads at once (file reads,
+    page creation). A phase's `seconds` is wall-clock time, during which at
+    least one thread was in it; its `thread_seconds` is the time summed
+    across threads, which can exceed the wall-clock time of the run.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.endpoints: dict[str, dict] = {}
+        self.phases: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        # Threads currently in each phase, and since when one has been.
+        self._active: dict[str, int] = {}
+        self._active_since: dict[str, float] = {}
+        self._local = threading.local()
+
+    def record_request(
+        self,
+        method: str,
+        path: str,
+        status: int | None,
+        seconds: float,
+        bytes_out: int = 0,
+        bytes_in: int = 0,
+        retried: bool = False,
+    ):
+        """
+        Record one HTTP attempt. `status` is None when no response arrived
+        (timeout, connection error); `retried` marks attempts that will be
+        retried.
+        """
+        label = endpoint_label(method, path)
+
+        with self._lock:
+            stats = self.endpoints.setdefault(label, new_endpoint_stats())
+            stats["requests"] += 1
+            stats["bytes_out"] += bytes_out
+            stats["bytes_in"] += bytes_in
+            stats["latency_sum"] += seconds
+            stats["latency_max"] = max(stats["latency_max"], seconds)
+
+            status_key = str(status) if status is not None else "error"
+            stats["status"][status_key] = stats["status"].get(status_key, 0) + 1
+            if status is None or status >= 400:
+                stats["errors"] += 1
+            if retried:
+                stats["retries"] += 1
+
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    stats["latency_buckets"][i] += 1
+                    break
+
+    def _phase(self, name: str) -> dict:
+        return self.phases.setdefault(name, {"seconds": 0.0, "thread_seconds": 0.0, "calls": 0})
+
+    def _enter(self, name: str, now: float):
+        count = self._active.get(name, 0)
+        if not count:
+            self._active_since[name] = now
+        self._active[name] = count + 1
+
+    def _leave(self, name: str, now: float):
+        self._active[name] -= 1
+        if not self._active[name]:
+            self._phase(name)["seconds"] += now - self._active_since.pop(name)
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """
+        Time a block of work and add it to phase `name`. A phase entered
+        within another one on the same thread (waiting for image uploads
+        while reading a file) pauses the outer one, so no time is counted
+        in both.
+        """
+        stack = self._local.__dict__.setdefault("stack", [])
+        started = time.perf_counter()
+        with self._lock:
+            if stack:
+                self._leave(stack[-1][0], started)
+            self._enter(name, started)
+        # [name, started, seconds spent in nested phases]
+        stack.append([name, started, 0.0])
+        try:
+            yield
+        finally:
+            _, _, nested = stack.pop()
+            now = time.perf_counter()
+            with self._lock:
+                self._leave(name, now)
+                phase = self._phase(name)
+                phase["thread_seconds"] += now - started - nested
+                phase["calls"] += 1
+                if stack:
+                    self._enter(stack[-1][0], now)
+            if stack:
+                stack[-1][2] += now - started
+
+    def merge_phases(self, other: "ExportMetrics"):
+        """
+        Add the phase timings of `other` (e.g. a parse shared by several
+        exports) to this run's phases.
+        """
+        with other._lock:
+            phases = {name: dict(phase) for name, phase in other.phases.items()}
+
+        with self._lock:
+            for name, phase in phases.items():
+                mine = self._phase(name)
+                for key in ("seconds", "thread_seconds", "calls"):
+                    mine[key] += phase[key]
+
+    def report(self) -> dict:
+        """
+        Return the collected metrics as a JSON-serializable dict.
+        """
+        with self._lock:
+            endpoints = {}
+            for label, stats in sorted(self.endpoints.items()):
+                total = stats["requests"]
+                endpoints[label] = {
+                    "requests": total,
+                    "retries": stats["retries"],
+                    "errors": stats["errors"],
+                    "status": dict(sorted(stats["status"].items())),
+                    "bytes_out": stats["bytes_out"],
+                    "bytes_in": stats["bytes_in"],
+                    "latency": {
+                        "sum": round(stats["latency_sum"], 4),
+                        "mean": round(stats["latency_sum"] / total, 4) if total else None,
+                        "max": round(stats["latency_max"], 4),
+                        "p50": bucket_quantile(stats["latency_buckets"], total, 0.5),
+                        "p95": bucket_quantile(stats["latency_buckets"], total, 0.95),
+                        "buckets": {
+                            ("+Inf" if bound == float("inf") else f"{bound:g}"): count
+                            for bound, count in zip(LATENCY_BUCKETS, stats["latency_buckets"])
+                        },
+                    },
+                }
+
+            phases = {
+                name: {
+                    "seconds": round(phase["seconds"], 4),
+                    "thread_seconds": round(phase["thread_seconds"], 4),
+                    "calls": phase["calls"],
+                }
+                for name, phase in self.phases.items()
+            }
+
+        return {
+            "started": self.started,
+            "elapsed": round(time.time() - self.started, 4),
+            "phases": phases,
+            "endpoints": endpoints,
+        }
+
+    def write_json(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+            f.write("\n")
+
+    def to_prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format, e.g. for
+        a node_exporter textfile collector or a Pushgateway.
+        """
+        report = self.report()
+        lines = [
+            "# HELP notion_export_phase_seconds Wall-clock time spent per export phase.",
+            "# TYPE notion_export_phase_seconds gauge",
+        ]
+        for name, phase in report["phases"].items():
+            lines.append(f'notion_export_phase_seconds{{phase="{name}"}} {phase["seconds"]}')
+
+        lines += [
+            "# HELP notion_export_phase_thread_seconds Time spent per export phase, summed across threads.",
+            "# TYPE notion_export_phase_thread_seconds gauge",
+        ]
+        for name, phase in report["phases"].items():
+            lines.append(
+                f'notion_export_phase_thread_seconds{{phase="{name}"}} {phase["thread_seconds"]}'
+            )
+
+        lines += [
+            "# HELP notion_export_requests_total Notion API requests by endpoint and status.",
+            "# TYPE notion_export_requests_total counter",
+        ]
+        for label, stats in report["endpoints"].items():
+            for status, count in stats["status"].items():
+                lines.append(
+                    f'notion_export_requests_total{{endpoint="{label}",status="{status}"}} {count}'
+                )
+
+        for metric, key, help_text in (
+            ("notion_export_retries_total", "retries", "Notion API attempts that were retried."),
+            ("notion_export_request_bytes_total", "bytes_out", "Request body bytes sent."),
+            ("notion_export_response_bytes_total", "bytes_in", "Response body bytes received."),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            for label, stats in report["endpoints"].items():
+                lines.append(f'{metric}{{endpoint="{label}"}} {stats[key]}')
+
+        lines += [
+            "# HELP notion_export_request_seconds Notion API request latency.",
+            "# TYPE notion_export_request_seconds histogram",
+        ]
+        for label, stats in report["endpoints"].items():
+            cumulative = 0
+            for bound, count in stats["latency"]["buckets"].items():
+                cumulative += count
+                lines.append(
+                    f'notion_export_request_seconds_bucket{{endpoint="{label}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'notion_export_request_seconds_sum{{endpoint="{label}"}} {stats["latency"]["sum"]}'
+            )
+            lines.append(
+                f'notion_export_request_seconds_count{{endpoint="{label}"}} {stats["requests"]}'
+            )
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.to_prometheus(), encoding="utf-8")
+
+    def print_summary(self):
+        """
+        Print where the time went: phases, then endpoints by total latency.
+        """
+        report = self.report()
+
+        print(f"[metrics] Phases ({report['elapsed']:.2f}s elapsed):")
+        for name, phase in report["phases"].items():
+            print(
+                f"[metrics]   {name:<16} {phase['seconds']:>9.2f}s wall  "
+                f"{phase['thread_seconds']:>9.2f}s thread  ({phase['calls']} call(s))"
+            )
+
+        print("[metrics] Endpoints:")
+        by_time = sorted(
+            report["endpoints"].items(), key=lambda item: item[1]["latency"]["sum"], reverse=True
+        )
+        for label, stats in by_time:
+            latency = stats["latency"]
+            print(
+                f"[metrics]   {label:<30} {stats['requests']:>6} req  "
+                f"{latency['sum']:>8.2f}s total  mean {latency['mean'] or 0:.3f}s  "
+                f"p95 <= {latency['p95']:g}s  {stats['retries']} retried  "
+                f"{stats['bytes_out']} B out / {stats['bytes_in']} B in"
+            )
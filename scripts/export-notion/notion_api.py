@@ -0,0 +1,527 @@
+import re
+import time
+import random
+import threading
+from typing import Iterator
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import ExportMetrics
+from ratelimit import TokenBucket
+
+NOTION_API_BASE_URL = "https://api.notion.com/v1"
+NOTION_VERSION = "2025-09-03"  # adjust if you want a newer version
+
+# Notion allows an average of ~3 requests/second per integration.
+NOTION_MAX_REQUESTS_PER_SECOND = 3.0
+NOTION_POOL_SIZE = 16
+
+# Payload limits: blocks per children array, rich_text items per block, and
+# the request body cap (500KB, kept below it to leave room for the envelope).
+NOTION_MAX_BLOCKS_PER_REQUEST = 100
+NOTION_MAX_RICH_TEXT_ITEMS = 100
+NOTION_MAX_REQUEST_BYTES = 450_000
+
+NOTION_MAX_RETRIES = 5
+NOTION_BACKOFF_BASE = 1.0  # seconds, doubled on every attempt
+NOTION_BACKOFF_MAX = 30.0
+NOTION_REQUEST_TIMEOUT = 60.0
+RETRYABLE_STATUS_CODES = {409, 429, 500, 502, 503, 504}
+NOTION_CLOCK_SKEW = 60.0  # seconds, when matching created_time after a failure
+
+# Failures after which a request that creates something (a page, appended
+# blocks) certainly did not reach Notion, so it can be sent again as is.
+# After any other failure it may or may not have been applied.
+UNSENT_STATUS_CODES = {429}
+UNSENT_ERRORS = (requests.ConnectTimeout,)
+
+
+def normalize_notion_id(raw: str) -> str:
+    """
+    Accepts a Notion URL, slug+id, or raw id and returns a dashed UUID.
+    """
+    raw = raw.strip()
+
+    if raw.startswith("http://") or raw.startswith("https://"):
+        raw = raw.split("?")[0].rstrip("/")
+        raw = raw.split("/")[-1]
+
+    cleaned = raw.replace("-", "")
+
+    m = re.search(r"([0-9a-fA-F]{32})", cleaned)
+    if not m:
+        raise ValueError(
+            f"Parent ID '{raw}' does not contain a valid 32-char Notion ID. "
+            f"Make sure you copied the full ID from the Notion URL."
+        )
+
+    hex32 = m.group(1).lower()
+
+    return f"{hex32[0:8]}-{hex32[8:12]}-{hex32[12:16]}-{hex32[16:20]}-{hex32[20:]}"
+
+
+def build_title_property(title: str) -> dict:
+    """
+    Build the `properties` payload that sets a page title.
+    """
+    return {
+        "title": {
+            "title": [
+                {
+                    "type": "text",
+                    "text": {"content": title},
+                }
+            ]
+        }
+    }
+
+
+def created_time_floor() -> str:
+    """
+    The earliest `created_time` Notion can report for something created from
+    now on: it rounds down to the minute, and its clock may be up to
+    NOTION_CLOCK_SKEW seconds behind ours.
+    """
+    return time.strftime("%Y-%m-%dT%H:%M:00.000Z", time.gmtime(time.time() - NOTION_CLOCK_SKEW))
+
+
+def block_text_key(block: dict) -> tuple[str, str]:
+    """
+    Return (type, text) for a block, as sent or as listed by Notion, to
+    recognise blocks that were appended by a request that failed midway.
+    """
+    block_type = block.get("type", "")
+    rich_text = block.get(block_type, {}).get("rich_text", [])
+    text = "".join(
+        item.get("plain_text") or item.get("text", {}).get("content", "")
+        for item in rich_text
+    )
+    return block_type, text
+
+
+class NotionClient:
+    """
+    Thin client for the Notion endpoints used by the exporter.
+
+    One instance holds a keep-alive `requests.Session` whose connection pool
+    is sized for the worker threads, the auth/version headers, a token bucket
+    rate limiter and retry statistics. The session is shared by all threads;
+    every request goes through request(), which handles rate limiting,
+    retries and timeouts in one place, and records each attempt in
+    `metrics`. With `trace`, every attempt is also logged.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        base_url: str = NOTION_API_BASE_URL,
+        max_requests_per_second: float = NOTION_MAX_REQUESTS_PER_SECOND,
+        pool_size: int = NOTION_POOL_SIZE,
+        timeout: float = NOTION_REQUEST_TIMEOUT,
+        max_retries: int = NOTION_MAX_RETRIES,
+        metrics: ExportMetrics | None = None,
+        trace: bool = False,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.limiter = TokenBucket(max_requests_per_second)
+        self.metrics = metrics or ExportMetrics()
+        self.trace = trace
+
+        self.session = requests.Session()
+        self.session.headers.update(
+            {
+                "Authorization": f"Bearer {token}",
+                "Notion-Version": NOTION_VERSION,
+                "Content-Type": "application/json",
+            }
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "throttled": 0,
+            "failed": 0,
+            "retry_sleep": 0.0,
+            "rate_limit_wait": 0.0,
+        }
+        self._stats_lock = threading.Lock()
+
+    def close(self):
+        self.session.close()
+
+    def _record(self, **deltas):
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                self.stats[name] += delta
+
+    def _retry_delay(self, attempt: int, resp: requests.Response | None) -> float:
+        """
+        Seconds to wait before retry number `attempt` (0-based): the server's
+        Retry-After if it sent one, otherwise exponential backoff with equal
+        jitter (between half the backoff and all of it).
+        """
+        if resp is not None:
+            retry_after = resp.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return max(0.0, float(retry_after))
+                except ValueError:
+                    pass
+
+        ceiling = min(NOTION_BACKOFF_MAX, NOTION_BACKOFF_BASE * (2 ** attempt))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def _observe(
+        self,
+        method: str,
+        path: str,
+        resp: requests.Response | None,
+        elapsed: float,
+        retried: bool,
+    ):
+        bytes_out = bytes_in = 0
+        if resp is not None:
+            body = resp.request.body
+            bytes_out = len(body) if body else 0
+            bytes_in = len(resp.content)
+
+        status = resp.status_code if resp is not None else None
+        self.metrics.record_request(
+            method, path, status, elapsed, bytes_out=bytes_out, bytes_in=bytes_in, retried=retried
+        )
+
+        if self.trace:
+            print(
+                f"[http] {method} /{path.lstrip('/')} -> {status or 'no response'} "
+                f"in {elapsed:.3f}s ({bytes_out} B out, {bytes_in} B in)"
+            )
+
+    def request(
+        self, method: str, path: str, retry: bool = True, **kwargs
+    ) -> requests.Response:
+        """
+        Send one request through the rate limiter and return the response.
+
+        429s, transient 5xx/409 responses, timeouts and connection errors are
+        retried up to `max_retries` times, honouring Retry-After. A 429 also
+        throttles the shared limiter, which slows down every worker thread,
+        not just this one. The last response is returned (or the last
+        connection error raised) once retries are exhausted.
+
+        Without `retry`, only one attempt is made and the caller owns the
+        retries, see _send_once().
+        """
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        kwargs.setdefault("timeout", self.timeout)
+        max_retries = self.max_retries if retry else 0
+
+        attempt = 0
+        while True:
+            waited = self.limiter.acquire()
+            self._record(requests=1, rate_limit_wait=waited)
+
+            resp = None
+            started = time.perf_counter()
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                final = attempt >= max_retries
+                self._observe(method, path, None, time.perf_counter() - started, not final)
+                if final:
+                    if retry:
+                        self._record(failed=1)
+                    raise
+                reason = type(e).__name__
+            else:
+                final = resp.status_code not in RETRYABLE_STATUS_CODES or attempt >= max_retries
+                self._observe(method, path, resp, time.perf_counter() - started, not final)
+                if resp.status_code not in RETRYABLE_STATUS_CODES:
+                    self.limiter.recover()
+                    return resp
+                if attempt >= max_retries:
+                    if retry:
+                        self._record(failed=1)
+                    return resp
+                reason = f"HTTP {resp.status_code}"
+
+            delay = self._retry_delay(attempt, resp)
+
+            if resp is not None and resp.status_code == 429:
+                self.limiter.throttle(pause=delay)
+                self._record(throttled=1)
+
+            self._record(retries=1, retry_sleep=delay)
+            print(
+                f"[retry] {method} /{path.lstrip('/')} failed ({reason}), retrying in "
+                f"{delay:.1f}s (attempt {attempt + 1}/{self.max_retries})"
+            )
+            time.sleep(delay)
+            attempt += 1
+
+    def _json(self, method: str, path: str, action: str, **kwargs) -> dict:
+        resp = self.request(method, path, **kwargs)
+        if not resp.ok:
+            raise RuntimeError(f"Failed to {action}: {resp.status_code} {resp.text}")
+        return resp.json()
+
+    def _send_once(self, method: str, path: str, action: str, applied, **kwargs):
+        """
+        Send a request that must not be applied twice, such as creating a
+        page or appending blocks, and return its JSON result.
+
+        It makes at most `max_retries` + 1 attempts, each a single request()
+        without retries of its own. After a failure that means the request
+        never reached Notion (UNSENT_STATUS_CODES, UNSENT_ERRORS) it is sent
+        again as is. After one that leaves this open (a read timeout, a
+        dropped connection, a 5xx/409), `applied()` looks for its effect in
+        the parent's children first: it returns the result to use when the
+        request did go through, and None when it is safe to send it again.
+        """
+        attempt = 0
+        while True:
+            resp = None
+            try:
+                resp = self.request(method, path, retry=False, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    self._record(failed=1)
+                    raise
+                reason = type(e).__name__
+                unsent = isinstance(e, UNSENT_ERRORS)
+            else:
+                if resp.ok:
+                    return resp.json()
+                if resp.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    if resp.status_code in RETRYABLE_STATUS_CODES:
+                        self._record(failed=1)
+                    raise RuntimeError(f"Failed to {action}: {resp.status_code} {resp.text}")
+                reason = f"HTTP {resp.status_code}"
+                unsent = resp.status_code in UNSENT_STATUS_CODES
+
+            if not unsent:
+                result = applied()
+                if result is not None:
+                    print(
+                        f"[retry] {method} /{path.lstrip('/')} failed ({reason}) "
+                        "but had been applied, not sending it again"
+                    )
+                    return result
+
+            delay = self._retry_delay(attempt, resp)
+
+            if resp is not None and resp.status_code == 429:
+                self.limiter.throttle(pause=delay)
+                self._record(throttled=1)
+
+            self._record(retries=1, retry_sleep=delay)
+            print(
+                f"[retry] {method} /{path.lstrip('/')} failed ({reason}) and was not applied, "
+                f"retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})"
+            )
+            time.sleep(delay)
+            attempt += 1
+
+    def create_page(
+        self,
+        parent_page_id: str,
+        title: str,
+        children: list[dict] | None = None,
+    ) -> dict:
+        """
+        Create a page under `parent_page_id` and return the page object.
+        """
+        parent_uuid = normalize_notion_id(parent_page_id)
+        payload = {
+            "parent": {"page_id": parent_uuid},
+            "properties": build_title_property(title),
+            "children": children or [],
+        }
+
+        since = created_time_floor()
+
+        def applied() -> dict | None:
+            # A created page is a child_page block of its parent. Siblings
+            # may already have this title (kept pages), so only one created
+            # since the request was sent counts.
+            pages = [
+                block
+                for block in self.list_children(parent_uuid)
+                if block.get("type") == "child_page"
+                and block["child_page"].get("title") == title
+                and block.get("created_time", "") >= since
+            ]
+            return pages[-1] if pages else None
+
+        return self._send_once("POST", "pages", f"create page '{title}'", applied, json=payload)
+
+    def update_page(self, page_id: str, payload: dict) -> dict:
+        page_uuid = normalize_notion_id(page_id)
+        return self._json("PATCH", f"pages/{page_uuid}", f"update page {page_uuid}", json=payload)
+
+    def set_page_title(self, page_id: str, title: str) -> dict:
+        return self.update_page(page_id, {"properties": build_title_property(title)})
+
+    def archive_page(self, page_id: str) -> dict:
+        """
+        Archive a page (and, implicitly, its whole subtree).
+        """
+        return self.update_page(page_id, {"archived": True})
+
+    def move_page(self, page_id: str, parent_page_id: str) -> dict:
+        """
+        Move a page (with its subtree and id) under another page, where it
+        becomes the last child.
+        """
+        page_uuid = normalize_notion_id(page_id)
+        payload = {"parent": {"type": "page_id", "page_id": normalize_notion_id(parent_page_id)}}
+        return self._json("POST", f"pages/{page_uuid}/move", f"move page {page_uuid}", json=payload)
+
+    def update_block(self, block_id: str, payload: dict) -> dict:
+        block_uuid = normalize_notion_id(block_id)
+        return self._json(
+            "PATCH", f"blocks/{block_uuid}", f"update block {block_uuid}", json=payload
+        )
+
+    def archive_block(self, block_id: str) -> dict:
+        return self.update_block(block_id, {"archived": True})
+
+    def archive(self, block: dict) -> dict:
+        """
+        Archive a child returned by list_children(), through the pages
+        endpoint for child pages and the blocks endpoint for everything else.
+        """
+        if block.get("object") == "page" or block.get("type") == "child_page":
+            return self.archive_page(block["id"])
+        return self.archive_block(block["id"])
+
+    def append_children(
+        self, block_id: str, children: list[dict], after: str | None = None
+    ) -> list[dict]:
+        """
+        Append blocks to a page/block, at the end or right after its child
+        block `after`. Returns the created blocks.
+
+        Callers that know the current last child should pass it as `after`:
+        appending after the last child is the same as appending at the end,
+        and it tells a failed request that was applied apart from one that
+        was not, even when the page already ends with identical blocks.
+        """
+        block_uuid = normalize_notion_id(block_id)
+        payload = {"children": children}
+        if after:
+            payload["after"] = normalize_notion_id(after)
+        since = created_time_floor()
+
+        def applied() -> dict | None:
+            # The blocks would sit right after `after`, or at the end, and
+            # were created since the request was sent.
+            existing = list(self.list_children(block_uuid))
+            if after:
+                ids = [block["id"] for block in existing]
+                if payload["after"] not in ids:
+                    return None
+                start = ids.index(payload["after"]) + 1
+            else:
+                start = len(existing) - len(children)
+            created = existing[start:start + len(children)]
+            if (
+                start < 0
+                or any(block.get("created_time", "") < since for block in created)
+                or [block_text_key(b) for b in created] != [block_text_key(b) for b in children]
+            ):
+                return None
+            return {"results": created}
+
+        data = self._send_once(
+            "PATCH",
+            f"blocks/{block_uuid}/children",
+            f"append children to {block_uuid}",
+            applied,
+            json=payload,
+        )
+        return data.get("results", [])
+
+    def create_file_upload(self, filename: str, content_type: str) -> dict:
+        """
+        Start a single-part file upload and return the file upload object.
+        """
+        payload = {"mode": "single_part", "filename": filename, "content_type": content_type}
+        return self._json(
+            "POST", "file_uploads", f"create file upload for '{filename}'", json=payload
+        )
+
+    def send_file_upload(
+        self,
+        file_upload_id: str,
+        filename: str,
+        data: bytes,
+        content_type: str,
+    ) -> dict:
+        """
+        Send the contents of a file upload as multipart form data. Once this
+        returns, the upload can be attached to blocks by its id.
+        """
+        upload_uuid = normalize_notion_id(file_upload_id)
+        return self._json(
+            "POST",
+            f"file_uploads/{upload_uuid}/send",
+            f"send file upload '{filename}'",
+            files={"file": (filename, data, content_type)},
+            # Drop the session's JSON content type so requests sets the
+            # multipart one, with its boundary.
+            headers={"Content-Type": None},
+        )
+
+    def list_children_pages(self, block_id: str, page_size: int = 100) -> Iterator[dict]:
+        """
+        Yield the raw list responses for the children of a block, one per
+        page of results.
+        """
+        block_uuid = normalize_notion_id(block_id)
+        next_cursor = None
+
+        while True:
+            params = {"page_size": page_size}
+            if next_cursor:
+                params["start_cursor"] = next_cursor
+
+            data = self._json(
+                "GET",
+                f"blocks/{block_uuid}/children",
+                f"list children for block {block_uuid}",
+                params=params,
+            )
+            yield data
+
+            next_cursor = data.get("next_cursor")
+            if not data.get("has_more") or not next_cursor:
+                break
+
+    def list_children(self, block_id: str, page_size: int = 100) -> Iterator[dict]:
+        """
+        Yield every child block of a block/page, following pagination.
+        """
+        for data in self.list_children_pages(block_id, page_size=page_size):
+            yield from data.get("results", [])
+
+    def print_stats(self):
+        """
+        Summarize how many requests this client made and how long it spent
+        waiting on retries and on the rate limiter.
+        """
+        stats = self.stats
+        print(
+            f"[requests] {stats['requests']} request(s), {stats['retries']} retried, "
+            f"{stats['throttled']} rate-limited (429), {stats['failed']} failed after retries"
+        )
+        print(
+            f"[requests] Slept {stats['retry_sleep']:.1f}s in retry backoff, "
+            f"{stats['rate_limit_wait']:.1f}s waiting on the rate limiter across workers "
+            f"(final rate {self.limiter.rate:.2f} req/s)"
+        )
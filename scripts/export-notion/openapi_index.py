@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Compiled index of an OpenAPI spec (api-reference/controlplane.yml), cached
+as JSON next to the other export state.
+
+  python openapi_index.py api-reference/controlplane.yml   # build or load, print a summary
+
+The spec is parsed once into a compact index: operations in path order
+(with path-level parameters merged in), the tags that group them, and the
+component schemas with allOf merged and $ref pointers checked and reduced
+to schema names. The cache is keyed by the spec's sha256, so as long as the
+spec is unchanged, loading the index is a JSON read and YAML is never
+parsed. render_operation() turns one operation into the markdown page the
+Notion export creates for it.
+"""
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+from pathlib import Path
+
+import yaml
+
+INDEX_VERSION = 1
+
+HTTP_METHODS = ("get", "put", "post", "delete", "patch", "head", "options", "trace")
+
+# Operations without a tag are grouped under this one.
+DEFAULT_TAG = "default"
+
+# Nested schemas are expanded this many levels deep in operation pages;
+# deeper ones are shown by name only.
+MAX_SCHEMA_DEPTH = 4
+
+SCHEMA_REF_PREFIX = "#/components/schemas/"
+
+# Schema keywords kept in the index, besides the ones rewritten below.
+SCHEMA_KEYS = ("type", "format", "description", "enum", "default", "example", "nullable", "readOnly")
+
+try:
+    YAML_LOADER = yaml.CSafeLoader
+except AttributeError:
+    YAML_LOADER = yaml.SafeLoader
+
+
+def slugify(text: str) -> str:
+    """
+    URL slug the docs site uses for generated API pages: lowercased, with
+    runs of other characters turned into single dashes.
+    """
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def tag_slug(tag: str) -> str:
+    """
+    Path segment of a tag's generated pages: the tag lowercased, with
+    spaces turned into dashes.
+    """
+    return re.sub(r"\s+", "-", tag.strip().lower())
+
+
+def schema_ref_name(ref: str) -> str:
+    if not ref.startswith(SCHEMA_REF_PREFIX):
+        raise ValueError(f"Unsupported $ref '{ref}' (only {SCHEMA_REF_PREFIX}* is supported)")
+    return ref[len(SCHEMA_REF_PREFIX):]
+
+
+class SchemaCompiler:
+    """
+    Normalizes the schemas of one spec. $ref pointers become {"ref": name}
+    after checking the target exists; allOf members are merged into one
+    object schema (following refs, so inherited fields are listed).
+    """
+
+    def __init__(self, schemas: dict):
+        self.schemas = schemas
+        self.compiled: dict[str, dict] = {}
+        self._merging: set[str] = set()
+
+    def compile_all(self) -> dict[str, dict]:
+        for name in sorted(self.schemas):
+            self.named(name)
+        return self.compiled
+
+    def named(self, name: str) -> dict:
+        if name not in self.compiled:
+            if name not in self.schemas:
+                raise ValueError(f"$ref to unknown schema '{name}'")
+            self.compiled[name] = self.compile(self.schemas[name])
+        return self.compiled[name]
+
+    def compile(self, schema) -> dict:
+        if not isinstance(schema, dict):
+            return {}
+
+        if "$ref" in schema:
+            name = schema_ref_name(schema["$ref"])
+            if name not in self.schemas:
+                raise ValueError(f"$ref to unknown schema '{name}'")
+            return {"ref": name}
+
+        out = {key: schema[key] for key in SCHEMA_KEYS if key in schema}
+
+        if "items" in schema:
+            out["items"] = self.compile(schema["items"])
+        if "properties" in schema:
+            out["properties"] = {
+                field: self.compile(value) for field, value in schema["properties"].items()
+            }
+        if schema.get("required"):
+            out["required"] = list(schema["required"])
+        additional = schema.get("additionalProperties")
+        if isinstance(additional, dict):
+            out["additionalProperties"] = self.compile(additional)
+        elif additional is not None:
+            out["additionalProperties"] = additional
+        for key in ("oneOf", "anyOf"):
+            if key in schema:
+                out[key] = [self.compile(member) for member in schema[key]]
+
+        for member in schema.get("allOf", []):
+            self.merge(out, member)
+
+        return out
+
+    def merge(self, out: dict, member: dict):
+        if "$ref" in member:
+            name = schema_ref_name(member["$ref"])
+            if name in self._merging:
+                raise ValueError(f"allOf cycle through schema '{name}'")
+            self._merging.add(name)
+            try:
+                compiled = self.named(name)
+            finally:
+                self._merging.discard(name)
+        else:
+            compiled = self.compile(member)
+
+        out.setdefault("type", compiled.get("type", "object"))
+        if "properties" in compiled:
+            out.setdefault("properties", {}).update(compiled["properties"])
+        for field in compiled.get("required", []):
+            if field not in out.setdefault("required", []):
+                out["required"].append(field)
+
+
+def compile_parameter(parameter: dict, compiler: SchemaCompiler) -> dict:
+    return {
+        "name": parameter["name"],
+        "in": parameter["in"],
+        "required": bool(parameter.get("required")),
+        "description": parameter.get("description", ""),
+        "schema": compiler.compile(parameter.get("schema")),
+    }
+
+
+def compile_content(content: dict | None, compiler: SchemaCompiler) -> dict:
+    """
+    Keep the first media type of a request/response body (JSON in this spec).
+    """
+    for content_type, media in (content or {}).items():
+        return {"content_type": content_type, "schema": compiler.compile(media.get("schema"))}
+    return {}
+
+
+def compile_openapi_index(spec: dict, digest: str) -> dict:
+    """
+    Build the index of a parsed spec. `digest` is the spec file's sha256.
+    """
+    compiler = SchemaCompiler(spec.get("components", {}).get("schemas", {}))
+
+    operations = []
+    tags: dict[str, list[str]] = {}
+
+    for path, path_item in spec.get("paths", {}).items():
+        shared = [compile_parameter(p, compiler) for p in path_item.get("parameters", [])]
+
+        for method in HTTP_METHODS:
+            operation = path_item.get(method)
+            if operation is None:
+                continue
+
+            parameters = {(p["in"], p["name"]): p for p in shared}
+            for parameter in operation.get("parameters", []):
+                compiled = compile_parameter(parameter, compiler)
+                parameters[(compiled["in"], compiled["name"])] = compiled
+
+            request_body = operation.get("requestBody")
+            body = None
+            if request_body:
+                body = compile_content(request_body.get("content"), compiler)
+                body["required"] = bool(request_body.get("required"))
+                body["description"] = request_body.get("description", "")
+
+            scopes = sorted(
+                {scope for requirement in operation.get("security", []) for scopes in requirement.values()
+                 for scope in scopes}
+            )
+
+            key = f"{method.upper()} {path}"
+            summary = operation.get("summary") or operation.get("operationId") or key
+            operation_tags = operation.get("tags") or [DEFAULT_TAG]
+
+            operations.append(
+                {
+                    "key": key,
+                    "method": method.upper(),
+                    "path": path,
+                    "operation_id": operation.get("operationId"),
+                    "summary": summary,
+                    "description": operation.get("description", ""),
+                    "tags": operation_tags,
+                    "deprecated": bool(operation.get("deprecated")),
+                    "scopes": scopes,
+                    "parameters": list(parameters.values()),
+                    "request_body": body,
+                    "responses": [
+                        {
+                            "status": str(status),
+                            "description": response.get("description", ""),
+                            **compile_content(response.get("content"), compiler),
+                        }
+                        for status, response in operation.get("responses", {}).items()
+                    ],
+                }
+            )
+            # An operation with several tags is listed (and exported) under the first.
+            tags.setdefault(operation_tags[0], []).append(key)
+
+    info = spec.get("info", {})
+    return {
+        "version": INDEX_VERSION,
+        "sha256": digest,
+        "title": info.get("title", ""),
+        "api_version": info.get("version", ""),
+        "tags": tags,
+        "operations": operations,
+        "schemas": compiler.compile_all(),
+    }
+
+
+def load_openapi_index(spec_path: Path, cache_path: Path | None = None) -> tuple[dict, bool]:
+    """
+    Return the index of the spec at `spec_path` and whether it came from
+    `cache_path`. The cache is used when its sha256 matches the spec file's;
+    otherwise the spec is parsed and compiled, and the cache rewritten.
+    """
+    data = spec_path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+
+    if cache_path is not None and cache_path.is_file():
+        try:
+            with cache_path.open("r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION and index.get("sha256") == digest:
+                return index, True
+        except (OSError, ValueError) as e:
+            print(f"[openapi] Ignoring unreadable index {cache_path}: {e}")
+
+    spec = yaml.load(data, Loader=YAML_LOADER)
+    if not isinstance(spec, dict) or "paths" not in spec:
+        raise ValueError(f"{spec_path} is not an OpenAPI spec (no 'paths')")
+    index = compile_openapi_index(spec, digest)
+
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(tmp_path, cache_path)
+
+    return index, False
+
+
+def operation_slug(operation: dict) -> str:
+    return slugify(operation["summary"])
+
+
+def operation_slugs(operations: list[dict]) -> list[str]:
+    """
+    File slugs of the operations of one tag, in order. Summaries are not
+    unique ("List sandboxes" and "List Sandboxes"), so an operation whose
+    summary slug is taken uses its method and path instead, and a number
+    after that if needed.
+    """
+    taken: set[str] = set()
+    slugs = []
+    for operation in operations:
+        slug = operation_slug(operation)
+        if slug in taken:
+            slug = slugify(f"{operation['method']} {operation['path']}")
+        base, n = slug, 1
+        while slug in taken:
+            n += 1
+            slug = f"{base}-{n}"
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def schema_type(schema: dict) -> str:
+    if "ref" in schema:
+        return schema["ref"]
+    if schema.get("type") == "array":
+        return schema_type(schema.get("items", {})) + "[]"
+    if "oneOf" in schema or "anyOf" in schema:
+        return " | ".join(schema_type(member) for member in schema.get("oneOf") or schema.get("anyOf"))
+    type_name = schema.get("type") or "any"
+    if "format" in schema:
+        type_name += f" ({schema['format']})"
+    return type_name
+
+
+def render_fields(schema: dict, schemas: dict, depth: int = 0, seen: tuple = ()) -> list[str]:
+    """
+    Bullet list of the fields of an object schema, expanding nested object
+    schemas (by reference or inline) up to MAX_SCHEMA_DEPTH levels, and
+    each referenced schema at most once per branch.
+    """
+    while True:
+        if "ref" in schema:
+            if schema["ref"] in seen or depth >= MAX_SCHEMA_DEPTH:
+                return []
+            seen = seen + (schema["ref"],)
+            schema = schemas.get(schema["ref"], {})
+        elif schema.get("type") == "array" and "items" in schema:
+            schema = schema["items"]
+        else:
+            break
+
+    lines = []
+    indent = "  " * depth
+    required = set(schema.get("required", []))
+
+    for name, field in schema.get("properties", {}).items():
+        description = field.get("description") or schemas.get(field.get("ref"), {}).get("description", "")
+        flags = [schema_type(field)]
+        if name in required:
+            flags.append("required")
+        if field.get("readOnly"):
+            flags.append("read-only")
+        line = f"{indent}- `{name}` ({', '.join(flags)})"
+        if description:
+            line += ": " + " ".join(description.split())
+        if field.get("enum"):
+            line += " One of: " + ", ".join(f"`{value}`" for value in field["enum"]) + "."
+        lines.append(line)
+        lines.extend(render_fields(field, schemas, depth + 1, seen))
+
+    additional = schema.get("additionalProperties")
+    if isinstance(additional, dict) and additional:
+        lines.append(f"{indent}- `<key>` ({schema_type(additional)})")
+
+    return lines
+
+
+def render_schema(schema: dict, schemas: dict) -> list[str]:
+    if not schema:
+        return []
+    lines = [f"Type: `{schema_type(schema)}`", ""]
+    fields = render_fields(schema, schemas)
+    if fields:
+        lines.extend(fields)
+        lines.append("")
+    return lines
+
+
+def render_operation(index: dict, operation: dict) -> str:
+    """
+    Markdown page for one operation: frontmatter title, method and path,
+    description, required scopes, parameters, request body and responses.
+    """
+    schemas = index["schemas"]
+    title = operation["summary"].replace('"', "'")
+    lines = [
+        "---",
+        f'title: "{title}"',
+        "---",
+        "",
+        f"`{operation['method']} {operation['path']}`",
+        "",
+    ]
+    if operation["deprecated"]:
+        lines += ["**Deprecated.**", ""]
+    if operation["description"]:
+        lines += [operation["description"].strip(), ""]
+    if operation["operation_id"]:
+        lines += [f"Operation ID: `{operation['operation_id']}`", ""]
+
+    if operation["scopes"]:
+        lines += ["## Authorization", ""]
+        lines += ["API key, or OAuth2 with scope " + ", ".join(f"`{s}`" for s in operation["scopes"]), ""]
+
+    if operation["parameters"]:
+        lines += ["## Parameters", ""]
+        for parameter in operation["parameters"]:
+            flags = [parameter["in"], schema_type(parameter["schema"])]
+            if parameter["required"]:
+                flags.append("required")
+            line = f"- `{parameter['name']}` ({', '.join(flags)})"
+            if parameter["description"]:
+                line += ": " + " ".join(parameter["description"].split())
+            lines.append(line)
+        lines.append("")
+
+    body = operation["request_body"]
+    if body:
+        lines += ["## Request body", ""]
+        if body.get("content_type"):
+            lines += [f"Content type: `{body['content_type']}`" + (" (required)" if body["required"] else ""), ""]
+        if body.get("description"):
+            lines += [body["description"].strip(), ""]
+        lines += render_schema(body.get("schema", {}), schemas)
+
+    if operation["responses"]:
+        lines += ["## Responses", ""]
+        for response in operation["responses"]:
+            lines += [f"### {response['status']}", ""]
+            if response["description"]:
+                lines += [response["description"].strip(), ""]
+            lines += render_schema(response.get("schema", {}), schemas)
+
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build (or load) the compiled index of an OpenAPI spec.")
+    parser.add_argument("spec", help="Path to the OpenAPI spec (YAML or JSON)")
+    parser.add_argument("--cache", help="Index cache (default: no cache)")
+    args = parser.parse_args()
+
+    spec_path = Path(args.spec)
+    if not spec_path.is_file():
+        print(f"Error: {spec_path} does not exist")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    index, cached = load_openapi_index(spec_path, Path(args.cache) if args.cache else None)
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"[openapi] {index['title']} {index['api_version']}: {len(index['operations'])} operation(s) "
+        f"in {len(index['tags'])} tag(s), {len(index['schemas'])} schema(s), "
+        f"{'loaded from cache' if cached else 'compiled'} in {elapsed * 1000:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
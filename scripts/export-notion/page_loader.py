@@ -0,0 +1,196 @@
+import io
+import codecs
+import hashlib
+import threading
+from pathlib import Path
+from typing import Iterator
+
+from docs_index import TITLE_RE, read_frontmatter_title
+
+# Characters decoded per read when streaming a page.
+READ_CHUNK_CHARS = 64 * 1024
+
+# Files up to this size are kept in memory after their first read, so the
+# hash, title and content all come from one read. Larger files are streamed.
+CACHE_MAX_BYTES = 1024 * 1024
+
+
+def extract_title_from_frontmatter(md_content: str):
+    """
+    Returns the title string if found, otherwise None.
+
+    Only the lines up to the closing "---" are looked at, so this also works
+    on the first chunk of a longer file.
+    """
+    if not md_content.startswith("---"):
+        return None
+
+    title = None
+    start = md_content.find("\n") + 1
+
+    while start:
+        end = md_content.find("\n", start)
+        line = md_content[start:end if end != -1 else None].strip()
+
+        if line == "---":
+            return title
+
+        m = TITLE_RE.match(line)
+        if m and title is None:
+            title = m.group(1).strip()
+
+        start = end + 1
+
+    return None
+
+
+def new_text_decoder():
+    """
+    Incremental UTF-8 decoder with universal newlines, matching what
+    open(path, "r", encoding="utf-8") returns.
+    """
+    return io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(), translate=True)
+
+
+class PageSource:
+    """
+    A markdown page, read from disk at most once per run wherever possible.
+
+    The page's title, content hash and content are all served from the same
+    read: files up to CACHE_MAX_BYTES are read whole on first use and kept
+    for as long as the PageSource lives; larger files are streamed in
+    READ_CHUNK_CHARS chunks, hashing as they go, so memory stays bounded by
+    the chunk size rather than the file size. Asking a large page for its
+    hash before streaming its content costs a second read.
+    """
+
+    def __init__(self, path: str | Path, size: int | None = None):
+        self.path = Path(path)
+        self.size = size
+        self.reads = 0
+        self._data: bytes | None = None
+        self._hash: str | None = None
+        self._head: str | None = None
+        self._head_is_whole = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def of(cls, source: "str | Path | PageSource") -> "PageSource":
+        return source if isinstance(source, PageSource) else cls(source)
+
+    def _is_small(self) -> bool:
+        if self.size is None:
+            self.size = self.path.stat().st_size
+        return self.size <= CACHE_MAX_BYTES
+
+    def _load(self):
+        with self._lock:
+            if self._data is not None:
+                return
+            data = self.path.read_bytes()
+            self.reads += 1
+            self._hash = hashlib.sha256(data).hexdigest()
+            self._data = data
+
+    def chunks(self) -> Iterator[str]:
+        """
+        Yield the decoded page content in chunks of at most READ_CHUNK_CHARS.
+        """
+        if self._data is None and self._is_small():
+            self._load()
+
+        if self._data is not None:
+            text = new_text_decoder().decode(self._data, final=True)
+            if self._head is None:
+                self._head = text[:READ_CHUNK_CHARS]
+                self._head_is_whole = len(text) <= READ_CHUNK_CHARS
+            for start in range(0, len(text), READ_CHUNK_CHARS):
+                yield text[start:start + READ_CHUNK_CHARS]
+            return
+
+        self.reads += 1
+        digest = hashlib.sha256()
+        decoder = new_text_decoder()
+
+        with self.path.open("rb") as f:
+            while True:
+                raw = f.read(READ_CHUNK_CHARS)
+                digest.update(raw)
+                text = decoder.decode(raw, final=not raw)
+
+                if text:
+                    if self._head is None:
+                        self._head = text
+                        self._head_is_whole = len(raw) < READ_CHUNK_CHARS
+                    yield text
+
+                if not raw:
+                    break
+
+        self._hash = digest.hexdigest()
+
+    def hash(self) -> str:
+        """
+        Return the sha256 hex digest of the file's bytes.
+        """
+        if self._hash is None:
+            if self._is_small():
+                self._load()
+            else:
+                for _ in self.chunks():
+                    pass
+        return self._hash
+
+    def title(self) -> str | None:
+        """
+        Return the frontmatter title. Uses the first chunk already read if
+        there is one, otherwise reads only the frontmatter lines.
+        """
+        if self._head is None and self._data is not None:
+            self._head = new_text_decoder().decode(self._data[:READ_CHUNK_CHARS])
+            self._head_is_whole = len(self._data) <= READ_CHUNK_CHARS
+
+        if self._head is not None:
+            title = extract_title_from_frontmatter(self._head)
+            if title is not None or self._head_is_whole:
+                return title
+
+        return read_frontmatter_title(self.path)
+
+
+class TextPageSource(PageSource):
+    """
+    A page generated in memory (e.g. from the OpenAPI spec) rather than read
+    from a file. `path` is where the page would live in the docs tree; it
+    is only used for display, docs URLs and resolving relative references.
+    """
+
+    def __init__(self, path: str | Path, text: str):
+        data = text.encode("utf-8")
+        super().__init__(path, size=len(data))
+        self._data = data
+        self._hash = hashlib.sha256(data).hexdigest()
+
+
+class PageCache:
+    """
+    One PageSource per file, shared by every export in the run (e.g. one
+    per target), so each file is read once no matter how many times it is
+    exported. Small files stay in memory until the cache is dropped.
+    """
+
+    def __init__(self):
+        self._sources: dict[Path, PageSource] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str | Path) -> PageSource:
+        path = Path(path)
+        with self._lock:
+            source = self._sources.get(path)
+            if source is None:
+                source = self._sources[path] = PageSource(path)
+            return source
+
+    def sources(self) -> list[PageSource]:
+        with self._lock:
+            return list(self._sources.values())
@@ -0,0 +1,87 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by every Notion request of the process.
+
+    `rate` tokens are added per second up to `capacity`. Callers reserve a
+    token up front and sleep outside the lock until it is due, so waiting
+    threads are served roughly in arrival order.
+
+    The rate adapts to the server: throttle() halves it (down to `min_rate`)
+    and can pause every caller for a while, and recover() raises it again by
+    `recovery_step` per successful request, up to the initial rate.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        min_rate: float | None = None,
+        recovery_step: float = 0.05,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 8
+        self.recovery_step = recovery_step
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Block until `tokens` are available. Returns the time spent waiting.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+
+        return wait
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        Take `tokens` if they are available right now, without waiting.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def throttle(self, pause: float = 0.0):
+        """
+        Halve the rate after the server pushed back, and make sure no new
+        token is handed out for at least `pause` seconds.
+        """
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            if pause > 0:
+                self._tokens = min(self._tokens, 0.0) - pause * self.rate
+
+    def recover(self):
+        """
+        Nudge the rate back up after a successful request.
+        """
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill()
+                self.rate = min(self.max_rate, self.rate + self.recovery_step)
@@ -0,0 +1,78 @@
+import heapq
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+from targets import inherit_log_prefix
+
+
+def run_dependency_graph(
+    deps: list[list[int]],
+    work: Callable[[int, list], Any],
+    max_workers: int,
+    on_release: Callable[[int, Any], None] | None = None,
+) -> list:
+    """
+    Run `work(i, results)` for every task index once all of `deps[i]` have
+    finished. `results` holds the results of finished tasks, so a task can
+    read what its dependencies produced.
+
+    - Ready tasks are started lowest index first, on at most `max_workers`
+      threads, so a preorder task list makes progress top to bottom.
+    - `on_release(i, result)` is called from the calling thread strictly in
+      index order, as soon as task i and every task before it are done. This
+      keeps logs and counters deterministic while work runs out of order.
+
+    Returns the list of results, indexed like `deps`.
+    """
+    max_workers = max(1, max_workers)
+    count = len(deps)
+    results: list = [None] * count
+    done = [False] * count
+
+    remaining = [len(d) for d in deps]
+    dependents: list[list[int]] = [[] for _ in range(count)]
+    for index, task_deps in enumerate(deps):
+        for dep in task_deps:
+            dependents[dep].append(index)
+
+    ready = [index for index in range(count) if remaining[index] == 0]
+    heapq.heapify(ready)
+
+    released = 0
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers, initializer=inherit_log_prefix()
+    ) as executor:
+        running = {}
+
+        while ready or running:
+            while ready and len(running) < max_workers:
+                index = heapq.heappop(ready)
+                running[executor.submit(work, index, results)] = index
+
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                index = running.pop(future)
+                results[index] = future.result()
+                done[index] = True
+
+                for dependent in dependents[index]:
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        heapq.heappush(ready, dependent)
+
+            while released < count and done[released]:
+                if on_release is not None:
+                    on_release(released, results[released])
+                released += 1
+
+    if released < count:
+        raise RuntimeError(
+            f"Dependency graph has a cycle: {count - released} task(s) never became ready."
+        )
+
+    return results
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Full-text search index of the docs, as a single SQLite database.
+
+  python search_index.py build .                 # or: build . --db search.db
+  python search_index.py query "sandbox ports"   # ranked results, as text or --json
+
+Both commands find the database at <root_dir>/.docs-search.db unless given
+--db; `query` takes the docs directory as --root-dir (default: .).
+
+The pages are the ones docs.json navigates to, resolved the same way as
+for the Notion export. Each page is one row of the `pages` table (slug,
+title, group path, docs URL, section headings and body text with the MDX
+markup removed), indexed by the `pages_fts` FTS5 table. Rebuilds only
+re-read the text of pages whose file hash changed.
+"""
+import re
+import sys
+import json
+import time
+import sqlite3
+import argparse
+from pathlib import Path
+
+import main as exporter
+from docs_index import DocsIndex
+from page_loader import PageSource, extract_title_from_frontmatter
+
+DEFAULT_DB_NAME = ".docs-search.db"
+SCHEMA_VERSION = 1
+
+# bm25() column weights, in pages_fts column order.
+RANK_WEIGHTS = {"title": 10.0, "headings": 5.0, "group_path": 2.0, "body": 1.0}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    slug TEXT UNIQUE NOT NULL,
+    title TEXT NOT NULL,
+    group_path TEXT NOT NULL,
+    url TEXT NOT NULL,
+    headings TEXT NOT NULL,
+    body TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    {", ".join(RANK_WEIGHTS)},
+    content='pages',
+    content_rowid='id',
+    tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages BEGIN
+    INSERT INTO pages_fts(rowid, {", ".join(RANK_WEIGHTS)})
+    VALUES (new.id, {", ".join("new." + c for c in RANK_WEIGHTS)});
+END;
+CREATE TRIGGER IF NOT EXISTS pages_ad AFTER DELETE ON pages BEGIN
+    INSERT INTO pages_fts(pages_fts, rowid, {", ".join(RANK_WEIGHTS)})
+    VALUES ('delete', old.id, {", ".join("old." + c for c in RANK_WEIGHTS)});
+END;
+CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE ON pages BEGIN
+    INSERT INTO pages_fts(pages_fts, rowid, {", ".join(RANK_WEIGHTS)})
+    VALUES ('delete', old.id, {", ".join("old." + c for c in RANK_WEIGHTS)});
+    INSERT INTO pages_fts(rowid, {", ".join(RANK_WEIGHTS)})
+    VALUES (new.id, {", ".join("new." + c for c in RANK_WEIGHTS)});
+END;
+"""
+
+FRONTMATTER_RE = re.compile(r"\A---\n.*?\n---\n", re.DOTALL)
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+IMPORT_RE = re.compile(r"^\s*(import|export)\s")
+JSX_COMMENT_RE = re.compile(r"\{/\*.*?\*/\}|<!--.*?-->", re.DOTALL)
+# Text-bearing attributes of MDX components, e.g. <Card title="...">.
+JSX_TEXT_ATTR_RE = re.compile(r'\b(?:title|description|label|alt)\s*=\s*"([^"]*)"')
+JSX_TAG_RE = re.compile(r"</?[A-Za-z][\w.]*(?:\s[^<>]*?)?/?>", re.DOTALL)
+IMAGE_RE = re.compile(r"!\[([^\]]*)\]\([^)]*\)")
+LINK_RE = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+MARKUP_RE = re.compile(r"[*_`]{1,3}|^\s*>\s?|^\s*[-+*]\s+|^\s*\|?[\s:|-]+\|[\s:|-]*$|\|", re.MULTILINE)
+SPACE_RE = re.compile(r"[ \t]+")
+
+
+def mdx_to_text(md_content: str) -> tuple[list[str], str]:
+    """
+    Strip a page down to searchable text. Returns (section headings, body):
+    frontmatter, imports/exports, comments and component tags are dropped
+    (keeping the text inside components and their title/description
+    attributes), links and images keep their text, code keeps its content.
+    """
+    text = FRONTMATTER_RE.sub("", md_content.replace("\r\n", "\n"), count=1)
+    text = JSX_COMMENT_RE.sub(" ", text)
+
+    headings = []
+    lines = []
+    in_code = False
+
+    for line in text.split("\n"):
+        if FENCE_RE.match(line):
+            in_code = not in_code
+            continue
+        if in_code:
+            lines.append(line)
+            continue
+        if IMPORT_RE.match(line):
+            continue
+
+        m = HEADING_RE.match(line)
+        if m:
+            heading = JSX_TAG_RE.sub(" ", m.group(2)).strip()
+            if heading:
+                headings.append(LINK_RE.sub(r"\1", heading))
+            line = m.group(2)
+        lines.append(line)
+
+    body = "\n".join(lines)
+    body = JSX_TEXT_ATTR_RE.sub(r" \1 ", body)
+    body = JSX_TAG_RE.sub(" ", body)
+    body = IMAGE_RE.sub(r"\1", body)
+    body = LINK_RE.sub(r"\1", body)
+    body = MARKUP_RE.sub(" ", body)
+    body = "\n".join(
+        stripped for stripped in (SPACE_RE.sub(" ", line).strip() for line in body.split("\n")) if stripped
+    )
+    return headings, body
+
+
+def iter_nav_pages(nodes: list[dict], group_path: tuple[str, ...] = ()):
+    """
+    Yield (node, group path) for every file-backed navigation node, in
+    navigation order.
+    """
+    for node in nodes:
+        if node.get("file") is not None:
+            yield node, group_path
+        if node.get("children"):
+            child_path = group_path if node.get("file") is not None else group_path + (node["title"],)
+            yield from iter_nav_pages(node["children"], child_path)
+
+
+def open_index(db_path: Path) -> sqlite3.Connection:
+    """
+    Open (creating if needed) the search database. A database with another
+    schema version is rebuilt from scratch.
+    """
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+
+    row = None
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+    except sqlite3.OperationalError:
+        pass
+
+    if row is not None and row[0] != str(SCHEMA_VERSION):
+        print(f"[search] Schema of {db_path} changed, rebuilding it.")
+        conn.close()
+        db_path.unlink()
+        conn = sqlite3.connect(db_path)
+
+    conn.executescript(SCHEMA)
+    conn.execute(
+        "INSERT OR REPLACE INTO meta(key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),)
+    )
+    return conn
+
+
+def build_index(root_dir: Path, db_path: Path) -> dict:
+    """
+    Bring the database at `db_path` in line with the pages docs.json
+    navigates to. Pages whose file hash is unchanged are not re-parsed;
+    only their navigation fields are refreshed. Returns counts of added,
+    updated, unchanged and removed pages.
+    """
+    started = time.perf_counter()
+    root_dir = root_dir.resolve()
+
+    docs_json = exporter.load_docs_structure(root_dir)
+    index = DocsIndex(root_dir, read_titles=False)
+    nav_nodes = exporter.build_nav_nodes(docs_json, root_dir, index)
+
+    counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+    conn = open_index(db_path)
+
+    with conn:
+        existing = {
+            row[1]: row
+            for row in conn.execute("SELECT id, slug, hash, group_path, url, position FROM pages")
+        }
+        seen: set[str] = set()
+
+        for position, (node, group_path) in enumerate(iter_nav_pages(nav_nodes)):
+            file_path: Path = node["file"]
+            slug = file_path.relative_to(root_dir).with_suffix("").as_posix()
+            if slug in seen:
+                # Listed more than once in the navigation: index the first.
+                continue
+            seen.add(slug)
+
+            source = PageSource(file_path)
+            content_hash = source.hash()
+            nav_fields = (" > ".join(group_path), exporter.build_docs_url(root_dir, file_path), position)
+
+            if slug in existing and existing[slug][2] == content_hash:
+                if existing[slug][3:] != nav_fields:
+                    conn.execute(
+                        "UPDATE pages SET group_path = ?, url = ?, position = ? WHERE id = ?",
+                        (*nav_fields, existing[slug][0]),
+                    )
+                counts["unchanged"] += 1
+                continue
+
+            md_content = "".join(source.chunks())
+            headings, body = mdx_to_text(md_content)
+            title = extract_title_from_frontmatter(md_content) or file_path.stem
+            fields = (title, *nav_fields[:2], "\n".join(headings), body, content_hash, position)
+
+            if slug in existing:
+                conn.execute(
+                    "UPDATE pages SET title = ?, group_path = ?, url = ?, headings = ?, body = ?, "
+                    "hash = ?, position = ? WHERE id = ?",
+                    (*fields, existing[slug][0]),
+                )
+                counts["updated"] += 1
+            else:
+                conn.execute(
+                    "INSERT INTO pages(title, group_path, url, headings, body, hash, position, slug) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (*fields, slug),
+                )
+                counts["added"] += 1
+
+        for slug, row in existing.items():
+            if slug not in seen:
+                conn.execute("DELETE FROM pages WHERE id = ?", (row[0],))
+                counts["removed"] += 1
+
+        if counts["added"] or counts["updated"] or counts["removed"]:
+            conn.execute("INSERT INTO pages_fts(pages_fts) VALUES ('optimize')")
+
+    conn.close()
+
+    print(
+        f"[search] Indexed {len(seen)} page(s) into {db_path} in {time.perf_counter() - started:.2f}s: "
+        f"{counts['added']} added, {counts['updated']} updated, {counts['unchanged']} unchanged, "
+        f"{counts['removed']} removed"
+    )
+    return counts
+
+
+def build_match_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 query: every word must match, the last one
+    as a prefix (so results show up while typing).
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        raise ValueError("Query has no searchable words")
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search(db_path: Path, query: str, limit: int = 10, raw: bool = False) -> list[dict]:
+    """
+    Return up to `limit` pages matching `query`, best first, each as
+    {"slug", "title", "group_path", "url", "snippet", "score"}. With `raw`,
+    `query` is passed to FTS5 as is (AND/OR/NOT, "phrases", column:term).
+    """
+    if not db_path.is_file():
+        raise ValueError(f"Search index not found: {db_path} (run `build` first)")
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            f"""
+            SELECT p.slug, p.title, p.group_path, p.url,
+                   snippet(pages_fts, 3, '[', ']', '...', 12),
+                   bm25(pages_fts, {", ".join(str(w) for w in RANK_WEIGHTS.values())}) AS score
+            FROM pages_fts JOIN pages p ON p.id = pages_fts.rowid
+            WHERE pages_fts MATCH ?
+            ORDER BY score, p.position
+            LIMIT ?
+            """,
+            (query if raw else build_match_query(query), limit),
+        ).fetchall()
+    except sqlite3.OperationalError as e:
+        raise ValueError(f"Invalid search query {query!r}: {e}") from e
+    finally:
+        conn.close()
+
+    return [
+        {
+            "slug": slug,
+            "title": title,
+            "group_path": group_path,
+            "url": url,
+            "snippet": snippet.replace("\n", " "),
+            "score": round(-score, 3),
+        }
+        for slug, title, group_path, url, snippet, score in rows
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or query the docs search index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="Create or update the index")
+    build_parser.add_argument("root_dir", nargs="?", default=".",
+                              help=f"Docs directory with {exporter.DOCS_JSON_NAME} (default: .)")
+    build_parser.add_argument("--db", help=f"Database file (default: <root_dir>/{DEFAULT_DB_NAME})")
+
+    query_parser = commands.add_parser("query", help="Search the index")
+    query_parser.add_argument("query", help="Words to search for")
+    query_parser.add_argument("--root-dir", default=".",
+                              help="Docs directory the index was built for (default: .)")
+    query_parser.add_argument("--db", help=f"Database file (default: <root-dir>/{DEFAULT_DB_NAME})")
+    query_parser.add_argument("--limit", type=int, default=10)
+    query_parser.add_argument("--raw", action="store_true",
+                              help="Pass the query to FTS5 unchanged (AND/OR/NOT, phrases, prefixes)")
+    query_parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        root_dir = Path(args.root_dir)
+        if not (root_dir / exporter.DOCS_JSON_NAME).is_file():
+            print(f"Error: {exporter.DOCS_JSON_NAME} not found in {root_dir}")
+            sys.exit(1)
+        exporter.VERBOSITY = 0
+        build_index(root_dir, Path(args.db) if args.db else root_dir / DEFAULT_DB_NAME)
+        return
+
+    started = time.perf_counter()
+    try:
+        db_path = Path(args.db) if args.db else Path(args.root_dir) / DEFAULT_DB_NAME
+        results = search(db_path, args.query, limit=args.limit, raw=args.raw)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for rank, result in enumerate(results, start=1):
+        print(f"{rank:>2}. {result['title']}  ({result['group_path']})")
+        print(f"    {result['url']}")
+        print(f"    {result['snippet']}")
+    print(f"[search] {len(results)} result(s) in {elapsed_ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Partitioning of the navigation tree for sharded exports (main.py
+--prepare-shards / --shard-index / --merge-shards), so one full export can
+run as several CI jobs, each with its own process and token.
+
+The tree is split into units: whole tabs, or the top-level groups of a tab
+that alone is heavier than one shard's fair share. Each unit is exported
+under a section page created beforehand, so sibling order in Notion does
+not depend on which job finishes first. Units are weighted by page count
+and content size and spread over the shards greedily, heaviest first, onto
+the lightest shard. The partition only depends on the navigation tree, so
+every job of a run computes the same one from the same checkout.
+"""
+import os
+import json
+from pathlib import Path
+
+SHARD_FILE_VERSION = 1
+
+# Creating a page costs about as many requests as this much content.
+PAGE_WEIGHT_BYTES = 4096
+
+
+def node_weight(node: dict) -> tuple[int, int]:
+    """
+    Return (pages, bytes) for a navigation subtree: every node becomes a
+    Notion page (or link block), and file-backed ones carry their content.
+    """
+    pages, size = 1, 0
+    source = node.get("source")
+    if source is not None and source.size is not None:
+        size = source.size
+    elif node.get("file") is not None:
+        try:
+            size = os.stat(node["file"]).st_size
+        except OSError:
+            pass
+
+    for child in node.get("children", []):
+        child_pages, child_size = node_weight(child)
+        pages += child_pages
+        size += child_size
+    return pages, size
+
+
+def shard_units(nav_nodes: list[dict], shard_count: int) -> list[dict]:
+    """
+    Split the navigation tree into units, in navigation order:
+
+      unit = {"node", "parent": key of the tab a group unit belongs to (or
+              None for a tab), "pages", "bytes", "weight"}
+
+    A tab becomes a single unit unless it weighs more than 1/shard_count of
+    the whole tree, in which case each of its groups does.
+    """
+    def unit(node: dict, parent: str | None) -> dict:
+        pages, size = node_weight(node)
+        return {
+            "node": node,
+            "parent": parent,
+            "pages": pages,
+            "bytes": size,
+            "weight": pages * PAGE_WEIGHT_BYTES + size,
+        }
+
+    tabs = [unit(node, None) for node in nav_nodes]
+    fair_share = sum(tab["weight"] for tab in tabs) / max(1, shard_count)
+
+    units = []
+    for tab in tabs:
+        children = tab["node"].get("children", [])
+        if tab["weight"] > fair_share and len(children) > 1:
+            units.extend(unit(child, tab["node"]["key"]) for child in children)
+        else:
+            units.append(tab)
+    return units
+
+
+def partition_nav_nodes(nav_nodes: list[dict], shard_count: int) -> list[list[dict]]:
+    """
+    Return the units (see shard_units()) of each of `shard_count` shards,
+    each list in navigation order. Ties are broken by position, so the
+    result is deterministic.
+    """
+    if shard_count < 1:
+        raise ValueError("shard count must be at least 1")
+
+    units = shard_units(nav_nodes, shard_count)
+    shards: list[list[int]] = [[] for _ in range(shard_count)]
+    loads = [0] * shard_count
+
+    for position in sorted(range(len(units)), key=lambda i: (-units[i]["weight"], i)):
+        lightest = min(range(shard_count), key=lambda i: (loads[i], i))
+        shards[lightest].append(position)
+        loads[lightest] += units[position]["weight"]
+
+    return [[units[position] for position in sorted(positions)] for positions in shards]
+
+
+def section_nodes(shards: list[list[dict]], nav_nodes: list[dict]) -> list[tuple[dict, str | None]]:
+    """
+    Return the (node, parent key) of every section page a sharded export
+    creates up front, in creation order: each tab, followed by its groups
+    when the tab was split into group units.
+    """
+    split_tabs = {unit["parent"] for units in shards for unit in units if unit["parent"] is not None}
+
+    sections = []
+    for tab in nav_nodes:
+        sections.append((tab, None))
+        if tab["key"] in split_tabs:
+            sections.extend((group, tab["key"]) for group in tab.get("children", []))
+    return sections
+
+
+def shard_result_path(results_dir: Path, shard_index: int) -> Path:
+    return results_dir / f"shard-{shard_index}.json"
+
+
+def save_shard_file(path: Path, data: dict):
+    """
+    Atomically write a shard plan or result file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump({"version": SHARD_FILE_VERSION, **data}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    os.replace(tmp_path, path)
+
+
+def load_shard_file(path: Path, what: str) -> dict:
+    """
+    Read a shard plan or result file, raising RuntimeError if it is missing
+    or unusable. `what` names the file in error messages.
+    """
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        raise RuntimeError(f"No {what} at {path}") from None
+    except (OSError, ValueError) as e:
+        raise RuntimeError(f"Unreadable {what} {path}: {e}") from e
+
+    if data.get("version") != SHARD_FILE_VERSION:
+        raise RuntimeError(f"{what.capitalize()} {path} has an unknown version")
+    return data
@@ -0,0 +1,758 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the subset of the Notion API used by the exporter.
+
+It keeps pages and blocks in memory and implements:
+
+  POST   /v1/pages                    create a page (with initial children)
+  GET    /v1/pages/{id}               retrieve a page
+  PATCH  /v1/pages/{id}               update title / archive
+  POST   /v1/pages/{id}/move          move a page under another page
+  GET    /v1/blocks/{id}              retrieve a block
+  PATCH  /v1/blocks/{id}              update / archive a block
+  DELETE /v1/blocks/{id}              archive a block
+  GET    /v1/blocks/{id}/children     list children (paginated, id cursors)
+  PATCH  /v1/blocks/{id}/children     append children
+  POST   /v1/file_uploads             start a single-part file upload
+  POST   /v1/file_uploads/{id}/send   send its contents (multipart/form-data)
+
+Payload limits (blocks per request, rich_text items per block, text length,
+two levels of nested children and request size) are enforced like the real
+API, as are code block languages, link URLs and the `after` position of
+appends; image blocks must reference a sent file upload, link_to_page
+blocks an existing page, and latency, server-side rate limiting and random
+429/5xx errors are configurable.
+
+Control endpoints, not part of the Notion API:
+
+  GET  /__stats           request counts, status codes and bytes per endpoint
+  POST /__reset           reset the statistics
+  GET  /__tree/{id}       nested outline of a page, for assertions
+
+Usage:
+  python standin.py --port 8765 --latency 0.2 --rate-limit 3
+  NOTION_API_BASE_URL=http://127.0.0.1:8765/v1 NOTION_TOKEN=x \\
+  NOTION_ROOT_PAGE=<root id printed at startup> python main.py .
+"""
+import re
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from markdown_blocks import NOTION_CODE_LANGUAGES, NOTION_MAX_NESTING
+from ratelimit import TokenBucket
+
+DEFAULT_ROOT_PAGE_ID = "00000000-0000-4000-8000-000000000001"
+
+MAX_BLOCKS_PER_REQUEST = 100
+MAX_RICH_TEXT_ITEMS = 100
+MAX_TEXT_LENGTH = 2000
+MAX_REQUEST_BYTES = 500_000
+MAX_FILE_UPLOAD_BYTES = 20 * 1024 * 1024
+
+ID_RE = r"[0-9a-fA-F-]{32,36}"
+
+
+class NotionStandin:
+    """
+    In-memory page/block store plus the knobs that shape its behaviour.
+    """
+
+    def __init__(
+        self,
+        root_page_id: str = DEFAULT_ROOT_PAGE_ID,
+        latency: float = 0.0,
+        rate_limit: float | None = None,
+        throttle_rate: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int | None = None,
+        supports_move: bool = True,
+    ):
+        self.root_page_id = root_page_id
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.limiter = TokenBucket(rate_limit) if rate_limit else None
+        self.random = random.Random(seed)
+        self.supports_move = supports_move
+
+        self.lock = threading.Lock()
+        self.blocks: dict[str, dict] = {}
+        self.children: dict[str, list[str]] = {}
+        self.file_uploads: dict[str, dict] = {}
+        self.reset_stats()
+
+        self._add(
+            {
+                "object": "page",
+                "id": root_page_id,
+                "parent": {"type": "workspace", "workspace": True},
+                "title": "Root",
+            }
+        )
+
+    def add_workspace_page(self, title: str) -> str:
+        """
+        Add a page at the top of the workspace, beside the root page (e.g. a
+        blue/green staging page). Returns its id.
+        """
+        page_id = str(uuid.uuid4())
+        self._add(
+            {
+                "object": "page",
+                "id": page_id,
+                "parent": {"type": "workspace", "workspace": True},
+                "title": title,
+            }
+        )
+        return page_id
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {
+                "requests": 0,
+                "bytes_in": 0,
+                "bytes_out": 0,
+                "status": {},
+                "endpoints": {},
+            }
+
+    def record(self, endpoint: str, status: int, bytes_in: int, bytes_out: int):
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["bytes_in"] += bytes_in
+            self.stats["bytes_out"] += bytes_out
+            key = str(status)
+            self.stats["status"][key] = self.stats["status"].get(key, 0) + 1
+
+            entry = self.stats["endpoints"].setdefault(
+                endpoint, {"requests": 0, "bytes_in": 0, "bytes_out": 0}
+            )
+            entry["requests"] += 1
+            entry["bytes_in"] += bytes_in
+            entry["bytes_out"] += bytes_out
+
+    def should_reject(self) -> int | None:
+        """
+        Decide whether to fail the current request with 429/503.
+        """
+        if self.limiter is not None and not self.limiter.try_acquire():
+            return 429
+        roll = self.random.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 503
+        return None
+
+    # -- store ---------------------------------------------------------
+
+    def _add(self, block: dict, parent_id: str | None = None, after: str | None = None):
+        block.setdefault("archived", False)
+        block.setdefault("created_time", notion_time())
+        self.blocks[block["id"]] = block
+        self.children.setdefault(block["id"], [])
+
+        if parent_id is not None:
+            siblings = self.children.setdefault(parent_id, [])
+            if after and after in siblings:
+                siblings.insert(siblings.index(after) + 1, block["id"])
+            else:
+                siblings.append(block["id"])
+
+    def _new_block(self, payload: dict, parent_id: str, after: str | None = None) -> dict:
+        """
+        Store a block from a request payload, with its nested children.
+        """
+        block_type = payload.get("type") or next(
+            (k for k in payload if k not in ("object", "type")), "unsupported"
+        )
+        data = dict(payload.get(block_type, {}))
+        children = data.pop("children", [])
+        block = {
+            "object": "block",
+            "id": str(uuid.uuid4()),
+            "parent": {"type": "block_id", "block_id": parent_id},
+            "type": block_type,
+            block_type: data,
+            "has_children": False,
+        }
+        self._add(block, parent_id, after=after)
+        for child in children:
+            self._new_block(child, block["id"])
+        return block
+
+    def find(self, block_id: str) -> dict | None:
+        """
+        Return a block/page unless it or one of its ancestors is archived.
+        """
+        block = self.blocks.get(normalize(block_id))
+        node = block
+        while node is not None:
+            if node["archived"]:
+                return None
+            parent = node.get("parent", {})
+            node = self.blocks.get(parent.get("page_id") or parent.get("block_id") or "")
+        return block
+
+    def public(self, block: dict) -> dict:
+        if block["object"] == "page":
+            return {
+                "object": "page",
+                "id": block["id"],
+                "url": f"https://notion.standin/{block['id'].replace('-', '')}",
+                "parent": block["parent"],
+                "created_time": block["created_time"],
+                "archived": block["archived"],
+                "properties": {"title": {"title": [{"text": {"content": block["title"]}}]}},
+            }
+        data = {k: v for k, v in block.items() if k != "title"}
+        data["has_children"] = bool(self.live_children(block["id"]))
+        return data
+
+    def live_children(self, block_id: str) -> list[str]:
+        return [c for c in self.children.get(block_id, []) if not self.blocks[c]["archived"]]
+
+    def create_page(self, body: dict) -> tuple[int, dict]:
+        parent_id = (body.get("parent") or {}).get("page_id")
+        if not parent_id or self.find(parent_id) is None:
+            return 404, error("object_not_found", f"Could not find page with ID: {parent_id}.")
+
+        problem = (
+            validate_children(body.get("children", []))
+            or self.check_file_uploads(body.get("children", []))
+            or self.check_links(body.get("children", []))
+        )
+        if problem:
+            return 400, error("validation_error", problem)
+
+        title = "".join(
+            part.get("text", {}).get("content", "")
+            for part in body.get("properties", {}).get("title", {}).get("title", [])
+        )
+        page_id = str(uuid.uuid4())
+        parent_uuid = normalize(parent_id)
+
+        page = {
+            "object": "page",
+            "id": page_id,
+            "parent": {"type": "page_id", "page_id": parent_uuid},
+            "title": title,
+        }
+        self._add(page, parent_uuid)
+
+        for child in body.get("children", []):
+            self._new_block(child, page_id)
+
+        return 200, self.public(page)
+
+    def update_page(self, page_id: str, body: dict) -> tuple[int, dict]:
+        page = self.blocks.get(normalize(page_id))
+        if page is None or page["object"] != "page":
+            return 404, error("object_not_found", f"Could not find page with ID: {page_id}.")
+
+        if body.get("archived") or body.get("in_trash"):
+            page["archived"] = True
+        elif body.get("archived") is False or body.get("in_trash") is False:
+            page["archived"] = False
+
+        title_parts = body.get("properties", {}).get("title", {}).get("title")
+        if title_parts is not None:
+            page["title"] = "".join(p.get("text", {}).get("content", "") for p in title_parts)
+
+        return 200, self.public(page)
+
+    def move_page(self, page_id: str, body: dict) -> tuple[int, dict]:
+        if not self.supports_move:
+            return 400, error("invalid_request_url", f"Invalid request URL: /v1/pages/{page_id}/move")
+
+        page = self.find(page_id)
+        if page is None or page["object"] != "page":
+            return 404, error("object_not_found", f"Could not find page with ID: {page_id}.")
+
+        parent_id = (body.get("parent") or {}).get("page_id")
+        target = self.find(parent_id) if parent_id else None
+        if target is None:
+            return 404, error("object_not_found", f"Could not find page with ID: {parent_id}.")
+
+        node = target
+        while node is not None:
+            if node["id"] == page["id"]:
+                return 400, error("validation_error", "Cannot move a page under itself.")
+            parent = node.get("parent", {})
+            node = self.blocks.get(parent.get("page_id") or parent.get("block_id") or "")
+
+        old_parent = page["parent"].get("page_id") or page["parent"].get("block_id")
+        if old_parent in self.children:
+            self.children[old_parent].remove(page["id"])
+        self.children[target["id"]].append(page["id"])
+        page["parent"] = {"type": "page_id", "page_id": target["id"]}
+
+        return 200, self.public(page)
+
+    def list_children(self, block_id: str, query: dict) -> tuple[int, dict]:
+        if self.find(block_id) is None:
+            return 404, error("object_not_found", f"Could not find block with ID: {block_id}.")
+
+        page_size = min(int(query.get("page_size", ["100"])[0]), 100)
+        cursor = query.get("start_cursor", [None])[0]
+        kids = self.live_children(normalize(block_id))
+
+        start = kids.index(cursor) if cursor in kids else 0
+        page = kids[start:start + page_size]
+        has_more = start + page_size < len(kids)
+
+        results = []
+        for child_id in page:
+            child = self.blocks[child_id]
+            if child["object"] == "page":
+                results.append(
+                    {
+                        "object": "block",
+                        "id": child_id,
+                        "type": "child_page",
+                        "child_page": {"title": child["title"]},
+                        "created_time": child["created_time"],
+                        "has_children": bool(self.live_children(child_id)),
+                    }
+                )
+            else:
+                results.append(self.public(child))
+
+        return 200, {
+            "object": "list",
+            "results": results,
+            "has_more": has_more,
+            "next_cursor": kids[start + page_size] if has_more else None,
+        }
+
+    def append_children(self, block_id: str, body: dict) -> tuple[int, dict]:
+        if self.find(block_id) is None:
+            return 404, error("object_not_found", f"Could not find block with ID: {block_id}.")
+
+        children = body.get("children", [])
+        problem = (
+            validate_children(children)
+            or self.check_file_uploads(children)
+            or self.check_links(children)
+        )
+        if problem:
+            return 400, error("validation_error", problem)
+
+        parent_id = normalize(block_id)
+        after = normalize(body["after"]) if body.get("after") else None
+        if after and after not in self.live_children(parent_id):
+            return 400, error("validation_error", f"Block {after} is not a child of {block_id}.")
+
+        created = []
+        for child in children:
+            block = self._new_block(child, parent_id, after=after)
+            after = block["id"] if after else None
+            created.append(self.public(block))
+
+        return 200, {"object": "list", "results": created, "has_more": False, "next_cursor": None}
+
+    def update_block(self, block_id: str, body: dict, archive: bool = False) -> tuple[int, dict]:
+        block = self.blocks.get(normalize(block_id))
+        if block is None:
+            return 404, error("object_not_found", f"Could not find block with ID: {block_id}.")
+
+        if archive or body.get("archived") or body.get("in_trash"):
+            block["archived"] = True
+        else:
+            block_type = block.get("type")
+            if block_type in body:
+                problem = validate_children([{"type": block_type, block_type: body[block_type]}]) or self.check_links(
+                    [{"type": block_type, block_type: body[block_type]}]
+                )
+                if problem:
+                    return 400, error("validation_error", problem)
+                block[block_type] = body[block_type]
+
+        return 200, self.public(block)
+
+    def create_file_upload(self, body: dict) -> tuple[int, dict]:
+        if body.get("mode", "single_part") != "single_part":
+            return 400, error("validation_error", "Only single_part uploads are supported.")
+
+        upload = {
+            "object": "file_upload",
+            "id": str(uuid.uuid4()),
+            "status": "pending",
+            "filename": body.get("filename"),
+            "content_type": body.get("content_type"),
+            "content_length": None,
+        }
+        self.file_uploads[upload["id"]] = upload
+        return 200, dict(upload)
+
+    def send_file_upload(self, upload_id: str, body: dict) -> tuple[int, dict]:
+        upload = self.file_uploads.get(normalize(upload_id))
+        if upload is None:
+            return 404, error("object_not_found", f"Could not find file upload with ID: {upload_id}.")
+        if upload["status"] != "pending":
+            return 400, error("validation_error", f"File upload is {upload['status']}, not pending.")
+
+        part = body.get("file")
+        if part is None:
+            return 400, error("validation_error", "Missing the 'file' form field.")
+        if part["size"] > MAX_FILE_UPLOAD_BYTES:
+            return 413, error("payload_too_large", "File is too large for a single-part upload.")
+
+        upload["status"] = "uploaded"
+        upload["content_length"] = part["size"]
+        return 200, dict(upload)
+
+    def check_file_uploads(self, children: list) -> str | None:
+        """
+        Image/file blocks that reference a file upload need one that was
+        sent; attaching it marks it as used.
+        """
+        for child in children:
+            data = child.get(child.get("type")) or {}
+            if data.get("type") != "file_upload":
+                continue
+            upload_id = normalize(data.get("file_upload", {}).get("id", ""))
+            upload = self.file_uploads.get(upload_id)
+            if upload is None or upload["status"] != "uploaded":
+                return f"File upload {upload_id} does not exist or was not sent."
+            upload["attached"] = True
+        return None
+
+    def check_links(self, children: list) -> str | None:
+        """
+        link_to_page blocks must point at an existing, unarchived page.
+        """
+        for child in children:
+            if child.get("type") != "link_to_page":
+                continue
+            page_id = normalize(child["link_to_page"].get("page_id", ""))
+            page = self.find(page_id)
+            if page is None or page["object"] != "page":
+                return f"link_to_page target {page_id} is not an existing page."
+        return None
+
+    def tree(self, block_id: str) -> dict:
+        block = self.blocks[normalize(block_id)]
+        node = {"id": block["id"], "type": block.get("type", "page")}
+        if block["object"] == "page":
+            node["title"] = block["title"]
+        if block.get("type") == "link_to_page":
+            node["link_to"] = block["link_to_page"].get("page_id")
+        elif block["object"] == "block":
+            data = block.get(block["type"], {})
+            node["text"] = "".join(
+                item.get("text", {}).get("content", "") for item in data.get("rich_text", [])
+            )
+        node["children"] = [self.tree(c) for c in self.live_children(block["id"])]
+        return node
+
+    # -- routing -------------------------------------------------------
+
+    def handle(self, method: str, path: str, query: dict, body: dict) -> tuple[str, int, dict]:
+        """
+        Dispatch one API call. Returns (endpoint label, status, response).
+        """
+        match = match_route(method, path)
+        if match is None:
+            return endpoint_label(method, path), 400, error(
+                "invalid_request_url", f"Invalid request URL: {path}"
+            )
+
+        label, action, block_id = match
+        with self.lock:
+            if action == "create_page":
+                status, response = self.create_page(body)
+            elif action == "get":
+                status, response = self.get(block_id)
+            elif action == "update_page":
+                status, response = self.update_page(block_id, body)
+            elif action == "move_page":
+                status, response = self.move_page(block_id, body)
+            elif action == "list_children":
+                status, response = self.list_children(block_id, query)
+            elif action == "append_children":
+                status, response = self.append_children(block_id, body)
+            elif action == "update_block":
+                status, response = self.update_block(block_id, body)
+            elif action == "create_file_upload":
+                status, response = self.create_file_upload(body)
+            elif action == "send_file_upload":
+                status, response = self.send_file_upload(block_id, body)
+            else:
+                status, response = self.update_block(block_id, body, archive=True)
+
+        return label, status, response
+
+    def get(self, block_id: str) -> tuple[int, dict]:
+        block = self.blocks.get(normalize(block_id))
+        if block is None:
+            return 404, error("object_not_found", f"Could not find block with ID: {block_id}.")
+        return 200, self.public(block)
+
+
+ROUTES = [
+    ("POST", r"/v1/pages", "POST /pages", "create_page"),
+    ("GET", rf"/v1/pages/({ID_RE})", "GET /pages/{id}", "get"),
+    ("PATCH", rf"/v1/pages/({ID_RE})", "PATCH /pages/{id}", "update_page"),
+    ("POST", rf"/v1/pages/({ID_RE})/move", "POST /pages/{id}/move", "move_page"),
+    ("GET", rf"/v1/blocks/({ID_RE})/children", "GET /blocks/{id}/children", "list_children"),
+    ("PATCH", rf"/v1/blocks/({ID_RE})/children", "PATCH /blocks/{id}/children", "append_children"),
+    ("GET", rf"/v1/blocks/({ID_RE})", "GET /blocks/{id}", "get"),
+    ("PATCH", rf"/v1/blocks/({ID_RE})", "PATCH /blocks/{id}", "update_block"),
+    ("DELETE", rf"/v1/blocks/({ID_RE})", "DELETE /blocks/{id}", "archive_block"),
+    ("POST", r"/v1/file_uploads", "POST /file_uploads", "create_file_upload"),
+    ("POST", rf"/v1/file_uploads/({ID_RE})/send", "POST /file_uploads/{id}/send", "send_file_upload"),
+]
+
+
+def match_route(method: str, path: str) -> tuple[str, str, str | None] | None:
+    """
+    Return (endpoint label, action, id from the path) for a known endpoint.
+    """
+    for route_method, pattern, label, action in ROUTES:
+        m = re.fullmatch(pattern, path)
+        if m and route_method == method:
+            return label, action, m.group(1) if m.groups() else None
+    return None
+
+
+def endpoint_label(method: str, path: str) -> str:
+    match = match_route(method, path)
+    return match[0] if match else f"{method} {path}"
+
+
+def normalize(raw: str) -> str:
+    hex32 = raw.replace("-", "").lower()
+    if len(hex32) != 32:
+        return raw
+    return f"{hex32[0:8]}-{hex32[8:12]}-{hex32[12:16]}-{hex32[16:20]}-{hex32[20:]}"
+
+
+def notion_time() -> str:
+    """
+    The current time as Notion reports `created_time`: UTC, rounded down to
+    the minute.
+    """
+    return time.strftime("%Y-%m-%dT%H:%M:00.000Z", time.gmtime())
+
+
+def error(code: str, message: str) -> dict:
+    return {"object": "error", "code": code, "message": message}
+
+
+def parse_form_data(content_type: str, raw: bytes) -> dict:
+    """
+    Parse a multipart/form-data body into
+    {field: {"filename", "content_type", "size"}}.
+    """
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + raw
+    )
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if name:
+            fields[name] = {
+                "filename": part.get_filename(),
+                "content_type": part.get_content_type(),
+                "size": len(part.get_payload(decode=True) or b""),
+            }
+    return fields
+
+
+def validate_rich_text(items: list) -> str | None:
+    if len(items) > MAX_RICH_TEXT_ITEMS:
+        return f"rich_text length should be ≤ {MAX_RICH_TEXT_ITEMS}, instead was {len(items)}."
+    for item in items:
+        content = item.get("text", {}).get("content", "")
+        if len(content) > MAX_TEXT_LENGTH:
+            return f"text.content length should be ≤ {MAX_TEXT_LENGTH}, instead was {len(content)}."
+        link = item.get("text", {}).get("link")
+        if link and not re.match(r"^(https?://[^\s/]+|mailto:)", link.get("url", "")):
+            return f"Invalid URL for link: {link.get('url')}"
+    return None
+
+
+def validate_children(children: list, depth: int = 0) -> str | None:
+    if len(children) > MAX_BLOCKS_PER_REQUEST:
+        return f"children length should be ≤ {MAX_BLOCKS_PER_REQUEST}, instead was {len(children)}."
+    for child in children:
+        block_type = child.get("type")
+        data = child.get(block_type) or {}
+        problem = validate_rich_text(data.get("rich_text", [])) or validate_rich_text(data.get("caption", []))
+        if not problem and block_type == "table_row":
+            problem = next(filter(None, map(validate_rich_text, data.get("cells", []))), None)
+        if not problem and block_type == "code" and data.get("language") not in NOTION_CODE_LANGUAGES:
+            problem = f"Invalid code block language: {data.get('language')}."
+        if not problem and data.get("children"):
+            if depth >= NOTION_MAX_NESTING:
+                problem = f"Blocks can only be nested {NOTION_MAX_NESTING} levels deep in one request."
+            else:
+                problem = validate_children(data["children"], depth + 1)
+        if problem:
+            return problem
+    return None
+
+
+def make_handler(standin: NotionStandin):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, payload: dict, headers: dict | None = None) -> int:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+            return len(data)
+
+        def _dispatch(self, method: str):
+            url = urlparse(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+
+            if url.path == "/__stats" and method == "GET":
+                with standin.lock:
+                    self._send(200, standin.stats)
+                return
+            if url.path == "/__reset" and method == "POST":
+                standin.reset_stats()
+                self._send(200, {"ok": True})
+                return
+            if url.path.startswith("/__tree/") and method == "GET":
+                with standin.lock:
+                    self._send(200, standin.tree(url.path.rsplit("/", 1)[-1]))
+                return
+
+            if standin.latency:
+                time.sleep(standin.latency)
+
+            rejected = standin.should_reject()
+            if rejected:
+                sent = self._send(
+                    rejected,
+                    error("rate_limited" if rejected == 429 else "service_unavailable",
+                          "Injected by the stand-in."),
+                    headers={"Retry-After": "1"} if rejected == 429 else None,
+                )
+                standin.record(endpoint_label(method, url.path), rejected, len(raw), sent)
+                return
+
+            content_type = self.headers.get("Content-Type") or ""
+            multipart = content_type.startswith("multipart/form-data")
+
+            if len(raw) > (MAX_FILE_UPLOAD_BYTES + MAX_REQUEST_BYTES if multipart else MAX_REQUEST_BYTES):
+                sent = self._send(413, error("payload_too_large", "Request body too large."))
+                standin.record(endpoint_label(method, url.path), 413, len(raw), sent)
+                return
+
+            try:
+                if multipart:
+                    body = parse_form_data(content_type, raw)
+                else:
+                    body = json.loads(raw) if raw else {}
+            except ValueError:
+                sent = self._send(400, error("invalid_json", "Body is not valid JSON."))
+                standin.record(endpoint_label(method, url.path), 400, len(raw), sent)
+                return
+
+            endpoint, status, response = standin.handle(
+                method, url.path, parse_qs(url.query), body
+            )
+            sent = self._send(status, response)
+            standin.record(endpoint, status, len(raw), sent)
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def do_PATCH(self):
+            self._dispatch("PATCH")
+
+        def do_DELETE(self):
+            self._dispatch("DELETE")
+
+    return Handler
+
+
+def start_standin(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    **options,
+) -> tuple[ThreadingHTTPServer, NotionStandin]:
+    """
+    Start a stand-in server on a background thread. Use port=0 to pick a
+    free port; the API base URL is
+    f"http://{host}:{server.server_address[1]}/v1".
+    """
+    standin = NotionStandin(**options)
+    server = ThreadingHTTPServer((host, port), make_handler(standin))
+    server.daemon_threads = True
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    return server, standin
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run a local stand-in for the Notion API endpoints used by the exporter."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--root-page", default=DEFAULT_ROOT_PAGE_ID,
+                        help="Id of the pre-existing root page")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds added to every API response")
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="Answer 429 above this many requests/second")
+    parser.add_argument("--throttle-rate", type=float, default=0.0,
+                        help="Probability of a random 429 per request")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Probability of a random 503 per request")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--no-move", action="store_true",
+                        help="Reject page moves, like an API version without them")
+
+    args = parser.parse_args()
+
+    server, _ = start_standin(
+        args.host,
+        args.port,
+        root_page_id=args.root_page,
+        latency=args.latency,
+        rate_limit=args.rate_limit,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        supports_move=not args.no_move,
+    )
+
+    print(f"Notion stand-in listening on http://{args.host}:{server.server_address[1]}/v1")
+    print(f"Root page id: {args.root_page}")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import io
+import re
+import sys
+import json
+import threading
+from pathlib import Path
+
+from notion_api import normalize_notion_id
+
+TARGET_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def load_targets(spec: str, environ: dict) -> list[dict]:
+    """
+    Parse a list of export targets from `spec`: a path to a JSON file or a
+    JSON string (e.g. the NOTION_TARGETS environment variable).
+
+    The JSON is a list of objects like
+
+      {"name": "team-a", "root_page": "<page id or URL>", "token_env": "NOTION_TOKEN_A"}
+
+    where the integration token is read from the environment variable named
+    by `token_env` (or given inline as `token`, not recommended). `name`
+    defaults to target-<n> and is used in logs and per-target file names.
+    An optional `staging_page` is the target's page for --blue-green builds.
+
+    Returns [{"name", "root_page", "token", "staging_page"}], raising
+    ValueError on problems.
+    """
+    text = spec
+    if not spec.lstrip().startswith("["):
+        path = Path(spec)
+        if not path.is_file():
+            raise ValueError(f"Targets file not found: {spec}")
+        text = path.read_text(encoding="utf-8")
+
+    try:
+        raw_targets = json.loads(text)
+    except ValueError as e:
+        raise ValueError(f"Targets are not valid JSON: {e}") from e
+
+    if not isinstance(raw_targets, list) or not raw_targets:
+        raise ValueError("Targets must be a non-empty JSON list")
+
+    targets = []
+    seen: set[str] = set()
+
+    for i, raw in enumerate(raw_targets, start=1):
+        if not isinstance(raw, dict):
+            raise ValueError(f"Target #{i} is not an object: {raw!r}")
+
+        name = str(raw.get("name") or f"target-{i}")
+        if not TARGET_NAME_RE.match(name):
+            raise ValueError(f"Target name '{name}' may only use letters, digits, '.', '_' and '-'")
+        if name in seen:
+            raise ValueError(f"Duplicate target name '{name}'")
+        seen.add(name)
+
+        root_page = raw.get("root_page")
+        if not root_page:
+            raise ValueError(f"Target '{name}' has no root_page")
+
+        token = raw.get("token")
+        token_env = raw.get("token_env")
+        if token_env:
+            token = environ.get(token_env)
+            if not token:
+                raise ValueError(f"Target '{name}': environment variable {token_env} is not set")
+        if not token:
+            raise ValueError(f"Target '{name}' has neither token_env nor token")
+
+        staging_page = raw.get("staging_page")
+        targets.append(
+            {
+                "name": name,
+                "root_page": normalize_notion_id(root_page),
+                "token": token,
+                "staging_page": normalize_notion_id(staging_page) if staging_page else None,
+            }
+        )
+
+    return targets
+
+
+class PrefixedStdout(io.TextIOBase):
+    """
+    Stand-in for sys.stdout that prefixes every line written by a thread
+    with that thread's prefix (set_prefix()), so the logs of exports running
+    side by side stay readable. Lines are written whole, under a lock.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def set_prefix(self, prefix: str):
+        self._local.prefix = prefix
+        self._local.pending = ""
+
+    def prefix(self) -> str:
+        return getattr(self._local, "prefix", "")
+
+    def write(self, text: str) -> int:
+        prefix = self.prefix()
+        pending = getattr(self._local, "pending", "") + text
+        *lines, rest = pending.split("\n")
+        self._local.pending = rest
+
+        if lines:
+            with self._lock:
+                for line in lines:
+                    self.stream.write(f"{prefix}{line}\n" if line else "\n")
+                self.stream.flush()
+        return len(text)
+
+    def flush(self):
+        pending = getattr(self._local, "pending", "")
+        if pending:
+            self._local.pending = ""
+            self.write(pending + "\n")
+
+    def __enter__(self):
+        self._saved = sys.stdout
+        sys.stdout = self
+        return self
+
+    def __exit__(self, *exc):
+        sys.stdout = self._saved
+        return False
+
+
+def inherit_log_prefix():
+    """
+    Return a ThreadPoolExecutor initializer that gives the pool's threads the
+    calling thread's PrefixedStdout prefix, or None when stdout is not
+    prefixed.
+    """
+    stdout = sys.stdout
+    if not isinstance(stdout, PrefixedStdout):
+        return None
+    prefix = stdout.prefix()
+    return lambda: stdout.set_prefix(prefix)
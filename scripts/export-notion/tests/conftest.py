@@ -0,0 +1,101 @@
+"""
+Shared fixtures: an in-process Notion stand-in (see standin.py) with a
+client pointed at it, and a small docs tree to export.
+"""
+import sys
+import json
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import notion_api  # noqa: E402
+import standin  # noqa: E402
+from notion_api import NotionClient  # noqa: E402
+
+ROOT_PAGE_ID = standin.DEFAULT_ROOT_PAGE_ID
+
+DOCS_JSON = {
+    "navigation": {
+        "tabs": [
+            {
+                "tab": "Documentation",
+                "groups": [
+                    {"group": "Get Started", "pages": ["intro", "guide"]},
+                    {"group": "Reference", "pages": ["reference/alpha", "reference/beta"]},
+                ],
+            },
+            {
+                "tab": "SDK",
+                "groups": [{"group": "Clients", "pages": ["sdk/python", "sdk/typescript"]}],
+            },
+        ]
+    }
+}
+
+
+def write_page(path: Path, title: str, body: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"---\ntitle: {title}\n---\n\n{body}\n", encoding="utf-8")
+
+
+@pytest.fixture
+def notion(monkeypatch):
+    """
+    Yield (stand-in, client) for a fresh stand-in. Retries do not back off.
+    """
+    monkeypatch.setattr(notion_api, "NOTION_BACKOFF_BASE", 0.0)
+    server, st = standin.start_standin(port=0)
+    client = NotionClient(
+        "test-token",
+        base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+        max_requests_per_second=1000,
+        max_retries=2,
+    )
+    yield st, client
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def docs_tree(tmp_path) -> Path:
+    """
+    A docs tree of two tabs and six pages; "guide" is long enough to need
+    appends after its page is created.
+    """
+    root = tmp_path / "docs"
+    root.mkdir()
+    (root / "docs.json").write_text(json.dumps(DOCS_JSON), encoding="utf-8")
+
+    write_page(root / "intro.mdx", "Introduction", "Welcome to the docs.\n\n## Next\n\nRead the guide.")
+    write_page(
+        root / "guide.mdx",
+        "Guide",
+        "\n\n".join(f"Step {n} of the guide." for n in range(150)),
+    )
+    write_page(root / "reference" / "alpha.mdx", "Alpha", "- one\n- two\n- three")
+    write_page(root / "reference" / "beta.mdx", "Beta", "```python\nprint('beta')\n```")
+    write_page(root / "sdk" / "python.mdx", "Python", "pip install the-sdk")
+    write_page(root / "sdk" / "typescript.mdx", "TypeScript", "npm install the-sdk")
+    return root
+
+
+def outline(st: standin.NotionStandin, block_id: str = ROOT_PAGE_ID) -> list:
+    """
+    The tree under a stand-in page as nested (type, title or text, children)
+    tuples, without ids or the root page's "Last updated" block.
+    """
+    def strip(node: dict) -> tuple:
+        return (
+            node["type"],
+            node.get("title", node.get("text")),
+            [strip(child) for child in node["children"]],
+        )
+
+    return [
+        strip(node)
+        for node in st.tree(block_id)["children"]
+        if not (node.get("text") or "").startswith("Last updated")
+    ]
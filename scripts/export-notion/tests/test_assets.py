@@ -0,0 +1,74 @@
+import main
+from assets import AssetUploader
+from conftest import ROOT_PAGE_ID, write_page
+
+
+def add_shared_image(root_dir):
+    """Reference one image from three pages, twice from one of them."""
+    (root_dir / "images").mkdir()
+    (root_dir / "images" / "logo.png").write_bytes(b"logo image")
+    write_page(root_dir / "intro.mdx", "Introduction", "![Logo](/images/logo.png)\n\nWelcome.")
+    write_page(root_dir / "sdk" / "python.mdx", "Python", "![Logo](../images/logo.png)")
+    write_page(
+        root_dir / "sdk" / "typescript.mdx",
+        "TypeScript",
+        "![Logo](/images/logo.png)\n\n- Install\n\n  ![Logo again](/images/logo.png)",
+    )
+
+
+def export(root_dir, client, cache_path) -> AssetUploader:
+    uploader = AssetUploader(client, root_dir, cache_path)
+    try:
+        main.process_directory_with_docs_json(root_dir, ROOT_PAGE_ID, client, max_workers=4, assets=uploader)
+    finally:
+        uploader.close()
+    return uploader
+
+
+def image_upload_ids(st) -> list[str]:
+    return [
+        block["image"]["file_upload"]["id"]
+        for block in st.blocks.values()
+        if block.get("type") == "image" and not block["archived"]
+    ]
+
+
+def test_image_shared_by_pages_is_uploaded_once(notion, docs_tree, tmp_path):
+    st, client = notion
+    add_shared_image(docs_tree)
+
+    uploader = export(docs_tree, client, tmp_path / "assets.json")
+
+    assert st.stats["endpoints"]["POST /file_uploads"]["requests"] == 1
+    assert uploader.stats["uploaded"] == 1
+    # One reference per page: a page asks for each of its images once.
+    assert uploader.stats["references"] == 3
+    ids = image_upload_ids(st)
+    assert len(ids) == 4 and len(set(ids)) == 1
+
+
+def test_next_run_reuses_the_uploaded_image(notion, docs_tree, tmp_path):
+    st, client = notion
+    add_shared_image(docs_tree)
+    export(docs_tree, client, tmp_path / "assets.json")
+    [first_id] = set(image_upload_ids(st))
+
+    st.reset_stats()
+    uploader = export(docs_tree, client, tmp_path / "assets.json")
+
+    assert "POST /file_uploads" not in st.stats["endpoints"]
+    assert uploader.stats["uploaded"] == 0
+    assert uploader.stats["cached"] == 1
+    assert set(image_upload_ids(st)) == {first_id}
+
+
+def test_changed_image_is_uploaded_again(notion, docs_tree, tmp_path):
+    st, client = notion
+    add_shared_image(docs_tree)
+    export(docs_tree, client, tmp_path / "assets.json")
+
+    (docs_tree / "images" / "logo.png").write_bytes(b"new logo image")
+    st.reset_stats()
+    export(docs_tree, client, tmp_path / "assets.json")
+
+    assert st.stats["endpoints"]["POST /file_uploads"]["requests"] == 1
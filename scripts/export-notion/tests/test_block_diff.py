@@ -0,0 +1,83 @@
+import main
+from conftest import ROOT_PAGE_ID, outline
+from markdown_blocks import block_signature, diff_blocks, markdown_to_blocks
+
+
+def plan_for(old_md: str, new_md: str) -> list[tuple]:
+    old = [block_signature(block) for block in markdown_to_blocks(old_md)]
+    new_blocks = list(markdown_to_blocks(new_md))
+    return diff_blocks(old, new_blocks, [block_signature(block) for block in new_blocks])
+
+
+def test_diff_keeps_unchanged_blocks():
+    md = "First.\n\nSecond.\n\nThird."
+    assert plan_for(md, md) == [("keep", 0, 0), ("keep", 1, 1), ("keep", 2, 2)]
+
+
+def test_diff_inserts_new_blocks():
+    plan = plan_for("First.\n\nThird.", "First.\n\nSecond.\n\nThird.")
+    assert plan == [("keep", 0, 0), ("insert", None, 1), ("keep", 1, 2)]
+
+
+def test_diff_updates_changed_text_in_place():
+    plan = plan_for("First.\n\nSecond.\n\nThird.", "First.\n\nSecond, edited.\n\nThird.")
+    assert plan == [("keep", 0, 0), ("update", 1, 1), ("keep", 2, 2)]
+
+
+def test_diff_replaces_block_that_changed_type():
+    plan = plan_for("First.\n\nSecond.", "First.\n\n## Second")
+    assert plan == [("keep", 0, 0), ("archive", 1, None), ("insert", None, 1)]
+
+
+def test_diff_deletes_removed_blocks():
+    plan = plan_for("First.\n\nSecond.\n\nThird.", "First.\n\nThird.")
+    assert plan == [("keep", 0, 0), ("archive", 1, None), ("keep", 2, 1)]
+
+
+def test_diff_cannot_insert_before_first_kept_block():
+    assert plan_for("Second.", "First.\n\nSecond.") is None
+
+
+def paragraphs(st, page_id: str) -> list[str]:
+    return [text for kind, text, _ in outline(st, page_id) if kind == "paragraph"]
+
+
+def test_update_applies_insert_update_and_delete(notion, tmp_path):
+    st, client = notion
+    page_file = tmp_path / "page.mdx"
+    page_file.write_text("\n\n".join(f"Block {n}." for n in range(10)), encoding="utf-8")
+
+    signatures: list[str] = []
+    page = main.create_notion_page_from_markdown(
+        page_file, ROOT_PAGE_ID, client, signatures=signatures
+    )
+
+    lines = [f"Block {n}." for n in range(10)]
+    lines[4] = "Block 4, edited."
+    lines.insert(7, "New block.")
+    del lines[2]
+    page_file.write_text("\n\n".join(lines), encoding="utf-8")
+
+    st.reset_stats()
+    new_signatures = main.update_notion_page_from_markdown(
+        page["id"], page_file, client, previous_blocks=signatures
+    )
+
+    assert paragraphs(st, page["id"]) == lines
+    assert new_signatures == [block_signature(block) for block in markdown_to_blocks("\n\n".join(lines))]
+    endpoints = st.stats["endpoints"]
+    # One archive, one update and one append, not a rewrite of the page.
+    assert endpoints["PATCH /blocks/{id}"]["requests"] == 2
+    assert endpoints["PATCH /blocks/{id}/children"]["requests"] == 1
+
+
+def test_update_without_signatures_rewrites_page(notion, tmp_path):
+    st, client = notion
+    page_file = tmp_path / "page.mdx"
+    page_file.write_text("Old one.\n\nOld two.", encoding="utf-8")
+    page = main.create_notion_page_from_markdown(page_file, ROOT_PAGE_ID, client)
+
+    page_file.write_text("New one.\n\nNew two.\n\nNew three.", encoding="utf-8")
+    main.update_notion_page_from_markdown(page["id"], page_file, client)
+
+    assert paragraphs(st, page["id"]) == ["New one.", "New two.", "New three."]
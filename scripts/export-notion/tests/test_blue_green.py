@@ -0,0 +1,87 @@
+import pytest
+
+import main
+from conftest import ROOT_PAGE_ID, outline, write_page
+
+
+def export(root_dir, client, state_path, staging_id) -> dict:
+    return main.process_directory_blue_green(
+        root_dir, ROOT_PAGE_ID, client, state_path, max_workers=2, staging_parent_id=staging_id
+    )
+
+
+@pytest.fixture
+def published(notion, docs_tree, tmp_path):
+    """
+    A stand-in whose root page holds an earlier export, a staging page
+    outside it, and the docs edited since: yields (st, client, staging_id,
+    outline before the edit).
+    """
+    st, client = notion
+    staging_id = st.add_workspace_page("Staging")
+    export(docs_tree, client, tmp_path / "state.json", staging_id)
+    before = outline(st)
+    write_page(docs_tree / "intro.mdx", "Introduction", "Welcome to the new docs.")
+    return st, client, staging_id, before
+
+
+def test_swap_publishes_the_new_tree(published, docs_tree, tmp_path):
+    st, client, staging_id, before = published
+
+    export(docs_tree, client, tmp_path / "state.json", staging_id)
+
+    after = outline(st)
+    assert after != before
+    intro = after[0][2][0][2][0]
+    assert intro[1] == "Introduction"
+    assert ("paragraph", "Welcome to the new docs.", []) in intro[2]
+    assert outline(st, staging_id) == []
+
+
+def test_failed_build_leaves_the_root_page_untouched(published, docs_tree, tmp_path):
+    st, client, staging_id, before = published
+    create_page = client.create_page
+
+    def failing_create_page(parent_page_id, title, children=None):
+        if title == "Beta":
+            raise RuntimeError("create failed")
+        return create_page(parent_page_id, title, children)
+
+    client.create_page = failing_create_page
+    with pytest.raises(RuntimeError):
+        export(docs_tree, client, tmp_path / "state.json", staging_id)
+
+    assert outline(st) == before
+    assert outline(st, staging_id) == []
+
+
+def test_failed_move_moves_published_pages_back(published, docs_tree, tmp_path):
+    st, client, staging_id, before = published
+    move_page = client.move_page
+    moves = []
+
+    def failing_move_page(page_id, parent_page_id):
+        moves.append(parent_page_id)
+        if len(moves) == 2:
+            raise RuntimeError("move failed")
+        return move_page(page_id, parent_page_id)
+
+    client.move_page = failing_move_page
+    with pytest.raises(RuntimeError, match="left untouched"):
+        export(docs_tree, client, tmp_path / "state.json", staging_id)
+
+    # The first tab was moved, the second failed, and the first went back.
+    assert moves == [ROOT_PAGE_ID, ROOT_PAGE_ID, moves[2]]
+    assert moves[2] != ROOT_PAGE_ID
+    assert outline(st) == before
+    assert outline(st, staging_id) == []
+
+
+def test_staging_page_must_be_outside_the_root_page(notion, docs_tree, tmp_path):
+    st, client = notion
+
+    for staging_id in (None, ROOT_PAGE_ID):
+        with pytest.raises(ValueError):
+            export(docs_tree, client, tmp_path / "state.json", staging_id)
+
+    assert st.stats["endpoints"].get("POST /pages") is None
@@ -0,0 +1,127 @@
+import json
+
+import pytest
+
+import bundle
+import main
+import standin
+from assets import AssetUploader
+from conftest import ROOT_PAGE_ID, outline, write_page
+from notion_api import NotionClient
+
+STEPS = """\
+1. Open the console.
+
+   ![Console](/images/console.png)
+
+2. Note the key.
+
+<Tip>
+![Key](/images/key.png)
+</Tip>
+"""
+
+
+@pytest.fixture
+def bundle_tree(docs_tree):
+    """
+    The docs tree with "intro" repeated at the end of the SDK tab (a link
+    page) and a page with images nested in a list item and a callout.
+    """
+    docs_json_path = docs_tree / "docs.json"
+    docs_json = json.loads(docs_json_path.read_text(encoding="utf-8"))
+    clients = docs_json["navigation"]["tabs"][1]["groups"][0]["pages"]
+    clients.extend(["sdk/steps", "intro"])
+    docs_json_path.write_text(json.dumps(docs_json), encoding="utf-8")
+
+    write_page(docs_tree / "sdk" / "steps.mdx", "Steps", STEPS)
+    (docs_tree / "images").mkdir()
+    (docs_tree / "images" / "console.png").write_bytes(b"console image")
+    (docs_tree / "images" / "key.png").write_bytes(b"key image")
+    return docs_tree
+
+
+def fresh_standin():
+    server, st = standin.start_standin(port=0)
+    client = NotionClient(
+        "test-token",
+        base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+        max_requests_per_second=1000,
+    )
+    return server, st, client
+
+
+def direct_export_outline(root_dir, tmp_path) -> list:
+    server, st, client = fresh_standin()
+    uploader = AssetUploader(client, root_dir, tmp_path / "direct-assets.json")
+    try:
+        main.process_directory_with_docs_json(root_dir, ROOT_PAGE_ID, client, max_workers=2, assets=uploader)
+        return outline(st)
+    finally:
+        uploader.close()
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+def live_blocks(st, block_type: str) -> list[dict]:
+    """Blocks of a type reachable from the root page."""
+    found = []
+
+    def walk(block_id):
+        for child_id in st.live_children(block_id):
+            block = st.blocks[child_id]
+            if block.get("type") == block_type:
+                found.append(block)
+            walk(child_id)
+
+    walk(ROOT_PAGE_ID)
+    return found
+
+
+def compile_and_replay(root_dir, client, tmp_path) -> dict:
+    bundle_path = tmp_path / "export.zip"
+    bundle.compile_bundle(root_dir, bundle_path)
+    return bundle.replay_bundle(bundle_path, ROOT_PAGE_ID, client, tmp_path / "assets.json", max_workers=2)
+
+
+def test_replay_matches_direct_export(notion, bundle_tree, tmp_path):
+    st, client = notion
+
+    counters = compile_and_replay(bundle_tree, client, tmp_path)
+
+    assert not counters["failed"]
+    assert outline(st) == direct_export_outline(bundle_tree, tmp_path)
+
+    [link] = live_blocks(st, "link_to_page")
+    target = st.blocks[link["link_to_page"]["page_id"]]
+    assert target["title"] == "Introduction"
+    assert not target["archived"]
+
+    images = live_blocks(st, "image")
+    assert len(images) == 2
+    for image in images:
+        upload = st.file_uploads[image["image"]["file_upload"]["id"]]
+        assert upload["status"] == "uploaded"
+    # The console image is nested in a list item, the key image in a callout.
+    parents = {st.blocks[image["parent"]["block_id"]]["type"] for image in images}
+    assert parents == {"numbered_list_item", "callout"}
+
+
+def test_replay_drops_images_whose_upload_failed(notion, bundle_tree, tmp_path):
+    st, client = notion
+    create_file_upload = client.create_file_upload
+
+    def failing_create_file_upload(filename, content_type):
+        if filename == "key.png":
+            raise RuntimeError("upload failed")
+        return create_file_upload(filename, content_type)
+
+    client.create_file_upload = failing_create_file_upload
+    counters = compile_and_replay(bundle_tree, client, tmp_path)
+
+    assert not counters["failed"]
+    [image] = live_blocks(st, "image")
+    assert st.file_uploads[image["image"]["file_upload"]["id"]]["filename"] == "console.png"
+    [callout] = live_blocks(st, "callout")
+    assert st.live_children(callout["id"]) == []
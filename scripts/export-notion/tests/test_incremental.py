@@ -0,0 +1,122 @@
+import json
+
+import main
+import standin
+from conftest import ROOT_PAGE_ID, outline, write_page
+from notion_api import NotionClient
+
+
+def export(root_dir, client, state_path) -> dict:
+    return main.process_directory_incremental(
+        root_dir, ROOT_PAGE_ID, client, state_path, max_workers=2
+    )
+
+
+def insert_page(root_dir, after: str, slug: str, title: str):
+    docs_json_path = root_dir / "docs.json"
+    docs_json = json.loads(docs_json_path.read_text(encoding="utf-8"))
+    for tab in docs_json["navigation"]["tabs"]:
+        for group in tab["groups"]:
+            if after in group["pages"]:
+                group["pages"].insert(group["pages"].index(after) + 1, slug)
+    docs_json_path.write_text(json.dumps(docs_json), encoding="utf-8")
+    write_page(root_dir / f"{slug}.mdx", title, f"{title} content.")
+
+
+def full_export_outline(root_dir, tmp_path) -> list:
+    server, fresh = standin.start_standin(port=0)
+    client = NotionClient(
+        "test-token",
+        base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+        max_requests_per_second=1000,
+    )
+    try:
+        export(root_dir, client, tmp_path / "fresh-state.json")
+        return outline(fresh)
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_noop_run_changes_nothing(notion, docs_tree, tmp_path):
+    st, client = notion
+    state_path = tmp_path / "state.json"
+    export(docs_tree, client, state_path)
+    expected = outline(st)
+
+    st.reset_stats()
+    counters = export(docs_tree, client, state_path)
+
+    assert outline(st) == expected
+    assert counters["unchanged"] == 6
+    assert set(st.stats["endpoints"]) == {"GET /blocks/{id}/children"}
+
+
+def test_page_inserted_mid_group_moves_later_siblings(notion, docs_tree, tmp_path):
+    st, client = notion
+    state_path = tmp_path / "state.json"
+    export(docs_tree, client, state_path)
+
+    insert_page(docs_tree, "intro", "setup", "Setup")
+    st.reset_stats()
+    counters = export(docs_tree, client, state_path)
+
+    endpoints = st.stats["endpoints"]
+    assert endpoints["POST /pages"]["requests"] == 1
+    assert endpoints["POST /pages/{id}/move"]["requests"] == 1
+    assert counters["moved"] == 1
+    assert counters["archived"] == 0
+    assert outline(st) == full_export_outline(docs_tree, tmp_path)
+
+
+def test_failed_move_is_retried_next_run(notion, docs_tree, tmp_path):
+    st, client = notion
+    state_path = tmp_path / "state.json"
+    export(docs_tree, client, state_path)
+
+    insert_page(docs_tree, "reference/alpha", "reference/gamma", "Gamma")
+    st.supports_move = False
+    export(docs_tree, client, state_path)
+
+    state = json.loads(state_path.read_text(encoding="utf-8"))
+    misplaced = [key for key, entry in state["pages"].items() if entry.get("misplaced")]
+    assert len(misplaced) == 1 and misplaced[0].endswith("reference/beta")
+
+    st.supports_move = True
+    st.reset_stats()
+    export(docs_tree, client, state_path)
+
+    assert "POST /pages" not in st.stats["endpoints"]
+    assert outline(st) == full_export_outline(docs_tree, tmp_path)
+
+
+def test_title_is_only_sent_when_it_changed(notion, docs_tree, tmp_path):
+    st, client = notion
+    state_path = tmp_path / "state.json"
+    export(docs_tree, client, state_path)
+
+    write_page(docs_tree / "intro.mdx", "Introduction", "Welcome to the new docs.")
+    st.reset_stats()
+    counters = export(docs_tree, client, state_path)
+
+    assert counters["updated"] == 1
+    assert "PATCH /pages/{id}" not in st.stats["endpoints"]
+
+    write_page(docs_tree / "intro.mdx", "Welcome", "Welcome to the new docs.")
+    st.reset_stats()
+    export(docs_tree, client, state_path)
+
+    assert st.stats["endpoints"]["PATCH /pages/{id}"]["requests"] == 1
+    assert outline(st) == full_export_outline(docs_tree, tmp_path)
+
+
+def test_state_is_ignored_once_the_root_page_was_cleared(notion, docs_tree, tmp_path):
+    st, client = notion
+    state_path = tmp_path / "state.json"
+    export(docs_tree, client, state_path)
+
+    main.clear_page_children(ROOT_PAGE_ID, client)
+    export(docs_tree, client, state_path)
+
+    assert outline(st) == full_export_outline(docs_tree, tmp_path)
@@ -0,0 +1,129 @@
+import main
+import standin
+from conftest import ROOT_PAGE_ID, outline
+from journal import ExportJournal
+from notion_api import NotionClient
+
+
+def export(root_dir, client, journal_path, resume=False) -> dict:
+    journal = main.start_export_journal(
+        journal_path, ROOT_PAGE_ID, client, resume=resume, max_workers=2
+    )
+    try:
+        counters = main.process_directory_with_docs_json(
+            root_dir, ROOT_PAGE_ID, client, max_workers=2, journal=journal
+        )
+        main.finish_export_journal(journal, counters)
+    finally:
+        journal.close()
+    return counters
+
+
+def test_journal_reload_ignores_truncated_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = ExportJournal.start(path, "root")
+    journal.record_page("a", "page-a", "root")
+    journal.record_page("b", "page-b", "root", done=False)
+    journal.close()
+    with path.open("a", encoding="utf-8") as f:
+        f.write('{"event": "page", "key": "c", "id"')
+
+    loaded = ExportJournal.load(path)
+    loaded.close()
+
+    assert loaded.root_page_id == "root"
+    assert loaded.finished_page("a")["id"] == "page-a"
+    assert loaded.finished_page("b") is None
+    assert "c" not in loaded.pages
+    assert not loaded.complete
+
+
+def test_pages_recorded_after_a_truncated_line_are_kept(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = ExportJournal.start(path, "root")
+    journal.record_page("a", "page-a", "root")
+    journal.close()
+    with path.open("a", encoding="utf-8") as f:
+        f.write('{"event": "page", "key": "x", "id"')
+
+    resumed = ExportJournal.load(path)
+    resumed.record_page("b", "page-b", "root")
+    resumed.record_page("c", "page-c", "root")
+    resumed.close()
+
+    reloaded = ExportJournal.load(path)
+    reloaded.close()
+
+    assert sorted(reloaded.pages) == ["a", "b", "c"]
+    assert reloaded.finished_page("b")["id"] == "page-b"
+
+
+def test_resume_after_crash_matches_full_export(notion, docs_tree, tmp_path):
+    st, client = notion
+    journal_path = tmp_path / "journal.jsonl"
+
+    # First run: "Beta" cannot be created, and "Guide" dies after its page
+    # was created but before its remaining blocks were appended.
+    create_page, append_children = client.create_page, client.append_children
+    guide = {}
+
+    def failing_create_page(parent_page_id, title, children=None):
+        if title == "Beta":
+            raise RuntimeError("crash")
+        page = create_page(parent_page_id, title, children)
+        if title == "Guide":
+            guide["id"] = page["id"]
+        return page
+
+    def failing_append_children(block_id, children, **kwargs):
+        if block_id == guide.get("id"):
+            raise RuntimeError("crash")
+        return append_children(block_id, children, **kwargs)
+
+    client.create_page = failing_create_page
+    client.append_children = failing_append_children
+    counters = export(docs_tree, client, journal_path)
+    assert counters["failed"] == 2
+
+    # The process died while writing the next journal line.
+    with journal_path.open("a", encoding="utf-8") as f:
+        f.write('{"event": "page", "key": ')
+
+    client.create_page, client.append_children = create_page, append_children
+    st.reset_stats()
+    counters = export(docs_tree, client, journal_path, resume=True)
+
+    assert not counters.get("failed")
+    # Only "Beta" is created; the half-written "Guide" page is completed.
+    assert st.stats["endpoints"]["POST /pages"]["requests"] == 1
+    journal = ExportJournal.load(journal_path)
+    journal.close()
+    assert journal.complete
+
+    server, fresh = standin.start_standin(port=0)
+    try:
+        fresh_client = NotionClient(
+            "test-token",
+            base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+            max_requests_per_second=1000,
+        )
+        export(docs_tree, fresh_client, tmp_path / "fresh.jsonl")
+        fresh_client.close()
+        assert outline(st) == outline(fresh)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_resume_of_finished_export_starts_over(notion, docs_tree, tmp_path):
+    st, client = notion
+    journal_path = tmp_path / "journal.jsonl"
+    export(docs_tree, client, journal_path)
+    expected = outline(st)
+
+    st.reset_stats()
+    export(docs_tree, client, journal_path, resume=True)
+
+    assert outline(st) == expected
+    # 5 section pages and 6 content pages.
+    assert st.stats["endpoints"]["POST /pages"]["requests"] == 11
@@ -0,0 +1,89 @@
+from markdown_blocks import MarkdownConverter, markdown_to_blocks
+
+
+def text(block: dict) -> str:
+    data = block[block["type"]]
+    return "".join(item["text"]["content"] for item in data["rich_text"])
+
+
+def shape(blocks: list[dict]) -> list[tuple]:
+    """(type, text, children) of each block, for comparing structure."""
+    return [
+        (block["type"], text(block), shape(block[block["type"]].get("children", [])))
+        for block in blocks
+    ]
+
+
+def test_headings():
+    blocks = list(markdown_to_blocks("# One\n\n## Two\n\n### Three\n\n#### Four"))
+
+    assert shape(blocks) == [
+        ("heading_1", "One", []),
+        ("heading_2", "Two", []),
+        ("heading_3", "Three", []),
+        ("heading_3", "Four", []),
+    ]
+
+
+def test_nested_lists():
+    md = "- a\n  - b\n    1. c\n    2. d\n- e\n"
+
+    assert shape(list(markdown_to_blocks(md))) == [
+        ("bulleted_list_item", "a", [
+            ("bulleted_list_item", "b", [
+                ("numbered_list_item", "c", []),
+                ("numbered_list_item", "d", []),
+            ]),
+        ]),
+        ("bulleted_list_item", "e", []),
+    ]
+
+
+def test_fenced_code_keeps_language_and_text():
+    md = "```python\ndef f():\n    return 1\n```\n"
+
+    [block] = markdown_to_blocks(md)
+
+    assert block["type"] == "code"
+    assert block["code"]["language"] == "python"
+    assert text(block) == "def f():\n    return 1"
+
+
+def test_mintlify_callout():
+    md = "<Warning>\nBe **careful** here.\n</Warning>\n"
+
+    [block] = markdown_to_blocks(md)
+
+    assert block["type"] == "callout"
+    assert block["callout"]["icon"] == {"type": "emoji", "emoji": "⚠️"}
+    assert block["callout"]["color"] == "yellow_background"
+    assert text(block) == "Be careful here."
+    assert block["callout"]["rich_text"][1]["annotations"] == {"bold": True}
+
+
+def test_table_rows_and_header():
+    md = "| A | B |\n|---|---|\n| 1 | 2 |\n| 3 |\n"
+
+    [block] = markdown_to_blocks(md)
+
+    table = block["table"]
+    assert table["table_width"] == 2
+    assert table["has_column_header"]
+    rows = [
+        ["".join(item["text"]["content"] for item in cell) for cell in row["table_row"]["cells"]]
+        for row in table["children"]
+    ]
+    assert rows == [["A", "B"], ["1", "2"], ["3", ""]]
+
+
+def test_converter_drops_blocks_once_yielded():
+    converter = MarkdownConverter()
+    chunks = (f"Paragraph {i}.\n\n" for i in range(50))
+
+    held = []
+    for _ in converter.convert(chunks):
+        held.append(len(converter.root))
+
+    assert len(held) == 50
+    assert max(held) <= 1
+    assert converter.root == []
@@ -0,0 +1,105 @@
+import pytest
+import requests
+
+from conftest import ROOT_PAGE_ID, outline
+
+# created_time of the pages and blocks of an earlier run.
+EARLIER = "2020-01-01T00:00:00.000Z"
+
+
+def fail_next(client, method: str, sent: bool):
+    """
+    Make the next `method` request fail with a read timeout, after it
+    reached the stand-in if `sent`, or before it did otherwise.
+    """
+    send = client.session.request
+    failures = {"left": 1}
+
+    def request(request_method, url, **kwargs):
+        if request_method != method or not failures["left"]:
+            return send(request_method, url, **kwargs)
+        failures["left"] -= 1
+        if sent:
+            send(request_method, url, **kwargs)
+        raise requests.ReadTimeout("response lost")
+
+    client.session.request = request
+
+
+def empty_paragraph() -> dict:
+    return {"object": "block", "type": "paragraph", "paragraph": {"rich_text": []}}
+
+
+@pytest.mark.parametrize("sent", [True, False])
+def test_failed_page_creation_is_not_mistaken_for_a_sibling(notion, sent):
+    st, client = notion
+    existing = client.create_page(ROOT_PAGE_ID, "Guide")
+    st.blocks[existing["id"]]["created_time"] = EARLIER
+
+    fail_next(client, "POST", sent)
+    page = client.create_page(ROOT_PAGE_ID, "Guide")
+
+    assert page["id"] != existing["id"]
+    assert outline(st) == [("page", "Guide", []), ("page", "Guide", [])]
+
+
+@pytest.mark.parametrize("sent", [True, False])
+def test_failed_append_is_not_mistaken_for_identical_blocks(notion, sent):
+    st, client = notion
+    page = client.create_page(ROOT_PAGE_ID, "Guide", [empty_paragraph()])
+    existing = [block["id"] for block in client.list_children(page["id"])]
+
+    fail_next(client, "PATCH", sent)
+    created = client.append_children(page["id"], [empty_paragraph()], after=existing[-1])
+
+    assert created[0]["id"] not in existing
+    assert len(list(client.list_children(page["id"]))) == 2
+
+
+def test_failed_append_at_the_end_checks_created_time(notion):
+    st, client = notion
+    page = client.create_page(ROOT_PAGE_ID, "Guide", [empty_paragraph()])
+    for block_id in st.children[page["id"]]:
+        st.blocks[block_id]["created_time"] = EARLIER
+
+    fail_next(client, "PATCH", sent=False)
+    client.append_children(page["id"], [empty_paragraph()])
+
+    assert len(list(client.list_children(page["id"]))) == 2
+
+
+@pytest.mark.parametrize("write", ["create", "append"])
+def test_successful_write_costs_one_request(notion, write):
+    st, client = notion
+    page = client.create_page(ROOT_PAGE_ID, "Guide")
+    st.reset_stats()
+
+    if write == "create":
+        client.create_page(page["id"], "Child", [empty_paragraph()])
+    else:
+        client.append_children(page["id"], [empty_paragraph()])
+
+    assert st.stats["requests"] == 1
+
+
+def test_page_creation_makes_at_most_max_retries_plus_one_attempts(notion):
+    st, client = notion
+    send = client.session.request
+    posts = []
+
+    def request(method, url, **kwargs):
+        if method != "POST":
+            return send(method, url, **kwargs)
+        posts.append(url)
+        resp = requests.Response()
+        resp.status_code = 429
+        resp._content = b'{"object": "error", "code": "rate_limited"}'
+        resp.request = requests.Request(method, url).prepare()
+        return resp
+
+    client.session.request = request
+    with pytest.raises(RuntimeError):
+        client.create_page(ROOT_PAGE_ID, "Guide")
+
+    assert len(posts) == client.max_retries + 1
+    assert outline(st) == []
@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from ratelimit import TokenBucket
+
+
+def test_bucket_allows_a_burst_of_capacity():
+    bucket = TokenBucket(rate=1.0, capacity=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_acquire_waits_for_the_next_token():
+    bucket = TokenBucket(rate=20.0, capacity=1)
+    assert bucket.acquire() == 0.0
+
+    started = time.monotonic()
+    waited = bucket.acquire()
+    assert 0.03 < waited <= 0.05
+    assert time.monotonic() - started >= waited * 0.9
+
+
+def test_throttle_halves_rate_down_to_minimum():
+    bucket = TokenBucket(rate=8.0, min_rate=2.0)
+    bucket.throttle()
+    assert bucket.rate == 4.0
+    bucket.throttle()
+    bucket.throttle()
+    assert bucket.rate == 2.0
+
+
+def test_throttle_pause_holds_back_tokens():
+    bucket = TokenBucket(rate=100.0)
+    bucket.throttle(pause=0.2)
+    assert not bucket.try_acquire()
+    assert bucket.acquire() >= 0.15
+
+
+def test_recover_raises_rate_up_to_initial_rate():
+    bucket = TokenBucket(rate=4.0, recovery_step=1.0)
+    bucket.throttle()
+    bucket.recover()
+    assert bucket.rate == 3.0
+    bucket.recover()
+    bucket.recover()
+    assert bucket.rate == 4.0
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
@@ -0,0 +1,58 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import run_dependency_graph
+
+
+def test_tasks_run_after_their_dependencies():
+    deps = [[], [0], [0], [1, 2], []]
+
+    def work(index, results):
+        return [index] + sorted(r for dep in deps[index] for r in results[dep])
+
+    results = run_dependency_graph(deps, work, max_workers=3)
+    assert results == [[0], [1, 0], [2, 0], [3, 0, 0, 1, 2], [4]]
+
+
+def test_results_are_released_in_index_order():
+    # Later tasks finish first.
+    def work(index, results):
+        time.sleep(0.02 * (4 - index))
+        return index
+
+    released = []
+    run_dependency_graph([[]] * 5, work, max_workers=5, on_release=lambda i, r: released.append((i, r)))
+    assert released == [(i, i) for i in range(5)]
+
+
+def test_at_most_max_workers_tasks_run_at_once():
+    lock = threading.Lock()
+    running = peak = 0
+
+    def work(index, results):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+
+    run_dependency_graph([[]] * 12, work, max_workers=3)
+    assert peak <= 3
+
+
+def test_task_errors_propagate():
+    def work(index, results):
+        if index == 1:
+            raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        run_dependency_graph([[], [0], [1]], work, max_workers=2)
+
+
+def test_cycle_is_reported():
+    with pytest.raises(RuntimeError, match="cycle"):
+        run_dependency_graph([[1], [0]], lambda index, results: None, max_workers=2)
@@ -0,0 +1,64 @@
+import pytest
+
+import main
+from metrics import ExportMetrics
+from shards import partition_nav_nodes, section_nodes, shard_units
+
+
+def unit_keys(shards: list[list[dict]]) -> list[list[str]]:
+    return [[unit["node"]["key"] for unit in units] for units in shards]
+
+
+def test_partition_is_deterministic(docs_tree):
+    first = partition_nav_nodes(main.load_nav_nodes(docs_tree, ExportMetrics()), 3)
+    second = partition_nav_nodes(main.load_nav_nodes(docs_tree, ExportMetrics()), 3)
+    assert unit_keys(first) == unit_keys(second)
+
+
+@pytest.mark.parametrize("shard_count", [1, 2, 3, 5])
+def test_partition_covers_every_unit_once(docs_tree, shard_count):
+    nav_nodes = main.load_nav_nodes(docs_tree, ExportMetrics())
+    shards = partition_nav_nodes(nav_nodes, shard_count)
+
+    assert len(shards) == shard_count
+    keys = [key for units in unit_keys(shards) for key in units]
+    expected = [unit["node"]["key"] for unit in shard_units(nav_nodes, shard_count)]
+    assert sorted(keys) == sorted(expected)
+    # Each shard keeps its units in navigation order.
+    for units in unit_keys(shards):
+        assert units == [key for key in expected if key in units]
+
+
+def test_heavy_tab_is_split_into_groups(docs_tree):
+    nav_nodes = main.load_nav_nodes(docs_tree, ExportMetrics())
+    units = shard_units(nav_nodes, 3)
+
+    documentation, sdk = nav_nodes
+    assert [unit["node"]["key"] for unit in units] == [
+        *(group["key"] for group in documentation["children"]),
+        sdk["key"],
+    ]
+    assert [unit["parent"] for unit in units] == [documentation["key"]] * 2 + [None]
+
+    sections = section_nodes(partition_nav_nodes(nav_nodes, 3), nav_nodes)
+    assert [(node["key"], parent) for node, parent in sections] == [
+        (documentation["key"], None),
+        *((group["key"], documentation["key"]) for group in documentation["children"]),
+        (sdk["key"], None),
+    ]
+
+
+def test_partition_balances_by_weight():
+    nav_nodes = [
+        {"key": f"tab-{n}", "title": f"Tab {n}", "kind": "tab", "children": [{}] * pages}
+        for n, pages in enumerate([5, 1, 4, 2, 3])
+    ]
+    shards = partition_nav_nodes(nav_nodes, 2)
+    # Tabs weigh 6, 2, 5, 3 and 4 pages. Heaviest first onto the lightest
+    # shard, ties to the lower index: 6+3+2 pages vs 5+4.
+    assert unit_keys(shards) == [["tab-0", "tab-1", "tab-3"], ["tab-2", "tab-4"]]
+
+
+def test_partition_rejects_zero_shards():
+    with pytest.raises(ValueError):
+        partition_nav_nodes([], 0)
@@ -0,0 +1,103 @@
+import sys
+import json
+import uuid
+
+import pytest
+
+import main
+import standin
+from conftest import ROOT_PAGE_ID, outline
+from notion_api import NotionClient
+from targets import load_targets
+
+PAGE_A = "0" * 31 + "a"
+PAGE_B = "0" * 31 + "b"
+ENV = {"TOKEN_A": "secret-a", "TOKEN_B": "secret-b"}
+
+
+def test_targets_are_read_from_json_or_a_file(tmp_path):
+    spec = json.dumps(
+        [
+            {"name": "team-a", "root_page": PAGE_A, "token_env": "TOKEN_A"},
+            {"root_page": f"https://www.notion.so/Docs-{PAGE_B}", "token": "inline", "staging_page": PAGE_A},
+        ]
+    )
+    path = tmp_path / "targets.json"
+    path.write_text(spec, encoding="utf-8")
+
+    for source in (spec, str(path)):
+        assert load_targets(source, ENV) == [
+            {"name": "team-a", "root_page": str(uuid.UUID(PAGE_A)), "token": "secret-a", "staging_page": None},
+            {
+                "name": "target-2",
+                "root_page": str(uuid.UUID(PAGE_B)),
+                "token": "inline",
+                "staging_page": str(uuid.UUID(PAGE_A)),
+            },
+        ]
+
+
+@pytest.mark.parametrize(
+    "spec, message",
+    [
+        ("missing.json", "not found"),
+        ("[{", "not valid JSON"),
+        ("[]", "non-empty JSON list"),
+        ('["team-a"]', "not an object"),
+        (f'[{{"name": "team a", "root_page": "{PAGE_A}", "token": "t"}}]', "may only use"),
+        (
+            f'[{{"name": "a", "root_page": "{PAGE_A}", "token": "t"}}, '
+            f'{{"name": "a", "root_page": "{PAGE_B}", "token": "t"}}]',
+            "Duplicate target name 'a'",
+        ),
+        ('[{"name": "a", "token": "t"}]', "has no root_page"),
+        (f'[{{"name": "a", "root_page": "{PAGE_A}", "token_env": "TOKEN_C"}}]', "TOKEN_C is not set"),
+        (f'[{{"name": "a", "root_page": "{PAGE_A}"}}]', "neither token_env nor token"),
+    ],
+)
+def test_invalid_targets_are_rejected(spec, message, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(ValueError, match=message):
+        load_targets(spec, ENV)
+
+
+def direct_export_outline(root_dir) -> list:
+    server, fresh = standin.start_standin(port=0)
+    client = NotionClient(
+        "test-token",
+        base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+        max_requests_per_second=1000,
+    )
+    try:
+        main.process_directory_with_docs_json(root_dir, ROOT_PAGE_ID, client, max_workers=2)
+        return outline(fresh)
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_failing_target_does_not_stop_the_others(notion, docs_tree, monkeypatch, capsys):
+    st, client = notion
+    base_url = client.base_url
+    targets = [
+        {"name": "docs", "root_page": ROOT_PAGE_ID, "token": "t"},
+        {"name": "gone", "root_page": str(uuid.uuid4()), "token": "t"},
+    ]
+    monkeypatch.setenv("NOTION_API_BASE_URL", base_url)
+    # main() sets the log level from -q for the rest of the process.
+    monkeypatch.setattr(main, "VERBOSITY", main.VERBOSITY)
+    monkeypatch.setattr(sys, "argv", ["main.py", str(docs_tree), "--targets", json.dumps(targets), "-q"])
+
+    with pytest.raises(SystemExit) as exit_info:
+        main.main()
+
+    assert exit_info.value.code == 1
+    out = capsys.readouterr().out
+    assert "[targets] docs: ok" in out
+    assert "[targets] gone: failed" in out
+    assert outline(st) == direct_export_outline(docs_tree)
+    report_dir = docs_tree / ".notion-export" / "targets"
+    assert (report_dir / "docs" / "metrics.json").is_file()
+    assert (report_dir / "gone" / "metrics.json").is_file()
+
@@ -0,0 +1,120 @@
+"""
+Change detection for main.py --watch, by polling the docs tree.
+
+No file system notification API (and so no extra dependency) is used: the
+tree is re-scanned with os.scandir every `interval` seconds and each file's
+(mtime, size) is compared with the previous scan. Changes are debounced: a
+batch is only handed out once the tree has been quiet for `debounce`
+seconds, so an editor saving several files at once, or one file several
+times in a row, causes a single sync. A batch is never held back for more
+than `max_delay` seconds, even if saves keep coming.
+"""
+import os
+import time
+import threading
+from pathlib import Path
+
+DEFAULT_POLL_INTERVAL = 0.5
+DEFAULT_DEBOUNCE = 1.0
+DEFAULT_MAX_DELAY = 10.0
+
+# Root-level directories that never hold exported content. Hidden
+# directories (.git, .notion-export, ...) are skipped at every level.
+WATCH_IGNORED_DIR_NAMES = {"node_modules", "scripts"}
+
+
+def scan_tree(root_dir: Path, ignored_dir_names: set[str] = WATCH_IGNORED_DIR_NAMES) -> dict[Path, tuple[int, int]]:
+    """
+    Return {path: (mtime_ns, size)} for every file under `root_dir`.
+    """
+    files: dict[Path, tuple[int, int]] = {}
+    pending = [(str(root_dir), True)]
+
+    while pending:
+        dir_path, at_root = pending.pop()
+        try:
+            entries = list(os.scandir(dir_path))
+        except OSError:
+            continue
+
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            try:
+                if entry.is_dir():
+                    if not (at_root and entry.name in ignored_dir_names):
+                        pending.append((entry.path, False))
+                    continue
+                if entry.is_file():
+                    stat = entry.stat()
+                    files[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                # Removed between the listing and the stat: picked up as a
+                # deletion on the next scan.
+                continue
+
+    return files
+
+
+def diff_scans(before: dict[Path, tuple[int, int]], after: dict[Path, tuple[int, int]]) -> set[Path]:
+    """
+    Paths created, deleted or modified between two scans.
+    """
+    changed = {path for path, signature in after.items() if before.get(path) != signature}
+    changed.update(path for path in before if path not in after)
+    return changed
+
+
+class TreeWatcher:
+    """
+    Polls a directory tree and returns debounced batches of changed paths.
+    """
+
+    def __init__(
+        self,
+        root_dir: str | Path,
+        interval: float = DEFAULT_POLL_INTERVAL,
+        debounce: float = DEFAULT_DEBOUNCE,
+        max_delay: float = DEFAULT_MAX_DELAY,
+    ):
+        self.root_dir = Path(root_dir).resolve()
+        self.interval = interval
+        self.debounce = debounce
+        self.max_delay = max(max_delay, debounce)
+        self.scans = 0
+        self.snapshot = scan_tree(self.root_dir)
+
+    def poll(self) -> set[Path]:
+        """
+        Re-scan the tree and return the paths changed since the last scan.
+        """
+        current = scan_tree(self.root_dir)
+        self.scans += 1
+        changed = diff_scans(self.snapshot, current)
+        self.snapshot = current
+        return changed
+
+    def wait_for_changes(self, stop: threading.Event | None = None) -> set[Path] | None:
+        """
+        Block until files changed and the tree has been quiet for `debounce`
+        seconds (or the first change is `max_delay` seconds old), then return
+        every path changed in that time. Returns None once `stop` is set.
+        """
+        stop = stop or threading.Event()
+        pending: set[Path] = set()
+        first_change = last_change = 0.0
+
+        while not stop.wait(self.interval):
+            changed = self.poll()
+            now = time.monotonic()
+            if changed:
+                if not pending:
+                    first_change = now
+                pending |= changed
+                last_change = now
+            if not pending:
+                continue
+            if now - last_change >= self.debounce or now - first_change >= self.max_delay:
+                return pending
+
+        return None
@@ -1,17 +1,37 @@
 #!/usr/bin/env python3
 import os
+import re
+import sys
 import json
 import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from docs_index import DocsIndex, iter_nav_slugs
 
 EXCLUDE_FILENAMES = {"bl.md"}
 
 PAGES_PREFIX = "/cli-reference/commands"
 
+# Command pages are named after the command, with "_" between words:
+# bl_get_agents.md documents `bl get agents`.
+COMMAND_SEPARATOR = "_"
+
+# Subcommands of a top-level command (bl get, bl delete, ...) get a group of
+# their own once there are at least this many pages under it.
+DEFAULT_GROUP_DEPTH = 1
+DEFAULT_MIN_GROUP_SIZE = 3
+
+# Links between command pages, e.g. [bl apply](bl_apply.md).
+INTERNAL_LINK_RE = re.compile(r'\[([^\]]+)\]\(([^/)\s]+)\.md\)')
+
 
-def collect_generated_pages(generated_dir: str) -> list[str]:
+def collect_generated_pages(command_files: list[dict]) -> list[str]:
     pages: list[str] = []
 
-    for filename in sorted(os.listdir(generated_dir)):
+    for entry in command_files:
+        filename = entry["path"].name
         if not filename.endswith(".md"):
             continue
         if filename in EXCLUDE_FILENAMES:
@@ -23,34 +43,171 @@ def collect_generated_pages(generated_dir: str) -> list[str]:
     return pages
 
 
-def rewrite_internal_links(generated_dir: str) -> int:
-    import re
-
-    pattern = re.compile(r'\[([^\]]+)\]\(([^/)\s]+)\.md\)')
-
+def build_command_trie(pages: list[str]) -> dict:
+    """
+    Build a prefix trie of command pages from their names, in one pass over
+    `pages`. Each node is {"page", "size", "children"}: the page documenting
+    the command itself (None if there is none), the number of pages in its
+    subtree, and its subcommands by name, in the order they were first seen.
+    """
+    root = {"page": None, "size": 0, "children": {}}
+
+    for page in pages:
+        words = page.rsplit("/", 1)[-1].split(COMMAND_SEPARATOR)
+        node = root
+        node["size"] += 1
+        for word in words:
+            node = node["children"].setdefault(word, {"page": None, "size": 0, "children": {}})
+            node["size"] += 1
+        node["page"] = page
+
+    return root
+
+
+def group_command_pages(
+    pages: list[str],
+    max_depth: int = DEFAULT_GROUP_DEPTH,
+    min_group_size: int = DEFAULT_MIN_GROUP_SIZE,
+) -> list:
+    """
+    Turn the flat list of command pages into docs.json navigation entries,
+    with nested groups for commands that have subcommands: with a depth of
+    1, `bl get` and its subcommands go into a "bl get" group, with a depth
+    of 2 `bl get agents` could get a group inside it, and so on. Commands
+    with fewer than `min_group_size` pages (their own included) stay inline
+    in their parent. A depth of 0 keeps the flat list.
+    """
+    def entries(node: dict, words: list[str]) -> list:
+        result = [node["page"]] if node["page"] is not None else []
+        for word, child in node["children"].items():
+            child_words = words + [word]
+            child_entries = entries(child, child_words)
+            # The first word is the program (bl): its subcommands are at depth 1.
+            if 1 < len(child_words) <= max_depth + 1 and child["size"] >= min_group_size:
+                result.append({"group": " ".join(child_words), "pages": child_entries})
+            else:
+                result.extend(child_entries)
+        return result
+
+    return entries(build_command_trie(pages), [])
+
+
+def iter_groups(entries: list):
+    """
+    Yield every group in a list of navigation entries, nested ones included.
+    """
+    for entry in entries:
+        if isinstance(entry, dict):
+            yield entry
+            yield from iter_groups(entry.get("pages", []))
+
+
+def rewrite_links(text: str) -> str:
+    """
+    Point links between command pages at their docs site path.
+    """
+    return INTERNAL_LINK_RE.sub(lambda m: f"[{m.group(1)}]({PAGES_PREFIX}/{m.group(2)})", text)
+
+
+def write_atomic(path: Path, data: bytes):
+    """
+    Write `data` to `path` through a temporary file in the same directory,
+    so readers never see a partial file.
+    """
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def rewrite_internal_links(command_files: list[dict]) -> int:
     modified = 0
-    for filename in sorted(os.listdir(generated_dir)):
-        if not filename.endswith(".md"):
+    for entry in command_files:
+        filepath = entry["path"]
+        if filepath.suffix != ".md":
             continue
 
-        filepath = os.path.join(generated_dir, filename)
         with open(filepath, "r", encoding="utf-8") as f:
             original = f.read()
 
-        def _replace(m: re.Match) -> str:
-            label, stem = m.group(1), m.group(2)
-            return f"[{label}]({PAGES_PREFIX}/{stem})"
-
-        updated = pattern.sub(_replace, original)
+        updated = rewrite_links(original)
         if updated != original:
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(updated)
+            write_atomic(filepath, updated.encode("utf-8"))
             modified += 1
 
     return modified
 
 
-def update_docs_json(docs_json_path: str, generated_pages: list[str]) -> None:
+def list_files(directory: Path) -> dict[str, Path]:
+    """
+    Map the POSIX path relative to `directory` of every regular file under
+    it (hidden files and directories excluded) to its path.
+    """
+    files = {}
+    for dir_path, dir_names, file_names in os.walk(directory):
+        dir_names[:] = [name for name in dir_names if not name.startswith(".")]
+        for name in file_names:
+            if name.startswith("."):
+                continue
+            path = Path(dir_path) / name
+            files[path.relative_to(directory).as_posix()] = path
+    return files
+
+
+def sync_command_files(source_dir: str, generated_dir: str) -> dict:
+    """
+    Make `generated_dir` a copy of `source_dir`, with internal links of the
+    .md files rewritten on the way.
+
+    Each destination file is compared with what it should contain (after
+    rewriting, in memory) and only rewritten, atomically, when it differs,
+    so unchanged pages keep their content and mtime. Files no longer in the
+    source are deleted. Returns counts of written, unchanged and deleted
+    files.
+    """
+    source_dir = Path(source_dir)
+    generated_dir = Path(generated_dir)
+    if not source_dir.is_dir():
+        raise RuntimeError(f"Source directory {source_dir} does not exist")
+
+    source_files = list_files(source_dir)
+    existing_files = list_files(generated_dir) if generated_dir.is_dir() else {}
+
+    stats = {"written": 0, "unchanged": 0, "deleted": 0}
+
+    for rel, source_path in sorted(source_files.items()):
+        data = source_path.read_bytes()
+        if source_path.suffix == ".md":
+            data = rewrite_links(data.decode("utf-8")).encode("utf-8")
+
+        dest_path = generated_dir / rel
+        existing = existing_files.get(rel)
+        if existing is not None and existing.stat().st_size == len(data) and existing.read_bytes() == data:
+            stats["unchanged"] += 1
+            continue
+
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(dest_path, data)
+        stats["written"] += 1
+
+    for rel in sorted(set(existing_files) - set(source_files)):
+        existing_files[rel].unlink()
+        stats["deleted"] += 1
+
+    # Drop directories the deletions left empty.
+    for dir_path, _, _ in sorted(os.walk(generated_dir), key=lambda item: -len(item[0])):
+        if Path(dir_path) != generated_dir and not os.listdir(dir_path):
+            os.rmdir(dir_path)
+
+    return stats
+
+
+def update_docs_json(docs_json_path: str, generated_pages: list) -> tuple[dict, bool]:
+    """
+    Set the pages (and nested groups) of the 'Commands' group. docs.json is
+    only rewritten when they changed. Returns the docs.json data and
+    whether it was written.
+    """
     with open(docs_json_path, "r") as f:
         data = json.load(f)
 
@@ -91,11 +248,29 @@ def update_docs_json(docs_json_path: str, generated_pages: list[str]) -> None:
             "Could not find group 'Commands' under 'CLI Reference' -> 'Overview'"
         )
 
+    if commands_group.get("pages") == generated_pages:
+        return data, False
+
     commands_group["pages"] = generated_pages
 
-    with open(docs_json_path, "w") as f:
-        json.dump(data, f, indent=2)
-        f.write("\n")
+    write_atomic(Path(docs_json_path), (json.dumps(data, indent=2) + "\n").encode("utf-8"))
+
+    return data, True
+
+
+def index_command_files(generated_dir: str, docs_json_path: str) -> tuple[DocsIndex, list[dict]]:
+    """
+    Index the docs tree around docs.json once, and return the index together
+    with the command pages in `generated_dir`. A generated_dir outside the
+    docs tree gets an index of its own.
+    """
+    index = DocsIndex(os.path.dirname(os.path.abspath(docs_json_path)), read_titles=False)
+
+    try:
+        return index, index.under(generated_dir)
+    except ValueError:
+        own_index = DocsIndex(generated_dir, read_titles=False)
+        return index, own_index.under(own_index.root_dir)
 
 
 def main() -> None:
@@ -110,19 +285,68 @@ def main() -> None:
         "docs_json",
         help="Path to docs.json file to update",
     )
+    parser.add_argument(
+        "--source",
+        help=(
+            "Upstream docs directory to sync generated_dir from: only changed "
+            "files are written and files missing upstream are deleted. Without "
+            "it, links are rewritten in place in generated_dir."
+        ),
+    )
+    parser.add_argument(
+        "--group-depth",
+        type=int,
+        default=DEFAULT_GROUP_DEPTH,
+        help=(
+            "Nest subcommand pages in groups down to this many command words "
+            f"below bl (default: {DEFAULT_GROUP_DEPTH}; 0 keeps one flat list)."
+        ),
+    )
+    parser.add_argument(
+        "--min-group-size",
+        type=int,
+        default=DEFAULT_MIN_GROUP_SIZE,
+        help=(
+            "Smallest number of pages a command needs to get a group of its own; "
+            f"smaller ones stay in their parent's list (default: {DEFAULT_MIN_GROUP_SIZE})."
+        ),
+    )
 
     args = parser.parse_args()
+    if args.group_depth < 0:
+        parser.error("--group-depth must be 0 or more")
+    if args.min_group_size < 1:
+        parser.error("--min-group-size must be at least 1")
+
+    if args.source:
+        stats = sync_command_files(args.source, args.generated_dir)
+        print(
+            f"Synced {args.generated_dir} from {args.source}: {stats['written']} file(s) written, "
+            f"{stats['unchanged']} unchanged, {stats['deleted']} deleted."
+        )
 
-    generated_pages = collect_generated_pages(args.generated_dir)
-    modified = rewrite_internal_links(args.generated_dir)
-    print(
-        f"Rewrote internal links in {modified} file(s)."
-    )
-    update_docs_json(args.docs_json, generated_pages)
-    print(
-        f"Updated {args.docs_json} with {len(generated_pages)} pages under "
-        f"'CLI Reference' -> 'Overview' -> 'Commands'."
-    )
+    index, command_files = index_command_files(args.generated_dir, args.docs_json)
+
+    generated_pages = collect_generated_pages(command_files)
+    if not args.source:
+        modified = rewrite_internal_links(command_files)
+        print(
+            f"Rewrote internal links in {modified} file(s)."
+        )
+    nav_entries = group_command_pages(generated_pages, args.group_depth, args.min_group_size)
+    groups = sum(1 for _ in iter_groups(nav_entries))
+    data, changed = update_docs_json(args.docs_json, nav_entries)
+    if changed:
+        print(
+            f"Updated {args.docs_json} with {len(generated_pages)} pages in {groups} nested "
+            f"group(s) under 'CLI Reference' -> 'Overview' -> 'Commands'."
+        )
+    else:
+        print(f"{args.docs_json} already lists these {len(generated_pages)} command pages.")
+
+    for slug in iter_nav_slugs(data):
+        index.lookup(slug)
+    index.print_report("[index]")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+Poll the upstream sources of the generated docs, downloading only what
+changed.
+
+  python main.py api    # api-reference/controlplane.yml from the public API
+  python main.py cli    # CLI command pages from the toolkit repo's docs/ directory
+
+Every request is conditional (If-None-Match / If-Modified-Since, from the
+validators saved in --state-file), and downloads are compared by content
+hash with what is already on disk.
+
+For the API spec, a new version is also diffed semantically against the
+current one: added, removed and changed operations and schemas, compared
+on the compiled OpenAPI index the Notion export uses, plus the raw spec
+sections that index does not track (servers, security schemes, ...). The
+spec is rewritten whenever its content changed; the diff only describes
+the change in the pull request.
+
+For the CLI pages, the repo's directory listing gives each file's git blob
+sha, and only files whose sha differs from the local mirror (--mirror) are
+downloaded. generate-submenu-cli then syncs the commands pages from the
+mirror.
+
+Both write a pull request body to --body-file and, on GitHub Actions,
+`changed=true|false` to $GITHUB_OUTPUT.
+"""
+import os
+import sys
+import json
+import hashlib
+import argparse
+from pathlib import Path
+
+import requests
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "export-notion"))
+
+from openapi_index import YAML_LOADER, compile_openapi_index
+
+DEFAULT_API_SPEC_URL = "https://api.blaxel.ai/v0/openapi/controlplane.yml"
+DEFAULT_API_SPEC_PATH = "api-reference/controlplane.yml"
+
+DEFAULT_GITHUB_API_URL = "https://api.github.com"
+DEFAULT_CLI_REPO = "blaxel-ai/toolkit"
+DEFAULT_CLI_REF = "main"
+DEFAULT_CLI_DOCS_DIR = "docs"
+
+STATE_FILE_NAME = ".poll-upstream/state.json"
+CLI_MIRROR_DIR_NAME = ".poll-upstream/cli-docs"
+STATE_VERSION = 1
+
+REQUEST_TIMEOUT = 60.0
+
+# Changed operations and schemas listed in a pull request body, per section.
+MAX_BODY_ITEMS = 100
+
+
+def sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def git_blob_sha(data: bytes) -> str:
+    """
+    The sha git (and the GitHub contents API) gives a file with this content.
+    """
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def write_atomic(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class PollState:
+    """
+    Validators and content hashes of the resources fetched by previous
+    polls, by URL, kept in a JSON file:
+
+      {"version": 1, "resources": {url: {"etag", "last_modified", "sha256", "body"}}}
+
+    `body` is only kept for small JSON responses (directory listings) that
+    are needed again when the server answers 304.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.resources: dict[str, dict] = {}
+
+        if path.is_file():
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == STATE_VERSION:
+                    self.resources = data.get("resources", {})
+            except (OSError, ValueError) as e:
+                print(f"[poll] Ignoring unreadable state {path}: {e}")
+
+    def conditional_headers(self, url: str, expected_sha256: str | None = None) -> dict:
+        """
+        Validators for a conditional request to `url`. With
+        `expected_sha256`, none are sent unless the last download of `url`
+        had that hash (i.e. the local copy is still what was fetched).
+        """
+        entry = self.resources.get(url)
+        if not entry:
+            return {}
+        if expected_sha256 is not None and entry.get("sha256") != expected_sha256:
+            return {}
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, url: str, resp: requests.Response, keep_body: bool = False):
+        """
+        Remember the validators of a response.
+        """
+        entry = {
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "sha256": sha256_hex(resp.content),
+        }
+        if keep_body:
+            entry["body"] = resp.text
+        self.resources[url] = entry
+
+    def save(self):
+        data = {"version": STATE_VERSION, "resources": self.resources}
+        write_atomic(self.path, (json.dumps(data, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+
+
+class Poller:
+    """
+    A requests session that sends conditional GETs and counts what they cost.
+    """
+
+    def __init__(self, state: PollState, headers: dict | None = None):
+        self.state = state
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        self.stats = {"requests": 0, "not_modified": 0, "bytes": 0}
+
+    def get(self, url: str, conditional: bool = True, expected_sha256: str | None = None) -> requests.Response | None:
+        """
+        GET `url`. Returns None when the server answers 304 Not Modified.
+        """
+        headers = self.state.conditional_headers(url, expected_sha256) if conditional else {}
+        resp = self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        self.stats["requests"] += 1
+
+        if resp.status_code == 304:
+            self.stats["not_modified"] += 1
+            return None
+        if not resp.ok:
+            raise RuntimeError(f"Failed to fetch {url}: {resp.status_code} {resp.text[:200]}")
+
+        self.stats["bytes"] += len(resp.content)
+        return resp
+
+    def print_stats(self):
+        print(
+            f"[poll] {self.stats['requests']} request(s), {self.stats['not_modified']} not modified, "
+            f"{self.stats['bytes']} byte(s) downloaded"
+        )
+
+
+def load_spec(data: bytes) -> dict:
+    spec = yaml.load(data, Loader=YAML_LOADER)
+    if not isinstance(spec, dict) or "paths" not in spec:
+        raise ValueError("not an OpenAPI spec (no 'paths')")
+    return spec
+
+
+def compile_spec(data: bytes) -> dict:
+    return compile_openapi_index(load_spec(data), sha256_hex(data))
+
+
+def diff_spec_sections(old_spec: dict | None, new_spec: dict) -> list[str]:
+    """
+    Top-level sections of the raw spec that differ (with components
+    broken down by kind, e.g. "components.securitySchemes"). Catches what
+    the compiled index leaves out: servers, security schemes, info text,
+    extra tags, examples.
+    """
+    old_spec = old_spec or {}
+    changed = []
+    for key in sorted(set(old_spec) | set(new_spec), key=str):
+        old, new = old_spec.get(key), new_spec.get(key)
+        if old == new:
+            continue
+        if key == "components" and isinstance(old or {}, dict) and isinstance(new or {}, dict):
+            changed.extend(
+                f"components.{kind}"
+                for kind in sorted(set(old or {}) | set(new or {}), key=str)
+                if (old or {}).get(kind) != (new or {}).get(kind)
+            )
+        else:
+            changed.append(str(key))
+    return changed
+
+
+def diff_fields(old: dict, new: dict) -> list[str]:
+    return sorted(key for key in set(old) | set(new) if old.get(key) != new.get(key))
+
+
+def diff_openapi(old_index: dict | None, new_index: dict) -> dict:
+    """
+    Semantic diff of two compiled OpenAPI indexes (see openapi_index):
+
+      {"info": [changed fields],
+       "operations": {"added": [...], "removed": [...], "changed": [...]},
+       "schemas":    {"added": [...], "removed": [...], "changed": [...]}}
+
+    Added and removed entries are {"key", "summary"} for operations and
+    {"name"} for schemas; changed ones also list what changed ("fields"
+    of an operation; "added", "removed" and "changed" properties and
+    "fields" of a schema). An operation that only uses a changed schema
+    is not listed as changed itself.
+    """
+    old_index = old_index or {"operations": [], "schemas": {}}
+
+    info = [
+        field for field in ("title", "api_version")
+        if old_index.get(field) != new_index.get(field)
+    ]
+
+    old_operations = {operation["key"]: operation for operation in old_index["operations"]}
+    new_operations = {operation["key"]: operation for operation in new_index["operations"]}
+
+    operations = {
+        "added": [
+            {"key": key, "summary": new_operations[key]["summary"]}
+            for key in new_operations if key not in old_operations
+        ],
+        "removed": [
+            {"key": key, "summary": old_operations[key]["summary"]}
+            for key in old_operations if key not in new_operations
+        ],
+        "changed": [
+            {
+                "key": key,
+                "summary": operation["summary"],
+                "fields": diff_fields(old_operations[key], operation),
+            }
+            for key, operation in new_operations.items()
+            if key in old_operations and old_operations[key] != operation
+        ],
+    }
+
+    old_schemas = old_index["schemas"]
+    new_schemas = new_index["schemas"]
+    changed_schemas = []
+    for name, schema in new_schemas.items():
+        if name not in old_schemas or old_schemas[name] == schema:
+            continue
+        old_properties = old_schemas[name].get("properties", {})
+        new_properties = schema.get("properties", {})
+        changed_schemas.append(
+            {
+                "name": name,
+                "added": [field for field in new_properties if field not in old_properties],
+                "removed": [field for field in old_properties if field not in new_properties],
+                "changed": [
+                    field for field in new_properties
+                    if field in old_properties and old_properties[field] != new_properties[field]
+                ],
+                "fields": [
+                    field for field in diff_fields(old_schemas[name], schema) if field != "properties"
+                ],
+            }
+        )
+
+    schemas = {
+        "added": [{"name": name} for name in new_schemas if name not in old_schemas],
+        "removed": [{"name": name} for name in old_schemas if name not in new_schemas],
+        "changed": changed_schemas,
+    }
+
+    return {"info": info, "operations": operations, "schemas": schemas}
+
+
+def diff_is_empty(diff: dict) -> bool:
+    return not diff["info"] and not any(
+        entries for section in ("operations", "schemas") for entries in diff[section].values()
+    )
+
+
+def render_openapi_diff(diff: dict, source_url: str, sections: list[str] | None = None) -> str:
+    """
+    Pull request body describing an OpenAPI diff, and the raw spec
+    `sections` that changed (see diff_spec_sections()).
+    """
+    operations = diff["operations"]
+    schemas = diff["schemas"]
+    lines = [
+        f"Automated update of the API reference from {source_url}.",
+        "",
+        f"- Operations: {len(operations['added'])} added, {len(operations['removed'])} removed, "
+        f"{len(operations['changed'])} changed",
+        f"- Schemas: {len(schemas['added'])} added, {len(schemas['removed'])} removed, "
+        f"{len(schemas['changed'])} changed",
+    ]
+    if diff["info"]:
+        lines.append(f"- Spec info changed: {', '.join(diff['info'])}")
+
+    def section(title: str, entries: list, render):
+        if not entries:
+            return
+        lines.extend(["", f"### {title}", ""])
+        lines.extend(render(entry) for entry in entries[:MAX_BODY_ITEMS])
+        if len(entries) > MAX_BODY_ITEMS:
+            lines.append(f"- ... and {len(entries) - MAX_BODY_ITEMS} more")
+
+    def render_operation(entry: dict) -> str:
+        line = f"- `{entry['key']}` {entry['summary']}"
+        if entry.get("fields"):
+            line += f" ({', '.join(entry['fields'])})"
+        return line
+
+    def render_schema(entry: dict) -> str:
+        details = [
+            f"{label} {', '.join(f'`{field}`' for field in entry[key])}"
+            for key, label in (("added", "added"), ("removed", "removed"), ("changed", "changed"))
+            if entry.get(key)
+        ]
+        if entry.get("fields"):
+            details.append(", ".join(entry["fields"]))
+        return f"- `{entry['name']}`" + (f": {'; '.join(details)}" if details else "")
+
+    section("Added operations", operations["added"], render_operation)
+    section("Removed operations", operations["removed"], render_operation)
+    section("Changed operations", operations["changed"], render_operation)
+    section("Added schemas", schemas["added"], render_schema)
+    section("Removed schemas", schemas["removed"], render_schema)
+    section("Changed schemas", schemas["changed"], render_schema)
+
+    if diff_is_empty(diff):
+        lines.extend(["", "No operation or schema changed: the update only touches parts of the spec "
+                      "the reference index does not track, which the docs site still renders."])
+    section("Changed spec sections", sections or [], lambda name: f"- `{name}`")
+
+    return "\n".join(lines) + "\n"
+
+
+def poll_api(args: argparse.Namespace, state: PollState) -> tuple[bool, str]:
+    """
+    Fetch the API spec if it changed upstream and rewrite the local copy
+    whenever its content differs. The semantic diff only describes the
+    change in the pull request body. Returns (changed, pull request body).
+    """
+    spec_path = Path(args.spec)
+    current = spec_path.read_bytes() if spec_path.is_file() else None
+    current_sha256 = sha256_hex(current) if current is not None else None
+
+    poller = Poller(state)
+    try:
+        resp = poller.get(args.url, expected_sha256=current_sha256)
+    finally:
+        poller.print_stats()
+
+    if resp is None:
+        print(f"[poll] {args.url} not modified since the last poll.")
+        return False, "No upstream changes.\n"
+
+    data = resp.content
+    if sha256_hex(data) == current_sha256:
+        print(f"[poll] {args.url} has the same content as {spec_path}.")
+        state.record(args.url, resp)
+        return False, "No upstream changes.\n"
+
+    new_spec = load_spec(data)
+    new_index = compile_openapi_index(new_spec, sha256_hex(data))
+    old_spec = old_index = None
+    if current is not None:
+        try:
+            old_spec = load_spec(current)
+            old_index = compile_openapi_index(old_spec, current_sha256)
+        except (ValueError, yaml.YAMLError) as e:
+            print(f"[poll] Could not parse the current {spec_path}, treating it as absent: {e}")
+
+    diff = diff_openapi(old_index, new_index)
+    sections = diff_spec_sections(old_spec, new_spec)
+
+    write_atomic(spec_path, data)
+    state.record(args.url, resp)
+
+    operations = diff["operations"]
+    schemas = diff["schemas"]
+    print(
+        f"[poll] Updated {spec_path}: operations {len(operations['added'])} added, "
+        f"{len(operations['removed'])} removed, {len(operations['changed'])} changed; schemas "
+        f"{len(schemas['added'])} added, {len(schemas['removed'])} removed, {len(schemas['changed'])} changed; "
+        f"spec sections changed: {', '.join(sections) or 'none'}."
+    )
+    return True, render_openapi_diff(diff, args.url, sections)
+
+
+def poll_cli(args: argparse.Namespace, state: PollState) -> tuple[bool, str]:
+    """
+    Bring the mirror of the toolkit docs directory up to date, downloading
+    only files whose git blob sha changed. Returns (changed, pull request
+    body).
+    """
+    mirror = Path(args.mirror)
+    listing_url = (
+        f"{args.github_api_url.rstrip('/')}/repos/{args.repo}/contents/"
+        f"{args.docs_dir.strip('/')}?ref={args.ref}"
+    )
+
+    headers = {"Accept": "application/vnd.github+json"}
+    token = os.environ.get("GITHUB_TOKEN")
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    poller = Poller(state, headers)
+
+    try:
+        resp = poller.get(listing_url)
+        if resp is not None:
+            state.record(listing_url, resp, keep_body=True)
+            listing = resp.json()
+        else:
+            listing = json.loads(state.resources[listing_url]["body"])
+        if not isinstance(listing, list):
+            raise RuntimeError(f"{listing_url} did not return a directory listing")
+
+        upstream = {}
+        for entry in listing:
+            if entry.get("type") != "file":
+                print(f"[poll] Skipping {entry.get('type')} {entry.get('path')}: only files are mirrored.")
+                continue
+            upstream[entry["name"]] = entry
+
+        existing = {
+            path.name: path for path in mirror.iterdir() if path.is_file() and not path.name.startswith(".")
+        } if mirror.is_dir() else {}
+
+        added, updated, removed = [], [], []
+        for name, entry in sorted(upstream.items()):
+            local = existing.get(name)
+            if local is not None and git_blob_sha(local.read_bytes()) == entry["sha"]:
+                continue
+
+            file_resp = poller.get(entry["download_url"], conditional=False)
+            data = file_resp.content
+            if git_blob_sha(data) != entry["sha"]:
+                raise RuntimeError(f"{entry['download_url']} does not match the listed sha {entry['sha']}")
+            write_atomic(mirror / name, data)
+            (updated if local is not None else added).append(name)
+
+        for name in sorted(set(existing) - set(upstream)):
+            existing[name].unlink()
+            removed.append(name)
+    finally:
+        poller.print_stats()
+
+    changed = bool(added or updated or removed)
+    print(
+        f"[poll] {mirror}: {len(added)} added, {len(updated)} updated, {len(removed)} removed, "
+        f"{len(upstream) - len(added) - len(updated)} unchanged."
+    )
+
+    if not changed:
+        return False, "No upstream changes.\n"
+
+    lines = [f"Automated update of the CLI reference from {args.repo}/{args.docs_dir.strip('/')}.", ""]
+    for label, names in (("Added", added), ("Updated", updated), ("Removed", removed)):
+        if names:
+            lines.append(f"- {label}: " + ", ".join(f"`{name}`" for name in names))
+    return True, "\n".join(lines) + "\n"
+
+
+def write_github_output(changed: bool):
+    output = os.environ.get("GITHUB_OUTPUT")
+    if output:
+        with open(output, "a", encoding="utf-8") as f:
+            f.write(f"changed={'true' if changed else 'false'}\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Poll the upstream API spec and CLI docs with conditional requests."
+    )
+    parser.add_argument("--state-file", default=STATE_FILE_NAME,
+                        help=f"Validators and hashes of previous polls (default: {STATE_FILE_NAME})")
+    parser.add_argument("--body-file", help="Write the pull request body to this file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    api = subparsers.add_parser("api", help="Poll the OpenAPI spec of the control plane")
+    api.add_argument("--url", default=os.environ.get("UPSTREAM_API_SPEC_URL") or DEFAULT_API_SPEC_URL,
+                     help="Spec URL (default: $UPSTREAM_API_SPEC_URL, else the public API)")
+    api.add_argument("--spec", default=DEFAULT_API_SPEC_PATH,
+                     help=f"Local copy of the spec (default: {DEFAULT_API_SPEC_PATH})")
+
+    cli = subparsers.add_parser("cli", help="Poll the CLI docs directory of the toolkit repo")
+    cli.add_argument("--github-api-url", default=os.environ.get("GITHUB_API_URL") or DEFAULT_GITHUB_API_URL,
+                     help="GitHub API base URL (default: $GITHUB_API_URL, else api.github.com)")
+    cli.add_argument("--repo", default=DEFAULT_CLI_REPO, help=f"Repository (default: {DEFAULT_CLI_REPO})")
+    cli.add_argument("--ref", default=DEFAULT_CLI_REF, help=f"Branch or tag (default: {DEFAULT_CLI_REF})")
+    cli.add_argument("--docs-dir", default=DEFAULT_CLI_DOCS_DIR,
+                     help=f"Directory of the docs in the repository (default: {DEFAULT_CLI_DOCS_DIR})")
+    cli.add_argument("--mirror", default=CLI_MIRROR_DIR_NAME,
+                     help=f"Local mirror of the upstream files (default: {CLI_MIRROR_DIR_NAME})")
+
+    args = parser.parse_args()
+
+    state = PollState(Path(args.state_file))
+
+    try:
+        if args.command == "api":
+            changed, body = poll_api(args, state)
+        else:
+            changed, body = poll_cli(args, state)
+    except (RuntimeError, ValueError, yaml.YAMLError, requests.RequestException) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    state.save()
+
+    if args.body_file:
+        write_atomic(Path(args.body_file), body.encode("utf-8"))
+    write_github_output(changed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the upstream servers polled by main.py.
+
+It serves the files under a directory and implements:
+
+  GET /files/{path}                                the file, like the spec URL or a raw download
+  GET /repos/{owner}/{repo}/contents/{dir}?ref=..  GitHub contents API listing of {dir}
+
+Both send ETag and Last-Modified headers and answer 304 Not Modified to
+matching If-None-Match / If-Modified-Since requests, and listings carry
+each file's git blob sha with a download_url pointing back at /files/.
+Files are read on every request, so editing them between polls is how
+upstream changes are simulated.
+
+Control endpoints:
+
+  GET  /__stats    request counts, 304s and bytes sent
+  POST /__reset    reset the statistics
+
+Usage:
+  python standin.py --root /tmp/upstream --port 8766
+  python main.py api --url http://127.0.0.1:8766/files/controlplane.yml
+  python main.py cli --github-api-url http://127.0.0.1:8766 --docs-dir docs
+"""
+import json
+import hashlib
+import argparse
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+
+def git_blob_sha(data: bytes) -> str:
+    """
+    The sha GitHub lists for a file with this content, computed here rather
+    than imported from main.py so the poller is checked against its own
+    implementation.
+    """
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class UpstreamStandin:
+    def __init__(self, root_dir: str | Path):
+        self.root_dir = Path(root_dir).resolve()
+        self.base_url = ""
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {"requests": 0, "not_modified": 0, "bytes": 0, "paths": {}}
+
+    def record(self, path: str, status: int, sent: int):
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["not_modified"] += status == 304
+            self.stats["bytes"] += sent
+            self.stats["paths"][path] = self.stats["paths"].get(path, 0) + 1
+
+    def resolve(self, rel: str) -> Path | None:
+        path = (self.root_dir / rel).resolve()
+        if path != self.root_dir and self.root_dir not in path.parents:
+            return None
+        return path
+
+    def file(self, rel: str) -> tuple[bytes, str, float] | None:
+        """
+        Return (content, content type, mtime) of a served file.
+        """
+        path = self.resolve(rel)
+        if path is None or not path.is_file():
+            return None
+        content_type = "application/yaml" if path.suffix in (".yml", ".yaml") else "text/plain; charset=utf-8"
+        return path.read_bytes(), content_type, path.stat().st_mtime
+
+    def listing(self, directory: str) -> tuple[bytes, str, float] | None:
+        """
+        Return a contents API listing of `directory`, like file().
+        """
+        path = self.resolve(directory)
+        if path is None or not path.is_dir():
+            return None
+
+        entries = []
+        mtime = path.stat().st_mtime
+        for child in sorted(path.iterdir()):
+            rel = child.relative_to(self.root_dir).as_posix()
+            if child.is_dir():
+                entries.append({"name": child.name, "path": rel, "type": "dir", "sha": None, "download_url": None})
+                continue
+            data = child.read_bytes()
+            mtime = max(mtime, child.stat().st_mtime)
+            entries.append(
+                {
+                    "name": child.name,
+                    "path": rel,
+                    "type": "file",
+                    "size": len(data),
+                    "sha": git_blob_sha(data),
+                    "download_url": f"{self.base_url}/files/{rel}",
+                }
+            )
+        return json.dumps(entries).encode("utf-8"), "application/json", mtime
+
+
+def not_modified(headers, etag: str, mtime: float) -> bool:
+    if_none_match = headers.get("If-None-Match")
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+    if_modified_since = headers.get("If-Modified-Since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def make_handler(standin: UpstreamStandin):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, data: bytes, content_type: str, headers: dict | None = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            path = unquote(url.path)
+
+            if path == "/__stats":
+                with standin.lock:
+                    self._send(200, json.dumps(standin.stats).encode("utf-8"), "application/json")
+                return
+
+            parts = path.strip("/").split("/")
+            found = None
+            if parts[0] == "files" and len(parts) > 1:
+                found = standin.file("/".join(parts[1:]))
+            elif parts[0] == "repos" and len(parts) > 4 and parts[3] == "contents":
+                found = standin.listing("/".join(parts[4:]))
+
+            # Recorded before sending, so a client sees them once answered.
+            if found is None:
+                body = b'{"message": "Not Found"}'
+                standin.record(path, 404, len(body))
+                self._send(404, body, "application/json")
+                return
+
+            data, content_type, mtime = found
+            etag = '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+            headers = {"ETag": etag, "Last-Modified": formatdate(mtime, usegmt=True)}
+
+            status = 304 if not_modified(self.headers, etag, mtime) else 200
+            body = data if status == 200 else b""
+            standin.record(path, status, len(body))
+            self._send(status, body, content_type, headers)
+
+        def do_POST(self):
+            if urlparse(self.path).path == "/__reset":
+                with standin.lock:
+                    standin.reset_stats()
+                self._send(200, b'{"ok": true}', "application/json")
+                return
+            self._send(404, b'{"message": "Not Found"}', "application/json")
+
+    return Handler
+
+
+def start_standin(
+    root_dir: str | Path,
+    host: str = "127.0.0.1",
+    port: int = 0,
+) -> tuple[ThreadingHTTPServer, UpstreamStandin]:
+    """
+    Start a stand-in server on a background thread. Use port=0 to pick a
+    free port; the base URL is f"http://{host}:{server.server_address[1]}".
+    """
+    standin = UpstreamStandin(root_dir)
+    server = ThreadingHTTPServer((host, port), make_handler(standin))
+    server.daemon_threads = True
+    standin.base_url = f"http://{host}:{server.server_address[1]}"
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    return server, standin
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run a local stand-in for the upstream spec URL and GitHub contents API."
+    )
+    parser.add_argument("--root", required=True, help="Directory whose files are served")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+
+    args = parser.parse_args()
+
+    server, standin = start_standin(args.root, args.host, args.port)
+
+    print(f"Upstream stand-in serving {standin.root_dir} on {standin.base_url}")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
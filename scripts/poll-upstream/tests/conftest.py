@@ -0,0 +1,38 @@
+"""
+Loads main.py as `poll_upstream` and standin.py as `upstream_standin`, so
+these tests can run in the same session as the exporter's, which imports
+its own main.py and standin.py as `main` and `standin`. Also provides an
+`upstream` fixture: a stand-in serving a temporary directory.
+"""
+import sys
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+SCRIPT_DIR = Path(__file__).resolve().parent.parent
+
+
+def load(name: str, file_name: str):
+    spec = importlib.util.spec_from_file_location(name, SCRIPT_DIR / file_name)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+poll_upstream = load("poll_upstream", "main.py")
+upstream_standin = load("upstream_standin", "standin.py")
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    """
+    Yield (stand-in, base URL) for a stand-in serving tmp_path/"upstream".
+    """
+    root = tmp_path / "upstream"
+    root.mkdir()
+    server, st = upstream_standin.start_standin(root)
+    yield st, st.base_url
+    server.shutdown()
+    server.server_close()
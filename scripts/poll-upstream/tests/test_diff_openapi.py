@@ -0,0 +1,121 @@
+import copy
+
+from poll_upstream import diff_is_empty, diff_openapi, diff_spec_sections, render_openapi_diff
+
+from openapi_index import compile_openapi_index
+
+SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Control plane", "version": "1.0"},
+    "servers": [{"url": "https://api.example.com/v0"}],
+    "paths": {
+        "/sandboxes": {
+            "get": {
+                "summary": "List sandboxes",
+                "tags": ["compute"],
+                "responses": {
+                    "200": {
+                        "description": "ok",
+                        "content": {
+                            "application/json": {
+                                "schema": {"$ref": "#/components/schemas/Sandbox"}
+                            }
+                        },
+                    }
+                },
+            }
+        },
+        "/sandboxes/{name}": {
+            "delete": {
+                "summary": "Delete sandbox",
+                "tags": ["compute"],
+                "parameters": [
+                    {"name": "name", "in": "path", "required": True, "schema": {"type": "string"}}
+                ],
+                "responses": {"200": {"description": "ok"}},
+            }
+        },
+    },
+    "components": {
+        "schemas": {
+            "Sandbox": {
+                "type": "object",
+                "properties": {"name": {"type": "string"}, "image": {"type": "string"}},
+            }
+        },
+        "securitySchemes": {"bearer": {"type": "http", "scheme": "bearer"}},
+    },
+}
+
+
+def index(spec: dict) -> dict:
+    return compile_openapi_index(spec, "0" * 64)
+
+
+def test_identical_specs_have_empty_diff():
+    diff = diff_openapi(index(SPEC), index(copy.deepcopy(SPEC)))
+    assert diff_is_empty(diff)
+
+
+def test_first_poll_lists_everything_as_added():
+    diff = diff_openapi(None, index(SPEC))
+    assert [entry["key"] for entry in diff["operations"]["added"]] == [
+        "GET /sandboxes",
+        "DELETE /sandboxes/{name}",
+    ]
+    assert diff["schemas"]["added"] == [{"name": "Sandbox"}]
+
+
+def test_operation_changes():
+    new = copy.deepcopy(SPEC)
+    del new["paths"]["/sandboxes/{name}"]
+    new["paths"]["/sandboxes"]["get"]["summary"] = "List all sandboxes"
+    new["paths"]["/sandboxes"]["post"] = {
+        "summary": "Create sandbox",
+        "tags": ["compute"],
+        "responses": {"200": {"description": "ok"}},
+    }
+
+    operations = diff_openapi(index(SPEC), index(new))["operations"]
+
+    assert operations["added"] == [{"key": "POST /sandboxes", "summary": "Create sandbox"}]
+    assert operations["removed"] == [{"key": "DELETE /sandboxes/{name}", "summary": "Delete sandbox"}]
+    assert operations["changed"] == [
+        {"key": "GET /sandboxes", "summary": "List all sandboxes", "fields": ["summary"]}
+    ]
+
+
+def test_schema_property_changes():
+    new = copy.deepcopy(SPEC)
+    properties = new["components"]["schemas"]["Sandbox"]["properties"]
+    del properties["image"]
+    properties["name"] = {"type": "integer"}
+    properties["region"] = {"type": "string"}
+
+    diff = diff_openapi(index(SPEC), index(new))
+
+    assert diff["schemas"]["changed"] == [
+        {"name": "Sandbox", "added": ["region"], "removed": ["image"], "changed": ["name"], "fields": []}
+    ]
+    # The operation returning a Sandbox is not listed as changed itself.
+    assert diff["operations"]["changed"] == []
+
+
+def test_info_changes():
+    new = copy.deepcopy(SPEC)
+    new["info"]["version"] = "1.1"
+    assert diff_openapi(index(SPEC), index(new))["info"] == ["api_version"]
+
+
+def test_non_semantic_changes_show_as_spec_sections():
+    new = copy.deepcopy(SPEC)
+    new["servers"] = [{"url": "https://api.example.com/v1"}]
+    new["components"]["securitySchemes"]["bearer"]["bearerFormat"] = "JWT"
+
+    diff = diff_openapi(index(SPEC), index(new))
+    sections = diff_spec_sections(SPEC, new)
+    body = render_openapi_diff(diff, "https://example.com/spec.yml", sections)
+
+    assert diff_is_empty(diff)
+    assert sections == ["components.securitySchemes", "servers"]
+    assert "components.securitySchemes" in body and "servers" in body
@@ -0,0 +1,157 @@
+import os
+import argparse
+
+from poll_upstream import PollState, poll_api, poll_cli
+
+SPEC = """\
+openapi: 3.0.0
+info: {title: Control plane, version: "1.0"}
+paths:
+  /sandboxes:
+    get:
+      summary: List sandboxes
+      responses: {"200": {description: ok}}
+"""
+
+NEW_OPERATION = """\
+  /sandboxes/{name}:
+    delete:
+      summary: Delete sandbox
+      responses: {"200": {description: ok}}
+"""
+
+
+def api_args(base_url: str, tmp_path) -> argparse.Namespace:
+    return argparse.Namespace(url=f"{base_url}/files/controlplane.yml", spec=str(tmp_path / "controlplane.yml"))
+
+
+def poll_api_once(base_url: str, tmp_path) -> tuple[bool, str]:
+    """One run of `main.py api`: state loaded, polled and saved."""
+    state = PollState(tmp_path / "state.json")
+    result = poll_api(api_args(base_url, tmp_path), state)
+    state.save()
+    return result
+
+
+def test_unchanged_spec_is_not_downloaded_again(upstream, tmp_path):
+    st, base_url = upstream
+    (st.root_dir / "controlplane.yml").write_text(SPEC)
+
+    changed, _ = poll_api_once(base_url, tmp_path)
+    assert changed
+    assert (tmp_path / "controlplane.yml").read_text() == SPEC
+
+    # A newer mtime defeats If-Modified-Since; the 304 comes from If-None-Match.
+    os.utime(st.root_dir / "controlplane.yml", (2**31, 2**31))
+    st.reset_stats()
+    changed, body = poll_api_once(base_url, tmp_path)
+
+    assert not changed
+    assert body == "No upstream changes.\n"
+    assert st.stats["requests"] == 1
+    assert st.stats["not_modified"] == 1
+
+
+def test_changed_spec_is_downloaded_and_diffed(upstream, tmp_path):
+    st, base_url = upstream
+    (st.root_dir / "controlplane.yml").write_text(SPEC)
+    poll_api_once(base_url, tmp_path)
+
+    (st.root_dir / "controlplane.yml").write_text(SPEC + NEW_OPERATION)
+    st.reset_stats()
+    changed, body = poll_api_once(base_url, tmp_path)
+
+    assert changed
+    assert st.stats["not_modified"] == 0
+    assert "/sandboxes/{name}" in body
+    assert (tmp_path / "controlplane.yml").read_text() == SPEC + NEW_OPERATION
+
+
+def test_edited_local_spec_is_fetched_unconditionally(upstream, tmp_path):
+    st, base_url = upstream
+    (st.root_dir / "controlplane.yml").write_text(SPEC)
+    poll_api_once(base_url, tmp_path)
+
+    # The local copy no longer has the hash of the last download, so its
+    # validators must not be sent: a 304 would leave the edit in place.
+    (tmp_path / "controlplane.yml").write_text(SPEC + NEW_OPERATION)
+    st.reset_stats()
+    changed, _ = poll_api_once(base_url, tmp_path)
+
+    assert changed
+    assert st.stats["not_modified"] == 0
+    assert (tmp_path / "controlplane.yml").read_text() == SPEC
+
+
+def cli_args(base_url: str, tmp_path) -> argparse.Namespace:
+    return argparse.Namespace(
+        github_api_url=base_url,
+        repo="blaxel-ai/toolkit",
+        ref="main",
+        docs_dir="docs",
+        mirror=str(tmp_path / "mirror"),
+    )
+
+
+def poll_cli_once(base_url: str, tmp_path) -> tuple[bool, str]:
+    """One run of `main.py cli`: state loaded, polled and saved."""
+    state = PollState(tmp_path / "state.json")
+    result = poll_cli(cli_args(base_url, tmp_path), state)
+    state.save()
+    return result
+
+
+def file_downloads(st) -> dict:
+    return {path: count for path, count in st.stats["paths"].items() if path.startswith("/files/")}
+
+
+def write_cli_docs(st, pages: dict):
+    docs = st.root_dir / "docs"
+    docs.mkdir(exist_ok=True)
+    for name, text in pages.items():
+        (docs / name).write_text(text)
+
+
+def test_cli_downloads_only_files_whose_blob_sha_changed(upstream, tmp_path):
+    st, base_url = upstream
+    write_cli_docs(st, {"bl_get.md": "# bl get\n", "bl_run.md": "# bl run\n"})
+
+    changed, body = poll_cli_once(base_url, tmp_path)
+    assert changed
+    assert "`bl_get.md`" in body
+    assert len(file_downloads(st)) == 2
+
+    write_cli_docs(st, {"bl_run.md": "# bl run\n\nNew flag.\n"})
+    st.reset_stats()
+    changed, body = poll_cli_once(base_url, tmp_path)
+
+    assert changed
+    assert "Updated: `bl_run.md`" in body
+    assert file_downloads(st) == {"/files/docs/bl_run.md": 1}
+    assert (tmp_path / "mirror" / "bl_run.md").read_text() == "# bl run\n\nNew flag.\n"
+
+
+def test_cli_unchanged_listing_costs_one_request(upstream, tmp_path):
+    st, base_url = upstream
+    write_cli_docs(st, {"bl_get.md": "# bl get\n"})
+    poll_cli_once(base_url, tmp_path)
+
+    st.reset_stats()
+    changed, _ = poll_cli_once(base_url, tmp_path)
+
+    assert not changed
+    assert st.stats["requests"] == 1
+    assert st.stats["not_modified"] == 1
+
+
+def test_cli_mirror_matching_the_listing_is_not_downloaded(upstream, tmp_path):
+    st, base_url = upstream
+    write_cli_docs(st, {"bl_get.md": "# bl get\n"})
+    mirror = tmp_path / "mirror"
+    mirror.mkdir()
+    (mirror / "bl_get.md").write_text("# bl get\n")
+
+    changed, _ = poll_cli_once(base_url, tmp_path)
+
+    assert not changed
+    assert file_downloads(st) == {}